@@ -3,6 +3,7 @@ from backend.dataflow.cfgbuilder import CFGBuilder
 from backend.dataflow.livenessanalyzer import LivenessAnalyzer
 from backend.reg.bruteregalloc import BruteRegAlloc
 from backend.riscv.riscvasmemitter import RiscvAsmEmitter
+from utils.tac.tacfunc import TACFunc
 from utils.tac.tacprog import TACProg
 
 """
@@ -15,13 +16,17 @@ class Asm:
         self.regAlloc = regAlloc
 
     def transform(self, prog: TACProg):
-        analyzer = LivenessAnalyzer()
-
         for func in prog.funcs:
-            pair = self.emitter.selectInstr(func)
-            builder = CFGBuilder()
-            cfg: CFG = builder.buildFrom(pair[0])
-            analyzer.accept(cfg)
-            self.regAlloc.accept(cfg, pair[1])
+            self.transformFunc(func)
 
         return self.emitter.emitEnd()
+
+    # generate the asm code of a single function into the emitter's printer
+    def transformFunc(self, func: TACFunc) -> None:
+        analyzer = LivenessAnalyzer()
+
+        pair = self.emitter.selectInstr(func)
+        builder = CFGBuilder()
+        cfg: CFG = builder.buildFrom(pair[0])
+        analyzer.accept(cfg)
+        self.regAlloc.accept(cfg, pair[1])
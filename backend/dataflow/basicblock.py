@@ -17,6 +17,7 @@ class BlockKind(Enum):
     END_BY_COND_JUMP = auto()
     END_BY_RETURN = auto()
     CALL = auto()
+    TAIL_CALL = auto()
 
 
 """
@@ -28,6 +29,8 @@ Sequence of instrs executed sequentially (from baidu)
 label: the label of the block, which will be used in CfgBuilder
  locs: sequence of instrs
 
+loopDepth: how many loops contain the block (filled in by CFG.getLoopForest)
+
  define: the temps definded in this basicblock
 liveUse: the temps used in this basicblock before it's redefine
  liveIn: the active temps in the start of the basicblock
@@ -43,6 +46,7 @@ class BasicBlock:
         self.id = id
         self.label = label
         self.locs: list[Loc] = locs.copy()
+        self.loopDepth = 0
 
         self.define: set[int] = set()
         self.liveUse: set[int] = set()
@@ -1,4 +1,8 @@
+from typing import Optional
+
 from backend.dataflow.basicblock import BasicBlock
+from backend.dataflow.dominance import DominatorTree, reversePostorder
+from backend.dataflow.loop import LoopForest
 
 """
 CFG: Control Flow Graph
@@ -6,6 +10,9 @@ CFG: Control Flow Graph
 nodes: sequence of basicblock
 edges: sequence of edge(u,v), which represents after block u is executed, block v may be executed
 links: links[u][0] represent the Prev of u, links[u][1] represent the Succ of u,
+
+The reverse postorder, the dominator tree and the loop forest are computed the first
+time they are asked for, and kept: a CFG isn't changed once it's built.
 """
 
 
@@ -28,12 +35,23 @@ class CFG:
         to find all the reachable basic blocks.
         """
         self.reachable = set()
-        q = [0]
-        while q:
-            visited_node = q.pop(0)
-            self.reachable.add(visited_node)
-            for n in self.links[visited_node][1].difference(self.reachable):
-                q.append(n)
+        if nodes:
+            self.reachable.add(0)
+            stack = [0]
+            while stack:
+                visited_node = stack.pop()
+                for n in self.links[visited_node][1]:
+                    if n not in self.reachable:
+                        self.reachable.add(n)
+                        stack.append(n)
+
+        self.rpo: Optional[list[int]] = None
+        self.domTree: Optional[DominatorTree] = None
+        self.loopForest: Optional[LoopForest] = None
+
+    def __len__(self):
+        return len(self.nodes)
+
     def getBlock(self, id):
         return self.nodes[id]
 
@@ -51,3 +69,20 @@ class CFG:
 
     def iterator(self):
         return iter(self.nodes)
+
+    # the reachable blocks, each one before its successors (back edges aside)
+    def getReversePostorder(self) -> list[int]:
+        if self.rpo is None:
+            self.rpo = reversePostorder(self)
+        return self.rpo
+
+    def getDominatorTree(self) -> DominatorTree:
+        if self.domTree is None:
+            self.domTree = DominatorTree(self)
+        return self.domTree
+
+    # also sets `loopDepth` of every block
+    def getLoopForest(self) -> LoopForest:
+        if self.loopForest is None:
+            self.loopForest = LoopForest(self, self.getDominatorTree())
+        return self.loopForest
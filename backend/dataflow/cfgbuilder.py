@@ -26,6 +26,14 @@ class CFGBuilder:
                     self.close()
                     self.currentBBLabel = item.label
             else:
+                if isinstance(item, Riscv.RTailCall):
+                    # like a call, in a block of its own, but nothing runs after it
+                    bb = BasicBlock(BlockKind.CONTINUOUS, len(self.bbs), self.currentBBLabel, self.buf)
+                    self.save(bb)
+                    self.buf.append(Loc(item))
+                    bb = BasicBlock(BlockKind.TAIL_CALL, len(self.bbs), self.currentBBLabel, self.buf)
+                    self.save(bb)
+                    continue
                 if isinstance(item, Riscv.RCall):
                     bb = BasicBlock(BlockKind.CONTINUOUS, len(self.bbs), self.currentBBLabel, self.buf)
                     self.save(bb)
@@ -63,9 +71,9 @@ class CFGBuilder:
                 if self.labelsToBBs.get(bb.getLastInstr().label) is None:
                     raise NullPointerException
                 edges.append((bb.id, self.labelsToBBs.get(bb.getLastInstr().label)))
-                if now < len(self.bbs) - 1:
+                if now < len(self.bbs):
                     edges.append((bb.id, bb.id + 1))
-            elif bb.kind is BlockKind.END_BY_RETURN:
+            elif bb.kind in (BlockKind.END_BY_RETURN, BlockKind.TAIL_CALL):
                 pass
             else:
                 if now < len(self.bbs):
@@ -81,6 +89,10 @@ class CFGBuilder:
             self.labelsToBBs[bb.label] = bb.id
 
     def close(self):
+        # a label right after a jump or a return: there is no block to close (but the entry
+        # block is always created, so that nothing can jump back to the entry)
+        if not self.buf and self.currentBBLabel is None and self.bbs:
+            return
         bb = BasicBlock(
             BlockKind.CONTINUOUS, len(self.bbs), self.currentBBLabel, self.buf
         )
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from backend.dataflow.cfg import CFG
+
+"""
+DominatorTree: who dominates whom in a CFG (entry: block 0)
+
+      rpo: the reachable blocks in reverse postorder (order[b]: the position of b in it)
+     idom: idom[b] is the immediate dominator of b (idom[0] == 0, -1 for unreachable blocks)
+ children: the blocks immediately dominated by each block
+ frontier: frontier[b] is the dominance frontier of b (computed on first use)
+
+The immediate dominators are computed with the algorithm of Lengauer and Tarjan (with
+path compression, so O(E log N) even for deeply nested loops, where the simpler iterative
+algorithms go quadratic), and the frontiers with the walk up the tree of Cooper, Harvey
+and Kennedy. Nothing here is recursive, so deep CFGs are fine.
+"""
+
+
+def reversePostorder(cfg: CFG) -> list[int]:
+    if len(cfg) == 0:
+        return []
+    postorder = []
+    visited = {0}
+    stack = [(0, iter(sorted(cfg.getSucc(0))))]
+    while stack:
+        node, succs = stack[-1]
+        for succ in succs:
+            if succ not in visited:
+                visited.add(succ)
+                stack.append((succ, iter(sorted(cfg.getSucc(succ)))))
+                break
+        else:
+            stack.pop()
+            postorder.append(node)
+    postorder.reverse()
+    return postorder
+
+
+class DominatorTree:
+    def __init__(self, cfg: CFG) -> None:
+        n = len(cfg)
+        self.rpo = cfg.getReversePostorder()
+        self.order = [-1] * n
+        for i, b in enumerate(self.rpo):
+            self.order[b] = i
+
+        self.idom = self.immediateDominators(cfg)
+        idom = self.idom
+
+        self.children: list[list[int]] = [[] for _ in range(n)]
+        for b in self.rpo[1:]:
+            self.children[idom[b]].append(b)
+
+        # preorder interval of each subtree, for O(1) dominance queries
+        self.pre = [-1] * n
+        self.last = [-1] * n
+        counter = 0
+        stack = [(0, False)] if n > 0 else []
+        while stack:
+            b, done = stack.pop()
+            if done:
+                self.last[b] = counter - 1
+                continue
+            self.pre[b] = counter
+            counter += 1
+            stack.append((b, True))
+            for child in reversed(self.children[b]):
+                stack.append((child, False))
+
+        self.cfg = cfg
+        self._frontier: Optional[list[set[int]]] = None
+
+    # computed when first asked for: the frontiers can be quadratic in size (deeply nested loops),
+    # while everything else here is (nearly) linear
+    @property
+    def frontier(self) -> list[set[int]]:
+        if self._frontier is None:
+            idom = self.idom
+            frontier: list[set[int]] = [set() for _ in idom]
+            for b in self.rpo:
+                preds = [p for p in self.cfg.getPrev(b) if idom[p] != -1]
+                if len(preds) < 2:
+                    continue
+                for p in preds:
+                    runner = p
+                    while runner != idom[b]:
+                        frontier[runner].add(b)
+                        runner = idom[runner]
+            self._frontier = frontier
+        return self._frontier
+
+    @staticmethod
+    def immediateDominators(cfg: CFG) -> list[int]:
+        n = len(cfg)
+        idomOf = [-1] * n
+        if n == 0:
+            return idomOf
+
+        # depth first numbering of the reachable blocks
+        vertex: list[int] = []
+        num = [-1] * n
+        parent: list[int] = []
+        stack = [(0, -1)]
+        while stack:
+            b, p = stack.pop()
+            if num[b] != -1:
+                continue
+            num[b] = len(vertex)
+            vertex.append(b)
+            parent.append(p)
+            for succ in sorted(cfg.getSucc(b), reverse=True):
+                if num[succ] == -1:
+                    stack.append((succ, num[b]))
+
+        # from here on, blocks are named by their number
+        m = len(vertex)
+        semi = list(range(m))
+        label = list(range(m))
+        ancestor = [-1] * m
+        idom = [-1] * m
+        bucket: list[list[int]] = [[] for _ in range(m)]
+
+        def evaluate(v: int) -> int:
+            if ancestor[v] == -1:
+                return v
+            path = []
+            x = v
+            while ancestor[ancestor[x]] != -1:
+                path.append(x)
+                x = ancestor[x]
+            # compress the path, starting next to the root
+            while path:
+                y = path.pop()
+                a = ancestor[y]
+                if semi[label[a]] < semi[label[y]]:
+                    label[y] = label[a]
+                ancestor[y] = ancestor[a]
+            return label[v]
+
+        for w in range(m - 1, 0, -1):
+            for p in cfg.getPrev(vertex[w]):
+                v = num[p]
+                if v == -1:
+                    continue
+                u = evaluate(v)
+                if semi[u] < semi[w]:
+                    semi[w] = semi[u]
+            bucket[semi[w]].append(w)
+            ancestor[w] = parent[w]
+            for v in bucket[parent[w]]:
+                u = evaluate(v)
+                idom[v] = u if semi[u] < semi[v] else parent[w]
+            bucket[parent[w]] = []
+        for w in range(1, m):
+            if idom[w] != semi[w]:
+                idom[w] = idom[idom[w]]
+
+        idomOf[0] = 0
+        for w in range(1, m):
+            idomOf[vertex[w]] = vertex[idom[w]]
+        return idomOf
+
+    def isReachable(self, b: int) -> bool:
+        return self.idom[b] != -1
+
+    # whether a dominates b (every block dominates itself)
+    def dominates(self, a: int, b: int) -> bool:
+        if self.pre[a] == -1 or self.pre[b] == -1:
+            return False
+        return self.pre[a] <= self.pre[b] <= self.last[a]
+
+    # the blocks of the tree in preorder: a block always comes before the ones it dominates
+    def preorder(self) -> list[int]:
+        result = []
+        stack = [0] if self.rpo else []
+        while stack:
+            b = stack.pop()
+            result.append(b)
+            stack.extend(reversed(self.children[b]))
+        return result
@@ -18,10 +18,12 @@ class LivenessAnalyzer:
             bb.liveIn.update(bb.liveUse)
             bb.liveOut = set()
 
+        # liveness flows backwards, so visiting the blocks in reverse order
+        # lets acyclic code converge in a single round
         changed = True
         while changed:
             changed = False
-            for bb in graph.nodes:
+            for bb in reversed(graph.nodes):
                 for next in graph.getSucc(bb.id):
                     bb.liveOut.update(graph.getBlock(next).liveIn)
 
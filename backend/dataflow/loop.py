@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+from backend.dataflow.dominance import DominatorTree
+
+if TYPE_CHECKING:
+    from backend.dataflow.cfg import CFG
+
+"""
+Loop: a natural loop of a CFG
+
+ header: the block every iteration starts from (it dominates the whole loop)
+latches: the blocks with a back edge to the header
+ blocks: all the blocks of the loop, those of nested loops included
+ parent: the loop immediately containing this one (None for an outermost loop)
+  depth: 1 for an outermost loop, 2 for a loop directly inside it, and so on
+
+LoopForest: all the natural loops of a CFG, nested into a forest
+
+Loops with the same header are merged into one. A retreating edge whose target doesn't
+dominate its source (irreducible control flow) doesn't make a loop.
+The headers are visited inner first (postorder of the dominator tree), and each loop is
+discovered by walking backwards from its latches. A block already claimed by an inner loop
+is skipped over by jumping to that loop's header, so every edge is looked at a bounded
+number of times and the whole forest is built in near linear time.
+"""
+
+
+class Loop:
+    def __init__(self, header: int) -> None:
+        self.header = header
+        self.latches: list[int] = []
+        # the blocks whose innermost loop is this one
+        self.ownBlocks: list[int] = []
+        self.parent: Optional[Loop] = None
+        self.children: list[Loop] = []
+        self.depth = 0
+        self._blocks: Optional[list[int]] = None
+        self._blockSet: Optional[set[int]] = None
+        # union-find link to the outermost loop known so far (only used while building the forest)
+        self.top: Loop = self
+
+    # computed when first asked for: storing them for every loop would be quadratic for deep nests
+    @property
+    def blocks(self) -> list[int]:
+        if self._blocks is None:
+            blocks = []
+            stack = [self]
+            while stack:
+                loop = stack.pop()
+                blocks.extend(loop.ownBlocks)
+                stack.extend(loop.children)
+            self._blocks = sorted(blocks)
+        return self._blocks
+
+    @property
+    def blockSet(self) -> set[int]:
+        if self._blockSet is None:
+            self._blockSet = set(self.blocks)
+        return self._blockSet
+
+    def contains(self, b: int) -> bool:
+        return b in self.blockSet
+
+    # the edges (inside, outside) that leave the loop
+    def exitEdges(self, cfg: CFG) -> list[tuple[int, int]]:
+        return [(b, s) for b in self.blocks for s in sorted(cfg.getSucc(b)) if s not in self.blockSet]
+
+    # the predecessors of the header that are outside the loop
+    def entries(self, cfg: CFG) -> list[int]:
+        return sorted(p for p in cfg.getPrev(self.header) if p not in self.blockSet)
+
+    def __repr__(self) -> str:
+        return "Loop(header=%d, depth=%d)" % (self.header, self.depth)
+
+
+def outermost(loop: Loop) -> Loop:
+    root = loop
+    while root.top is not root:
+        root = root.top
+    while loop.top is not root:
+        loop.top, loop = root, loop.top
+    return root
+
+
+class LoopForest:
+    def __init__(self, cfg: CFG, dom: DominatorTree) -> None:
+        n = len(cfg)
+        # the innermost loop of every block
+        self.loopOf: list[Optional[Loop]] = [None] * n
+        # inner loops come before the loops containing them
+        self.loops: list[Loop] = []
+        self.topLevel: list[Loop] = []
+
+        for header in reversed(dom.preorder()):
+            latches = sorted(p for p in cfg.getPrev(header) if dom.dominates(header, p))
+            if not latches:
+                continue
+            loop = Loop(header)
+            loop.latches = latches
+            self.discover(cfg, dom, loop)
+            self.loops.append(loop)
+
+        for loop in reversed(self.loops):
+            if loop.parent is None:
+                self.topLevel.append(loop)
+                loop.depth = 1
+            else:
+                loop.depth = loop.parent.depth + 1
+        for loop in self.loops:
+            loop.children.reverse()
+        self.topLevel.reverse()
+
+        for bb in cfg.nodes:
+            loop = self.loopOf[bb.id]
+            if loop is None:
+                bb.loopDepth = 0
+            else:
+                loop.ownBlocks.append(bb.id)
+                bb.loopDepth = loop.depth
+
+    def discover(self, cfg: CFG, dom: DominatorTree, loop: Loop) -> None:
+        self.loopOf[loop.header] = loop
+        work = [latch for latch in loop.latches if latch != loop.header]
+        while work:
+            b = work.pop()
+            inner = self.loopOf[b]
+            if inner is None:
+                self.loopOf[b] = loop
+                work.extend(p for p in cfg.getPrev(b) if dom.isReachable(p))
+                continue
+            # skip over the outermost loop found so far that contains b
+            inner = outermost(inner)
+            if inner is loop:
+                continue
+            inner.parent = loop
+            inner.top = loop
+            loop.children.append(inner)
+            for p in cfg.getPrev(inner.header):
+                if dom.isReachable(p) and (self.loopOf[p] is None or outermost(self.loopOf[p]) is not loop):
+                    work.append(p)
+
+    # the innermost loop containing block b, if any
+    def getLoopFor(self, b: int) -> Optional[Loop]:
+        return self.loopOf[b]
@@ -0,0 +1,18 @@
+"""
+Machine independent optimizations on TAC, driven by a PassManager.
+"""
+
+from .passmanager import Analysis, AnalysisManager, FunctionPass, ModulePass, PassManager
+from .pipeline import PASSES, buildPassManager, passClass, pipelineFor
+
+__all__ = [
+    "Analysis",
+    "AnalysisManager",
+    "FunctionPass",
+    "ModulePass",
+    "PassManager",
+    "PASSES",
+    "buildPassManager",
+    "passClass",
+    "pipelineFor",
+]
@@ -0,0 +1,345 @@
+from typing import Callable, Optional, Union
+
+from backend.dataflow.basicblock import BasicBlock
+from backend.dataflow.cfg import CFG
+from backend.dataflow.loc import Loc
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.temp import Temp
+
+from .analysis import CFGAnalysis, writeBack
+from .constfold import foldBinary, foldUnary
+from .lvn import COMMUTATIVE
+from .passmanager import AnalysisManager, FunctionPass
+
+"""
+AlgebraicSimplify: algebraic identities and reassociation, by rewrite rules
+
+The identities are written down as rules, `pattern -> result`, in RULES below. A pattern
+is a tuple (op, operands...) of a TacUnaryOp / TacBinaryOp (or a CondBranchOp, for the
+condition of a branch), whose operands are in turn:
+  a name like "x" or "y": any temp (the same name twice, the same temp),
+  a name like "c" or "c1": a temp holding a known constant, which the name stands for,
+  an int: a temp holding that constant,
+  a pattern: a temp computed by that, earlier in the block (and not overwritten since).
+A result is a name, an int or a tuple of the same kind; the parts made of constants only
+are folded, and the others computed into new temps before the instruction. So
+((x + c1) + c2) -> (x + (c1 + c2)) combines the constants of a chain of additions, one
+link at a time, and leaves the inner sum to DeadCodeElim if nothing else reads it. Rules
+can have a condition on their constants (`when`).
+
+The rules are compiled once into matchers: nested closures testing the operands in order
+and binding the names as they go, filed under the op at their root, so that an
+instruction is only tried against the rules for its own op. The operands of commutative
+operations are tried both ways, by compiling both orders. Every instruction is rewritten
+until no rule fires, at most BUDGET times the size of the function in all, so that rules
+that undo each other can't loop for ever.
+
+Constants are the temps loaded with one in the block, and the temps that are only ever
+loaded with the same one in the whole function (as the back end sees them). All rules
+hold of 32-bit values, as the back end computes them (x / -1 is -x, with -INT_MIN being
+INT_MIN, and a division by 0 is never taken apart).
+"""
+
+# the rewrites allowed per instruction of the function
+BUDGET = 4
+
+Pattern = Union[str, int, tuple]
+
+ADD, SUB, MUL = TacBinaryOp.ADD, TacBinaryOp.SUB, TacBinaryOp.MUL
+DIV, REM, DIVU, REMU = TacBinaryOp.DIV, TacBinaryOp.REM, TacBinaryOp.DIVU, TacBinaryOp.REMU
+EQU, NEQ, SLT, LEQ, SGT, GEQ = (
+    TacBinaryOp.EQU,
+    TacBinaryOp.NEQ,
+    TacBinaryOp.SLT,
+    TacBinaryOp.LEQ,
+    TacBinaryOp.SGT,
+    TacBinaryOp.GEQ,
+)
+AND, OR = TacBinaryOp.AND, TacBinaryOp.OR
+NEG, NOT, SEQZ, SNEZ = TacUnaryOp.NEG, TacUnaryOp.NOT, TacUnaryOp.SEQZ, TacUnaryOp.SNEZ
+BEQ, BNE = CondBranchOp.BEQ, CondBranchOp.BNE
+
+
+class Rule:
+    """
+    pattern -> result, where `when` (if any) holds of the constants bound by the pattern.
+    """
+
+    def __init__(
+        self, pattern: tuple, result: Pattern, when: Optional[Callable[[dict[str, int]], bool]] = None
+    ) -> None:
+        self.pattern = pattern
+        self.result = result
+        self.when = when
+
+    def __repr__(self) -> str:
+        return "%s -> %s" % (self.pattern, self.result)
+
+
+def nonzero(constants: dict[str, int]) -> bool:
+    return constants["c"] != 0
+
+
+RULES: list[Rule] = [
+    # identities
+    Rule((ADD, "x", 0), "x"),
+    Rule((SUB, "x", 0), "x"),
+    Rule((SUB, 0, "x"), (NEG, "x")),
+    Rule((MUL, "x", 1), "x"),
+    Rule((MUL, "x", 0), 0),
+    Rule((MUL, "x", -1), (NEG, "x")),
+    Rule((DIV, "x", 1), "x"),
+    Rule((DIV, "x", -1), (NEG, "x")),
+    Rule((REM, "x", 1), 0),
+    Rule((REM, "x", -1), 0),
+    Rule((DIVU, "x", 1), "x"),
+    Rule((REMU, "x", 1), 0),
+    Rule((SUB, "x", "x"), 0),
+    Rule((EQU, "x", "x"), 1),
+    Rule((NEQ, "x", "x"), 0),
+    Rule((SLT, "x", "x"), 0),
+    Rule((LEQ, "x", "x"), 1),
+    Rule((SGT, "x", "x"), 0),
+    Rule((GEQ, "x", "x"), 1),
+    Rule((NEG, (NEG, "x")), "x"),
+    Rule((NOT, (NOT, "x")), "x"),
+    # sums and differences that cancel
+    Rule((ADD, "x", (NEG, "y")), (SUB, "x", "y")),
+    Rule((SUB, "x", (NEG, "y")), (ADD, "x", "y")),
+    Rule((NEG, (SUB, "x", "y")), (SUB, "y", "x")),
+    Rule((SUB, (ADD, "x", "y"), "y"), "x"),
+    Rule((ADD, (SUB, "x", "y"), "y"), "x"),
+    Rule((SUB, "x", (SUB, "x", "y")), "y"),
+    Rule((SUB, (SUB, "x", "y"), "x"), (NEG, "y")),
+    # truth values: && and || only look at whether their operands are 0
+    Rule((AND, "x", "x"), (SNEZ, "x")),
+    Rule((OR, "x", "x"), (SNEZ, "x")),
+    Rule((AND, "x", 0), 0),
+    Rule((AND, "x", "c"), (SNEZ, "x"), nonzero),
+    Rule((OR, "x", 0), (SNEZ, "x")),
+    Rule((OR, "x", "c"), 1, nonzero),
+    Rule((AND, (SNEZ, "x"), "y"), (AND, "x", "y")),
+    Rule((OR, (SNEZ, "x"), "y"), (OR, "x", "y")),
+    Rule((EQU, "x", 0), (SEQZ, "x")),
+    Rule((NEQ, "x", 0), (SNEZ, "x")),
+    Rule((SEQZ, (SEQZ, "x")), (SNEZ, "x")),
+    Rule((SNEZ, (SNEZ, "x")), (SNEZ, "x")),
+    Rule((SEQZ, (SNEZ, "x")), (SEQZ, "x")),
+    Rule((SNEZ, (SEQZ, "x")), (SEQZ, "x")),
+    Rule((SEQZ, (NEG, "x")), (SEQZ, "x")),
+    Rule((SNEZ, (NEG, "x")), (SNEZ, "x")),
+    # and so do branches
+    Rule((BEQ, (SEQZ, "x")), (BNE, "x")),
+    Rule((BNE, (SEQZ, "x")), (BEQ, "x")),
+    Rule((BEQ, (SNEZ, "x")), (BEQ, "x")),
+    Rule((BNE, (SNEZ, "x")), (BNE, "x")),
+    Rule((BEQ, (NEG, "x")), (BEQ, "x")),
+    Rule((BNE, (NEG, "x")), (BNE, "x")),
+    # reassociation: the constants of a chain come together
+    Rule((ADD, (ADD, "x", "c1"), "c2"), (ADD, "x", (ADD, "c1", "c2"))),
+    Rule((ADD, (SUB, "x", "c1"), "c2"), (ADD, "x", (SUB, "c2", "c1"))),
+    Rule((SUB, (ADD, "x", "c1"), "c2"), (ADD, "x", (SUB, "c1", "c2"))),
+    Rule((SUB, (SUB, "x", "c1"), "c2"), (SUB, "x", (ADD, "c1", "c2"))),
+    Rule((ADD, (SUB, "c1", "x"), "c2"), (SUB, (ADD, "c1", "c2"), "x")),
+    Rule((SUB, (SUB, "c1", "x"), "c2"), (SUB, (SUB, "c1", "c2"), "x")),
+    Rule((SUB, "c2", (ADD, "x", "c1")), (SUB, (SUB, "c2", "c1"), "x")),
+    Rule((SUB, "c2", (SUB, "x", "c1")), (SUB, (ADD, "c2", "c1"), "x")),
+    Rule((SUB, "c2", (SUB, "c1", "x")), (ADD, "x", (SUB, "c2", "c1"))),
+    Rule((MUL, (MUL, "x", "c1"), "c2"), (MUL, "x", (MUL, "c1", "c2"))),
+    Rule((NEG, (ADD, "x", "c")), (SUB, (NEG, "c"), "x")),
+    Rule((ADD, (MUL, "x", "c1"), (MUL, "x", "c2")), (MUL, "x", (ADD, "c1", "c2"))),
+    Rule((ADD, (MUL, "x", "c"), "x"), (MUL, "x", (ADD, "c", 1))),
+    Rule((SUB, (MUL, "x", "c"), "x"), (MUL, "x", (SUB, "c", 1))),
+]
+
+
+def isConstantName(name: str) -> bool:
+    return name.startswith("c")
+
+
+class Match:
+    """
+    What a pattern is matched against (the definitions and constants of the temps at the
+    instruction), and the names it has bound so far.
+    """
+
+    def __init__(
+        self, definitionOf: Callable[[Temp], Optional[TACInstr]], constantOf: Callable[[Temp], Optional[int]]
+    ) -> None:
+        self.definitionOf = definitionOf
+        self.constantOf = constantOf
+        self.temps: dict[str, Temp] = {}
+        self.constants: dict[str, int] = {}
+
+
+# matches the temps read by an instruction
+Matcher = Callable[[list[Temp], Match], bool]
+
+
+def compileOperand(pattern: Pattern) -> Callable[[Temp, Match], bool]:
+    if isinstance(pattern, int):
+        return lambda temp, match: match.constantOf(temp) == pattern
+    if isinstance(pattern, str) and isConstantName(pattern):
+
+        def bindConstant(temp: Temp, match: Match) -> bool:
+            value = match.constantOf(temp)
+            return value is not None and match.constants.setdefault(pattern, value) == value
+
+        return bindConstant
+    if isinstance(pattern, str):
+        return lambda temp, match: match.temps.setdefault(pattern, temp).index == temp.index
+    op, operands = pattern[0], compileOperands(pattern[1:])
+
+    def matchDefinition(temp: Temp, match: Match) -> bool:
+        instr = match.definitionOf(temp)
+        return instr is not None and instr.op == op and operands(instr.srcs, match)
+
+    return matchDefinition
+
+
+def compileOperands(patterns: tuple) -> Matcher:
+    matchers = [compileOperand(pattern) for pattern in patterns]
+    return lambda temps, match: all(matcher(temp, match) for matcher, temp in zip(matchers, temps))
+
+
+# the pattern, and the same with the operands of commutative operations swapped
+def variants(pattern: Pattern) -> list[Pattern]:
+    if not isinstance(pattern, tuple):
+        return [pattern]
+    result = [(pattern[0],)]
+    for operand in pattern[1:]:
+        result = [done + (variant,) for done in result for variant in variants(operand)]
+    if pattern[0] in COMMUTATIVE:
+        result += [(p[0], p[2], p[1]) for p in result if p[1] != p[2]]
+    return result
+
+
+class RuleSet:
+    """
+    The rules, compiled and filed under the op at the root of their patterns.
+    """
+
+    def __init__(self, rules: list[Rule]) -> None:
+        self.byOp: dict[Union[TacUnaryOp, TacBinaryOp, CondBranchOp], list[tuple[Rule, Matcher]]] = {}
+        for rule in rules:
+            for pattern in variants(rule.pattern):
+                self.byOp.setdefault(pattern[0], []).append((rule, compileOperands(pattern[1:])))
+
+    # the first rule matching instr, and what it bound
+    def match(self, instr: TACInstr, newMatch: Callable[[], Match]) -> Optional[tuple[Rule, Match]]:
+        for rule, matcher in self.byOp.get(instr.op, ()):
+            match = newMatch()
+            if matcher(instr.srcs, match) and (rule.when is None or rule.when(match.constants)):
+                return rule, match
+        return None
+
+
+# the value of a result made of constants only; None if it isn't
+def evaluate(result: Pattern, constants: dict[str, int]) -> Optional[int]:
+    if isinstance(result, int):
+        return result
+    if isinstance(result, str):
+        return constants.get(result)
+    values = [evaluate(operand, constants) for operand in result[1:]]
+    if None in values:
+        return None
+    if isinstance(result[0], TacUnaryOp):
+        return foldUnary(result[0], values[0])
+    return foldBinary(result[0], values[0], values[1])
+
+
+class AlgebraicSimplify(FunctionPass):
+    name = "algebra"
+
+    rules = RuleSet(RULES)
+
+    def __init__(self) -> None:
+        self.rewrites = 0
+
+    def summary(self) -> str:
+        return "%d rewrites" % self.rewrites
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        cfg: CFG = am.get(CFGAnalysis, func)
+        self.rewrites = 0
+        self.func = func
+        self.budget = BUDGET * sum(len(bb.locs) for bb in cfg.nodes)
+        self.constants = func.constants()
+        changed = False
+        for bb in cfg.nodes:
+            changed = self.simplifyBlock(bb) or changed
+        if changed:
+            writeBack(func, cfg)
+        return changed
+
+    def simplifyBlock(self, bb: BasicBlock) -> bool:
+        # temp index -> the instruction of the block computing it, while what it read is unchanged
+        definitions: dict[int, TACInstr] = {}
+        # temp index -> the constant the block loaded into it
+        known: dict[int, int] = {}
+
+        def constantOf(temp: Temp) -> Optional[int]:
+            return known.get(temp.index, self.constants.get(temp.index))
+
+        def newMatch() -> Match:
+            return Match(lambda temp: definitions.get(temp.index), constantOf)
+
+        def define(instr: TACInstr) -> None:
+            for index in instr.getWritten():
+                known.pop(index, None)
+                definitions.pop(index, None)
+                for other in [t for t, definition in definitions.items() if index in definition.getRead()]:
+                    del definitions[other]
+            if isinstance(instr, LoadImm4):
+                known[instr.dst.index] = instr.value
+            elif isinstance(instr, (Unary, Binary)) and instr.dst.index not in instr.getRead():
+                definitions[instr.dst.index] = instr
+
+        changed = False
+        locs: list[Loc] = []
+        for loc in bb.locs:
+            instr = loc.instr
+            while self.budget > 0 and isinstance(instr, (Unary, Binary, CondBranch)):
+                found = self.rules.match(instr, newMatch)
+                if found is None:
+                    break
+                rule, match = found
+                before: list[TACInstr] = []
+                instr = self.build(instr, rule.result, match, before)
+                for new in before:
+                    locs.append(Loc(new))
+                    define(new)
+                self.budget -= 1
+                self.rewrites += 1
+                changed = True
+            loc.instr = instr
+            locs.append(loc)
+            define(instr)
+        bb.locs = locs
+        return changed
+
+    # what replaces instr, with `before` the instructions computing its new operands
+    def build(self, instr: TACInstr, result: Pattern, match: Match, before: list[TACInstr]) -> TACInstr:
+        if isinstance(instr, CondBranch):
+            return CondBranch(result[0], self.operand(result[1], match, before), instr.target)
+        return self.compute(instr.dst, result, match, before)
+
+    def compute(self, dst: Temp, result: Pattern, match: Match, before: list[TACInstr]) -> TACInstr:
+        value = evaluate(result, match.constants)
+        if value is not None:
+            return LoadImm4(dst, value)
+        if isinstance(result, str):
+            return Assign(dst, match.temps[result])
+        operands = [self.operand(operand, match, before) for operand in result[1:]]
+        if isinstance(result[0], TacUnaryOp):
+            return Unary(result[0], dst, operands[0])
+        return Binary(result[0], dst, operands[0], operands[1])
+
+    # the temp holding a part of a result: a temp bound by the pattern, or a new one
+    def operand(self, result: Pattern, match: Match, before: list[TACInstr]) -> Temp:
+        if isinstance(result, str) and result in match.temps:
+            return match.temps[result]
+        temp = self.func.freshTemp()
+        before.append(self.compute(temp, result, match, before))
+        return temp
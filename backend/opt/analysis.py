@@ -0,0 +1,112 @@
+from backend.dataflow.basicblock import BasicBlock
+from backend.dataflow.cfg import CFG
+from backend.dataflow.cfgbuilder import CFGBuilder
+from backend.dataflow.dominance import DominatorTree
+from backend.dataflow.livenessanalyzer import LivenessAnalyzer
+from backend.dataflow.loc import Loc
+from backend.dataflow.loop import LoopForest
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import Branch, CondBranch, Mark, Return, TACInstr
+
+from .passmanager import Analysis, AnalysisManager
+
+"""
+The analyses that optimization passes can ask the AnalysisManager for.
+They are built over the TAC of a function with the same CFG classes the back end uses.
+
+The cost of a value living across blocks: the back end (BruteRegAlloc) keeps every such
+value on the stack, storing it at the end of the block writing it and loading it again
+in each block reading it. Keeping a value for later thus costs a store and a load, more
+than computing a constant, a copy or an addition again; the passes that move or keep
+computations across blocks (LICM, IndVars, PRE) weigh what they save against it.
+"""
+
+
+class CFGAnalysis(Analysis):
+    name = "cfg"
+
+    def compute(self, func: TACFunc, am: AnalysisManager) -> CFG:
+        return CFGBuilder().buildFrom(func.getInstrSeq())
+
+
+class LivenessAnalysis(Analysis):
+    """
+    The CFG of the function, with `liveIn`/`liveOut` filled in for its blocks and locs.
+    """
+
+    name = "liveness"
+
+    def compute(self, func: TACFunc, am: AnalysisManager) -> CFG:
+        cfg = am.get(CFGAnalysis, func)
+        LivenessAnalyzer().accept(cfg)
+        return cfg
+
+
+class DominatorAnalysis(Analysis):
+    name = "dominators"
+
+    def compute(self, func: TACFunc, am: AnalysisManager) -> DominatorTree:
+        return am.get(CFGAnalysis, func).getDominatorTree()
+
+
+class LoopAnalysis(Analysis):
+    name = "loops"
+
+    def compute(self, func: TACFunc, am: AnalysisManager) -> LoopForest:
+        return am.get(CFGAnalysis, func).getLoopForest()
+
+
+# Turn the blocks of `cfg` (possibly edited in place) back into the instruction sequence of `func`.
+def writeBack(func: TACFunc, cfg: CFG) -> None:
+    func.instrSeq = linearize(func, cfg.nodes)
+
+
+def linearize(func: TACFunc, blocks) -> list[TACInstr]:
+    seq: list[TACInstr] = [Mark(func.entry)]
+    for bb in blocks:
+        if bb.label is not None:
+            seq.append(Mark(bb.label))
+        seq.extend(loc.instr for loc in bb.locs)
+    return seq
+
+
+def insertOnEdges(func: TACFunc, cfg: CFG, edges: dict[tuple[int, int], list[Loc]]) -> None:
+    """
+    Put code on edges of the CFG: `edges` maps (pred, succ) to the locs that must run when
+    control goes from pred to succ, and only then. Then write the blocks back into `func`.
+
+    The code goes at the end of pred when succ is its only successor, at the start of succ
+    when pred is its only predecessor, and otherwise in a new block on the edge: after pred
+    for the fall through edge, or for the jump, at the end of the function, with the jump
+    retargeted to it and a jump to succ after the code.
+    """
+    split: list[BasicBlock] = []
+    for (p, s), locs in edges.items():
+        if not locs:
+            continue
+        pred, succ = cfg.getBlock(p), cfg.getBlock(s)
+        last = pred.locs[-1].instr if pred.locs else None
+        if cfg.getOutDegree(p) == 1:
+            if isinstance(last, (Branch, CondBranch, Return)):
+                # a conditional jump with both ways to the same block is a plain fall through
+                pred.locs[-1:] = locs if isinstance(last, CondBranch) else locs + pred.locs[-1:]
+            else:
+                pred.locs.extend(locs)
+        elif cfg.getInDegree(s) == 1:
+            succ.locs[0:0] = locs
+        elif isinstance(last, CondBranch) and last.target is succ.label:
+            label = func.freshLabel()
+            pred.locs[-1] = Loc(CondBranch(last.op, last.cond, label))
+            split.append(BasicBlock(None, -1, label, locs + [Loc(Branch(succ.label))]))
+        else:
+            split.append(BasicBlock(None, p, None, locs))
+
+    # the new blocks are told apart by their id: the block they follow, or -1 for the end
+    blocks = []
+    after = {bb.id: bb for bb in split if bb.id >= 0}
+    for bb in cfg.nodes:
+        blocks.append(bb)
+        if bb.id in after:
+            blocks.append(after[bb.id])
+    blocks.extend(bb for bb in split if bb.id < 0)
+    func.instrSeq = linearize(func, blocks)
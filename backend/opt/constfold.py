@@ -0,0 +1,126 @@
+from typing import Optional
+
+from backend.dataflow.cfg import CFG
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+from .analysis import CFGAnalysis, writeBack
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import inSSA
+
+"""
+ConstFold: local constant propagation and folding
+
+Within a basic block, operations whose operands are all known constants are replaced by
+a LoadImm4 of the result, and conditional branches on known constants become plain jumps
+(or disappear) -- except in SSA form, where that would leave phis with stale predecessors.
+Folding follows what the RISC-V code would compute at run time, including
+32-bit wrap-around and the results of division by zero.
+"""
+
+INT_MIN = -0x8000_0000
+
+
+def wrap(value: int) -> int:
+    value &= 0xFFFF_FFFF
+    return value - 0x1_0000_0000 if value & 0x8000_0000 else value
+
+
+def foldUnary(op: TacUnaryOp, value: int) -> int:
+    if op == TacUnaryOp.NEG:
+        return wrap(-value)
+    if op == TacUnaryOp.NOT:
+        return wrap(~value)
+    if op == TacUnaryOp.SEQZ:
+        return int(value == 0)
+    return int(value != 0)
+
+
+def foldBinary(op: TacBinaryOp, lhs: int, rhs: int) -> int:
+    if op == TacBinaryOp.ADD:
+        return wrap(lhs + rhs)
+    if op == TacBinaryOp.SUB:
+        return wrap(lhs - rhs)
+    if op == TacBinaryOp.MUL:
+        return wrap(lhs * rhs)
+    if op == TacBinaryOp.DIV:
+        if rhs == 0:
+            return -1
+        if lhs == INT_MIN and rhs == -1:
+            return INT_MIN
+        quotient = abs(lhs) // abs(rhs)
+        return quotient if (lhs < 0) == (rhs < 0) else -quotient
+    if op == TacBinaryOp.REM:
+        if rhs == 0:
+            return lhs
+        if lhs == INT_MIN and rhs == -1:
+            return 0
+        remainder = abs(lhs) % abs(rhs)
+        return remainder if lhs >= 0 else -remainder
+    if op in (TacBinaryOp.DIVU, TacBinaryOp.REMU):
+        lhs, rhs = lhs & 0xFFFF_FFFF, rhs & 0xFFFF_FFFF
+        if rhs == 0:
+            return -1 if op == TacBinaryOp.DIVU else wrap(lhs)
+        return wrap(lhs // rhs if op == TacBinaryOp.DIVU else lhs % rhs)
+    return int(
+        {
+            TacBinaryOp.EQU: lambda: lhs == rhs,
+            TacBinaryOp.NEQ: lambda: lhs != rhs,
+            TacBinaryOp.SLT: lambda: lhs < rhs,
+            TacBinaryOp.LEQ: lambda: lhs <= rhs,
+            TacBinaryOp.SGT: lambda: lhs > rhs,
+            TacBinaryOp.GEQ: lambda: lhs >= rhs,
+            TacBinaryOp.AND: lambda: lhs != 0 and rhs != 0,
+            TacBinaryOp.OR: lambda: lhs != 0 or rhs != 0,
+        }[op]()
+    )
+
+
+# Whether a conditional branch is taken, given the value of its condition.
+def branchTaken(op: CondBranchOp, value: int) -> bool:
+    return (value == 0) if op == CondBranchOp.BEQ else (value != 0)
+
+
+class ConstFold(FunctionPass):
+    name = "constfold"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        cfg: CFG = am.get(CFGAnalysis, func)
+        self.foldBranches = not inSSA(func)
+        changed = False
+        for bb in cfg.nodes:
+            # temp index -> constant value, valid from here to the end of the block
+            known: dict[int, int] = {}
+            locs = []
+            for loc in bb.locs:
+                instr = self.fold(loc.instr, known)
+                if instr is not loc.instr:
+                    changed = True
+                    if instr is None:
+                        continue
+                    loc.instr = instr
+                locs.append(loc)
+                if isinstance(instr, LoadImm4):
+                    known[instr.dst.index] = instr.value
+                else:
+                    for index in instr.getWritten():
+                        known.pop(index, None)
+            bb.locs = locs
+        if changed:
+            writeBack(func, cfg)
+        return changed
+
+    # the folded form of `instr` (itself if nothing can be done, None to drop it)
+    def fold(self, instr: TACInstr, known: dict[int, int]) -> Optional[TACInstr]:
+        if isinstance(instr, Assign) and instr.src.index in known:
+            return LoadImm4(instr.dst, known[instr.src.index])
+        if isinstance(instr, Unary) and instr.operand.index in known:
+            return LoadImm4(instr.dst, foldUnary(instr.op, known[instr.operand.index]))
+        if isinstance(instr, Binary) and instr.lhs.index in known and instr.rhs.index in known:
+            value = foldBinary(instr.op, known[instr.lhs.index], known[instr.rhs.index])
+            return LoadImm4(instr.dst, value)
+        if isinstance(instr, CondBranch) and self.foldBranches and instr.cond.index in known:
+            if branchTaken(instr.op, known[instr.cond.index]):
+                return Branch(instr.target)
+            return None
+        return instr
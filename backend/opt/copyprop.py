@@ -0,0 +1,127 @@
+from typing import Optional
+
+from backend.dataflow.cfg import CFG
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.temp import Temp
+
+from .analysis import CFGAnalysis, writeBack
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import isPhi
+
+"""
+CopyProp: copy coalescing and global copy propagation
+
+TACGen copies a lot: `x = a + b` is `t = a + b; x = t`, a declaration copies its initial
+value into the temp of the variable, and `c ? a : b` copies either arm into its result.
+
+1. Coalescing: `t = a + b; ...; x = t` becomes `x = a + b` when that copy is all that
+   reads t, t is written nowhere else, and x is neither read nor written in between.
+2. Propagation: after `t = s`, the reads of t are replaced by reads of s wherever the copy
+   is available -- it's on every path there, and neither t nor s was written since
+   (a forward data flow over the CFG). The copies are then often dead, and left to
+   DeadCodeElim.
+Phis are left alone: what they read comes from the end of the predecessors.
+"""
+
+# the copies available at some point, as dst index -> src
+Copies = dict[int, Temp]
+
+
+class CopyProp(FunctionPass):
+    name = "copyprop"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        cfg: CFG = am.get(CFGAnalysis, func)
+        changed = self.coalesce(cfg)
+        changed = self.propagate(cfg) or changed
+        if changed:
+            writeBack(func, cfg)
+        return changed
+
+    def coalesce(self, cfg: CFG) -> bool:
+        reads: dict[int, int] = {}
+        writes: dict[int, int] = {}
+        for bb in cfg.nodes:
+            for loc in bb.locs:
+                for index in loc.instr.getRead():
+                    reads[index] = reads.get(index, 0) + 1
+                for index in loc.instr.getWritten():
+                    writes[index] = writes.get(index, 0) + 1
+
+        changed = False
+        for bb in cfg.nodes:
+            j = 0
+            while j < len(bb.locs):
+                copy = bb.locs[j].instr
+                j += 1
+                if not isinstance(copy, Assign):
+                    continue
+                t, x = copy.src.index, copy.dst.index
+                if t == x or reads.get(t) != 1 or writes.get(t) != 1:
+                    continue
+                i = j - 2
+                while i >= 0 and t not in bb.locs[i].instr.getWritten():
+                    i -= 1
+                if i < 0 or isPhi(bb.locs[i].instr):
+                    continue
+                between = bb.locs[i + 1 : j - 1]
+                if any(x in loc.instr.getRead() or x in loc.instr.getWritten() for loc in between):
+                    continue
+                definition = bb.locs[i].instr
+                definition.dsts = [copy.dst if dst.index == t else dst for dst in definition.dsts]
+                del bb.locs[j - 1]
+                j -= 1
+                changed = True
+        return changed
+
+    def propagate(self, cfg: CFG) -> bool:
+        order = cfg.getReversePostorder()
+        # block -> the copies available at its end; None until it's been reached
+        out: dict[int, Optional[Copies]] = {}
+        changed = True
+        while changed:
+            changed = False
+            for b in order:
+                available = self.transfer(cfg, b, self.availableAtStart(cfg, b, out))
+                if out.get(b) != available:
+                    out[b] = available
+                    changed = True
+
+        changed = False
+        for b in order:
+            available = self.availableAtStart(cfg, b, out)
+            for loc in cfg.getBlock(b).locs:
+                instr = loc.instr
+                if not isPhi(instr) and any(src.index in available for src in instr.srcs):
+                    instr.srcs = [available.get(src.index, src) for src in instr.srcs]
+                    changed = True
+                self.step(instr, available)
+        return changed
+
+    # the copies available on every path into b that has been looked at yet
+    def availableAtStart(self, cfg: CFG, b: int, out: dict[int, Optional[Copies]]) -> Copies:
+        if b == 0:
+            return {}
+        available: Optional[Copies] = None
+        for p in cfg.getPrev(b):
+            if out.get(p) is None:
+                continue
+            if available is None:
+                available = dict(out[p])
+            else:
+                available = {dst: src for dst, src in available.items() if out[p].get(dst) is src}
+        return available or {}
+
+    def transfer(self, cfg: CFG, b: int, available: Copies) -> Copies:
+        for loc in cfg.getBlock(b).locs:
+            self.step(loc.instr, available)
+        return available
+
+    def step(self, instr: TACInstr, available: Copies) -> None:
+        for index in instr.getWritten():
+            available.pop(index, None)
+            for dst in [dst for dst, src in available.items() if src.index == index]:
+                del available[dst]
+        if isinstance(instr, Assign) and instr.dst.index != instr.src.index:
+            available[instr.dst.index] = instr.src
@@ -0,0 +1,56 @@
+from backend.dataflow.cfg import CFG
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+from .analysis import LivenessAnalysis, writeBack
+from .passmanager import AnalysisManager, FunctionPass
+
+"""
+DeadCodeElim: remove computations whose result is never used
+
+An instruction is removable when it has no side effect and none of the temps it writes
+is live after it. Division and remainder are included: they don't trap on RISC-V.
+"""
+
+PURE_INSTRS = (Assign, LoadImm4, Unary, Binary)
+
+
+def isPure(instr: TACInstr) -> bool:
+    return isinstance(instr, PURE_INSTRS)
+
+
+class DeadCodeElim(FunctionPass):
+    name = "dce"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        changed = False
+        # removing an instruction may make the ones feeding it dead in other blocks,
+        # so repeat with fresh liveness until nothing changes
+        while self.sweep(func, am):
+            changed = True
+            am.invalidate(func)
+        return changed
+
+    def sweep(self, func: TACFunc, am: AnalysisManager) -> bool:
+        cfg: CFG = am.get(LivenessAnalysis, func)
+        changed = False
+        for bb in cfg.nodes:
+            live = set(bb.liveOut)
+            kept = []
+            for loc in reversed(bb.locs):
+                instr = loc.instr
+                written = instr.getWritten()
+                if isPure(instr) and (
+                    not any(index in live for index in written)
+                    or (isinstance(instr, Assign) and instr.dst.index == instr.src.index)
+                ):
+                    changed = True
+                    continue
+                live.difference_update(written)
+                live.update(instr.getRead())
+                kept.append(loc)
+            kept.reverse()
+            bb.locs = kept
+        if changed:
+            writeBack(func, cfg)
+        return changed
@@ -0,0 +1,488 @@
+import time
+from typing import Iterator, Optional, Union
+
+from backend.dataflow.basicblock import BasicBlock
+from backend.dataflow.cfg import CFG
+from backend.dataflow.loc import Loc
+from backend.riscv.byconstant import log2, mulTerms
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.temp import Temp
+
+from .algebra import (
+    ADD,
+    AND,
+    DIV,
+    DIVU,
+    EQU,
+    GEQ,
+    LEQ,
+    MUL,
+    NEG,
+    NEQ,
+    NOT,
+    OR,
+    REM,
+    REMU,
+    SEQZ,
+    SGT,
+    SLT,
+    SNEZ,
+    SUB,
+    Pattern,
+    isConstantName,
+)
+from .analysis import LivenessAnalysis, writeBack
+from .constfold import foldBinary, foldUnary
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import inSSA
+
+"""
+EqualitySaturation: the expressions of each block, rebuilt at their cheapest from an e-graph
+
+Rewriting in place, as AlgebraicSimplify does, commits to every rewrite it makes, and may
+miss a cheaper form that only a rewrite making things worse first would lead to. An
+e-graph (Willsey et al., "egg") holds many equivalent forms at once: its nodes are
+operations on e-classes, an e-class being a set of nodes known to compute the same value.
+Rewrites only ever add nodes and merge classes (a + b is put in the class of b + a), so
+nothing is lost, and once no rewrite adds anything new (saturation), or the limits below
+are hit, the cheapest node of every class is picked, bottom up.
+
+A block is cut at its instructions other than computations (calls, branches...) into
+segments of straight computations. The e-graph of a segment starts from what the temps
+hold at its start (leaves), and its roots are the values of the temps it writes that are
+still read after it. The cheapest forms of the roots are computed into new temps, each
+class once, and copied into the temps at the end (left to CopyProp), in place of the
+segment, when that costs less than the segment did.
+
+Costs are those of the RISC-V code the back end emits, counting the latency of mul (3)
+and div / rem (20), and the cheaper sequences for a constant operand (a shift for
+x * 8, a multiplication by a magic number for x / 7...). Constants are folded as classes
+get known values. The rewrites are the usual arithmetic ones (commutativity,
+associativity, distributivity, -, ~ and the comparisons in terms of each other); TAC has
+no shifts nor bitwise and / or.
+
+Functions in SSA form are left alone. summary() gives, for every block that got cheaper,
+its size and cost before and after.
+"""
+
+# the limits on the e-graph of a segment: nodes, rounds of rewriting and seconds
+MAX_NODES = 1000
+MAX_ROUNDS = 8
+MAX_SECONDS = 1.0
+
+# the latencies of mul and of div / rem, the other instructions taking one cycle
+MUL_COST = 3
+DIV_COST = 20
+
+# a node: (op, class ids of the operands...), or ("temp", index) / ("const", value)
+Node = tuple
+TEMP, CONST = "temp", "const"
+
+
+class EGraph:
+    def __init__(self) -> None:
+        self.parent: list[int] = []
+        # class id (the representative of its union-find set) -> its nodes (a dict rather
+        # than a set, so that they are visited in the same order from run to run)
+        self.classes: dict[int, dict[Node, None]] = {}
+        # node (with its operands' representatives) -> its class
+        self.memo: dict[Node, int] = {}
+        # class id -> the constant it holds, if known
+        self.constant: dict[int, int] = {}
+
+    def find(self, cid: int) -> int:
+        while self.parent[cid] != cid:
+            self.parent[cid] = self.parent[self.parent[cid]]
+            cid = self.parent[cid]
+        return cid
+
+    def canonical(self, node: Node) -> Node:
+        if isinstance(node[0], str):
+            return node
+        return (node[0],) + tuple(self.find(child) for child in node[1:])
+
+    # the number of nodes (some equal ones counted twice until the next rebuild)
+    def size(self) -> int:
+        return len(self.memo)
+
+    def add(self, node: Node) -> int:
+        node = self.canonical(node)
+        cid = self.memo.get(node)
+        if cid is not None:
+            return self.find(cid)
+        cid = len(self.parent)
+        self.parent.append(cid)
+        self.classes[cid] = {node: None}
+        self.memo[node] = cid
+        value = self.fold(node)
+        if value is not None:
+            self.constant[cid] = value
+            if node[0] != CONST:
+                return self.union(cid, self.add((CONST, value)))
+        return cid
+
+    # the value of node, if it's a constant or an operation on constants
+    def fold(self, node: Node) -> Optional[int]:
+        if node[0] == CONST:
+            return node[1]
+        if node[0] == TEMP:
+            return None
+        values = [self.constant.get(self.find(child)) for child in node[1:]]
+        if None in values:
+            return None
+        if isinstance(node[0], TacUnaryOp):
+            return foldUnary(node[0], values[0])
+        return foldBinary(node[0], values[0], values[1])
+
+    def union(self, a: int, b: int) -> int:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if len(self.classes[a]) < len(self.classes[b]):
+            a, b = b, a
+        self.parent[b] = a
+        self.classes[a] |= self.classes.pop(b)
+        if b in self.constant:
+            self.constant[a] = self.constant.pop(b)
+        return a
+
+    # restore the invariants after unions: nodes made equal by them (congruence) merge,
+    # and the nodes on constants that became known fold
+    def rebuild(self) -> None:
+        while True:
+            merges: list[tuple[int, int]] = []
+            self.memo = {}
+            for cid in list(self.classes):
+                nodes = dict.fromkeys(self.canonical(node) for node in self.classes[cid])
+                self.classes[cid] = nodes
+                for node in nodes:
+                    other = self.memo.setdefault(node, cid)
+                    if other != cid:
+                        merges.append((other, cid))
+                    if cid not in self.constant:
+                        value = self.fold(node)
+                        if value is not None:
+                            self.constant[cid] = value
+                            merges.append((cid, self.add((CONST, value))))
+            if not merges:
+                return
+            for a, b in merges:
+                self.union(a, b)
+
+    # the ways pattern matches class cid, extending subst (name -> class)
+    def ematch(self, pattern: Pattern, cid: int, subst: dict[str, int]) -> Iterator[dict[str, int]]:
+        if isinstance(pattern, int):
+            if self.constant.get(cid) == pattern:
+                yield subst
+        elif isinstance(pattern, str):
+            if isConstantName(pattern) and cid not in self.constant:
+                return
+            bound = subst.get(pattern)
+            if bound is None:
+                yield {**subst, pattern: cid}
+            elif bound == cid:
+                yield subst
+        else:
+            for node in list(self.classes[cid]):
+                if node[0] == pattern[0] and len(node) == len(pattern):
+                    yield from self.ematchAll(pattern[1:], node[1:], subst)
+
+    def ematchAll(self, patterns: tuple, cids: tuple, subst: dict[str, int]) -> Iterator[dict[str, int]]:
+        if not patterns:
+            yield subst
+            return
+        for partial in self.ematch(patterns[0], self.find(cids[0]), subst):
+            yield from self.ematchAll(patterns[1:], cids[1:], partial)
+
+    def instantiate(self, pattern: Pattern, subst: dict[str, int]) -> int:
+        if isinstance(pattern, int):
+            return self.add((CONST, pattern))
+        if isinstance(pattern, str):
+            return self.find(subst[pattern])
+        return self.add((pattern[0],) + tuple(self.instantiate(operand, subst) for operand in pattern[1:]))
+
+    # rewrite until nothing changes or a limit is hit
+    def saturate(self, rewrites: list[tuple[Pattern, Pattern]]) -> None:
+        deadline = time.perf_counter() + MAX_SECONDS
+        for _ in range(MAX_ROUNDS):
+            # op -> the classes with a node of it, where the rewrites of that op can match
+            byOp: dict[Union[TacUnaryOp, TacBinaryOp], list[int]] = {}
+            for cid, nodes in self.classes.items():
+                for op in dict.fromkeys(node[0] for node in nodes if not isinstance(node[0], str)):
+                    byOp.setdefault(op, []).append(cid)
+            matches = [
+                (cid, rhs, subst)
+                for lhs, rhs in rewrites
+                for cid in byOp.get(lhs[0], [])
+                for subst in self.ematch(lhs, cid, {})
+            ]
+            before = (self.size(), len(self.classes))
+            for cid, rhs, subst in matches:
+                self.union(cid, self.instantiate(rhs, subst))
+                if self.size() > MAX_NODES or time.perf_counter() > deadline:
+                    self.rebuild()
+                    return
+            self.rebuild()
+            if (self.size(), len(self.classes)) == before:
+                return
+
+    # class -> (cost, cheapest node)
+    def extract(self) -> dict[int, tuple[int, Node]]:
+        # a constant is best loaded: an operation giving it would be computed from itself
+        best: dict[int, tuple[int, Node]] = {cid: (1, (CONST, value)) for cid, value in self.constant.items()}
+        changed = True
+        while changed:
+            changed = False
+            for cid, nodes in self.classes.items():
+                if cid in self.constant:
+                    continue
+                for node in nodes:
+                    cost = self.treeCost(node, best)
+                    if cost is not None and (cid not in best or cost < best[cid][0]):
+                        best[cid] = (cost, node)
+                        changed = True
+        return best
+
+    def treeCost(self, node: Node, best: dict[int, tuple[int, Node]]) -> Optional[int]:
+        if node[0] == TEMP:
+            return 0
+        if node[0] == CONST:
+            return 1
+        children = [self.find(child) for child in node[1:]]
+        if any(child not in best for child in children):
+            return None
+        constants = [self.constant.get(child) for child in children]
+        inline = inlined(node[0], constants)
+        return opCost(node[0], constants) + sum(best[child][0] for i, child in enumerate(children) if i != inline)
+
+
+# the position of the constant operand of op that the back end uses as it is, without
+# loading it, if there's one
+def inlined(op: Union[TacUnaryOp, TacBinaryOp], constants: list[Optional[int]]) -> Optional[int]:
+    if op == MUL:
+        # the back end tries the right operand first
+        for i in (1, 0):
+            if constants[i] is not None and (constants[i] == 0 or mulTerms(constants[i]) is not None):
+                return i
+    elif op in (DIV, REM) and constants[1] is not None and constants[1] != 0:
+        return 1
+    elif op in (DIVU, REMU) and constants[1] is not None and constants[1] > 0:
+        return 1
+    return None
+
+
+# the cost of op, given which operands hold known constants (None for the others)
+def opCost(op: Union[TacUnaryOp, TacBinaryOp], constants: list[Optional[int]]) -> int:
+    if isinstance(op, TacUnaryOp):
+        return 1
+    i = inlined(op, constants)
+    if op == MUL:
+        if i is None:
+            return MUL_COST
+        return 1 if constants[i] == 0 else max(mulTerms(constants[i])[1], 1)
+    if op in (DIV, REM, DIVU, REMU):
+        if i is None:
+            return DIV_COST
+        c = constants[1]
+        if c in (1, -1):
+            return 1
+        if log2(c) is not None:
+            # a shift, after a bias towards zero when signed; then a mask and a sub for rem
+            return {DIVU: 1, REMU: 1, DIV: 4, REM: 6}[op]
+        # li and mulh of the magic number, a shift and the rounding when signed; rem then
+        # multiplies the quotient back and subtracts
+        quotient = MUL_COST + 2 if op in (DIVU, REMU) else MUL_COST + 4
+        return quotient + (MUL_COST + 2 if op in (REM, REMU) else 0)
+    if op == AND:
+        return 4
+    if op in (LEQ, GEQ, EQU, NEQ, OR):
+        return 2
+    return 1
+
+
+# the cost of the code of a straight sequence of computations: its operations, and the
+# loads of constants that the back end can't do without (those read other than as the
+# constant operand of an operation, and those still held at the end of it)
+def segmentCost(instrs: list[TACInstr], liveAfter: set[int]) -> int:
+    cost = 0
+    # temp index -> the constant it holds, and where it's loaded
+    loads: dict[int, tuple[int, int]] = {}
+    needed: set[int] = set()
+    for i, instr in enumerate(instrs):
+        if isinstance(instr, (Unary, Binary)):
+            constants = [loads[src.index][0] if src.index in loads else None for src in instr.srcs]
+            cost += opCost(instr.op, constants)
+            inline = inlined(instr.op, constants)
+            for i, src in enumerate(instr.srcs):
+                if constants[i] is not None and i != inline:
+                    needed.add(loads[src.index][1])
+        elif isinstance(instr, Assign) and instr.src.index in loads:
+            needed.add(loads[instr.src.index][1])
+        loads.pop(instr.dst.index, None)
+        if isinstance(instr, LoadImm4):
+            loads[instr.dst.index] = (instr.value, i)
+    needed |= {i for index, (_, i) in loads.items() if index in liveAfter}
+    return cost + len(needed)
+
+
+def both(lhs: Pattern, rhs: Pattern) -> list[tuple[Pattern, Pattern]]:
+    return [(lhs, rhs), (rhs, lhs)]
+
+
+REWRITES: list[tuple[Pattern, Pattern]] = [
+    *[((op, "x", "y"), (op, "y", "x")) for op in (ADD, MUL, EQU, NEQ, AND, OR)],
+    *both((ADD, (ADD, "x", "y"), "z"), (ADD, "x", (ADD, "y", "z"))),
+    *both((MUL, (MUL, "x", "y"), "z"), (MUL, "x", (MUL, "y", "z"))),
+    *both((SUB, "x", "y"), (ADD, "x", (NEG, "y"))),
+    ((ADD, (MUL, "x", "y"), (MUL, "x", "z")), (MUL, "x", (ADD, "y", "z"))),
+    ((MUL, (ADD, "x", "y"), "c"), (ADD, (MUL, "x", "c"), (MUL, "y", "c"))),
+    ((ADD, "x", "x"), (MUL, "x", 2)),
+    ((ADD, (MUL, "x", "y"), "x"), (MUL, "x", (ADD, "y", 1))),
+    ((NEG, (NEG, "x")), "x"),
+    ((NEG, (SUB, "x", "y")), (SUB, "y", "x")),
+    *both((MUL, "x", -1), (NEG, "x")),
+    ((ADD, "x", 0), "x"),
+    ((MUL, "x", 1), "x"),
+    ((MUL, "x", 0), 0),
+    ((SUB, "x", "x"), 0),
+    *both((NOT, "x"), (SUB, -1, "x")),
+    ((NOT, (NOT, "x")), "x"),
+    *both((SGT, "x", "y"), (SLT, "y", "x")),
+    *both((GEQ, "x", "y"), (LEQ, "y", "x")),
+    *both((SEQZ, (SLT, "x", "y")), (GEQ, "x", "y")),
+    *both((SEQZ, (SGT, "x", "y")), (LEQ, "x", "y")),
+    *both((EQU, "x", "y"), (SEQZ, (SUB, "x", "y"))),
+    *both((NEQ, "x", "y"), (SNEZ, (SUB, "x", "y"))),
+    ((SEQZ, (SEQZ, "x")), (SNEZ, "x")),
+    ((SNEZ, (SNEZ, "x")), (SNEZ, "x")),
+    ((SEQZ, (SNEZ, "x")), (SEQZ, "x")),
+    ((SNEZ, (SEQZ, "x")), (SEQZ, "x")),
+]
+
+
+class EqualitySaturation(FunctionPass):
+    name = "egraph"
+
+    def __init__(self) -> None:
+        # (block, size before, size after, cost before, cost after) of the blocks made cheaper
+        self.improved: list[tuple[str, int, int, int, int]] = []
+
+    def summary(self) -> str:
+        return "; ".join("%s: %d -> %d instrs, cost %d -> %d" % entry for entry in self.improved)
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        self.improved = []
+        if inSSA(func):
+            return False
+        cfg: CFG = am.get(LivenessAnalysis, func)
+        self.func = func
+        changed = False
+        for bb in cfg.nodes:
+            changed = self.optimizeBlock(bb) or changed
+        if changed:
+            writeBack(func, cfg)
+        return changed
+
+    def optimizeBlock(self, bb: BasicBlock) -> bool:
+        locs: list[Loc] = []
+        segment: list[Loc] = []
+        sizes, costs = [0, 0], [0, 0]
+        for loc in bb.locs + [None]:
+            if loc is not None and isinstance(loc.instr, (Assign, LoadImm4, Unary, Binary)):
+                segment.append(loc)
+                continue
+            if segment:
+                cost, newLocs, newCost = self.optimizeSegment(segment)
+                sizes[0] += len(segment)
+                sizes[1] += len(newLocs)
+                costs[0] += cost
+                costs[1] += newCost
+                locs.extend(newLocs)
+                segment = []
+            if loc is not None:
+                locs.append(loc)
+        if costs[1] >= costs[0]:
+            return False
+        name = str(bb.label) if bb.label is not None else "block %d" % bb.id
+        self.improved.append((name, sizes[0], sizes[1], costs[0], costs[1]))
+        bb.locs = locs
+        return True
+
+    # (its cost, what replaces it, and the cost of that)
+    def optimizeSegment(self, segment: list[Loc]) -> tuple[int, list[Loc], int]:
+        liveAfter = segment[-1].liveOut
+        cost = segmentCost([loc.instr for loc in segment], liveAfter)
+        if sum(isinstance(loc.instr, (Unary, Binary)) for loc in segment) < 2:
+            return cost, segment, cost
+
+        graph = EGraph()
+        temps: dict[int, Temp] = {}
+        # temp index -> the class of what it holds
+        current: dict[int, int] = {}
+
+        def classOf(temp: Temp) -> int:
+            if temp.index not in current:
+                temps[temp.index] = temp
+                current[temp.index] = graph.add((TEMP, temp.index))
+            return current[temp.index]
+
+        written: dict[int, Temp] = {}
+        for loc in segment:
+            instr = loc.instr
+            if isinstance(instr, LoadImm4):
+                cid = graph.add((CONST, instr.value))
+            elif isinstance(instr, Assign):
+                cid = classOf(instr.src)
+            else:
+                cid = graph.add((instr.op,) + tuple(classOf(src) for src in instr.srcs))
+            current[instr.dst.index] = cid
+            written[instr.dst.index] = instr.dst
+        roots = [(temp, current[index]) for index, temp in written.items() if index in liveAfter]
+        graph.saturate(REWRITES)
+        best = graph.extract()
+
+        instrs: list[TACInstr] = []
+        # class -> the temp it's computed into
+        computed: dict[int, Temp] = {}
+
+        def emit(cid: int) -> Temp:
+            cid = graph.find(cid)
+            node = best[cid][1]
+            if node[0] == TEMP:
+                return temps[node[1]]
+            if cid not in computed:
+                dst = self.func.freshTemp()
+                if node[0] == CONST:
+                    instrs.append(LoadImm4(dst, node[1]))
+                elif isinstance(node[0], TacUnaryOp):
+                    instrs.append(Unary(node[0], dst, emit(node[1])))
+                else:
+                    instrs.append(Binary(node[0], dst, emit(node[1]), emit(node[2])))
+                computed[cid] = dst
+            return computed[cid]
+
+        finals: list[TACInstr] = []
+        sources = []
+        for temp, cid in roots:
+            node = best[graph.find(cid)][1]
+            if node[0] == CONST:
+                finals.append(LoadImm4(temp, node[1]))
+            else:
+                sources.append((temp, emit(cid)))
+        # the copies happen at once: a temp read by one and written by another is saved first
+        dsts = {temp.index for temp, _ in roots}
+        for temp, src in sources:
+            if src.index == temp.index:
+                continue
+            if src.index in dsts:
+                saved = self.func.freshTemp()
+                instrs.append(Assign(saved, src))
+                src = saved
+            finals.append(Assign(temp, src))
+        instrs += finals
+
+        newCost = segmentCost(instrs, liveAfter)
+        if newCost >= cost:
+            return cost, segment, cost
+        return cost, [Loc(instr) for instr in instrs], newCost
@@ -0,0 +1,176 @@
+import itertools
+from typing import Any, Hashable, Optional
+
+from backend.dataflow.cfg import CFG
+from backend.dataflow.dominance import DominatorTree
+from backend.dataflow.loc import Loc
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.temp import Temp
+
+from .analysis import CFGAnalysis, DominatorAnalysis, writeBack
+from .lvn import expressionKey
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import isPhi
+
+"""
+GlobalValueNumbering: remove the computations that some block dominating them already made
+
+LocalValueNumbering, stretched over the dominator tree: the blocks are numbered in
+preorder of the tree, and each one starts from the value numbers and the computations
+known at the end of its immediate dominator, which run before it on every path. The
+tables are scoped like the renaming stacks of SSA construction: what a block adds is
+undone once its subtree is done, so its siblings never see it.
+
+Temps are not in SSA form, so a temp may be written again on the way from the immediate
+dominator d of a block b to b (in a branch in between, or in a loop around b). Those
+temps are the ones written in the blocks reaching b without going through d again, and
+they get fresh numbers when b is entered, which makes what was known of them unreachable.
+A computation whose key is known and whose result some temp still holds becomes a copy of
+that temp (left to CopyProp and DeadCodeElim). Literals are kept, as in
+LocalValueNumbering, but numbered, so that `a + 1` matches whichever temp the 1 was
+loaded into. Reads are not renamed: reading a temp of another block costs a load from
+the stack in the back end, which a copy of it pays only once.
+"""
+
+MISSING = object()
+
+
+class ScopedTable:
+    """
+    A dict whose changes can be undone back to a mark, for the walk down the dominator tree.
+    """
+
+    def __init__(self) -> None:
+        self.entries: dict[Hashable, Any] = {}
+        # (key, value before the change), latest last
+        self.log: list[tuple[Hashable, Any]] = []
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self.entries.get(key, default)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.log.append((key, self.entries.get(key, MISSING)))
+        self.entries[key] = value
+
+    def mark(self) -> int:
+        return len(self.log)
+
+    def undo(self, mark: int) -> None:
+        while len(self.log) > mark:
+            key, old = self.log.pop()
+            if old is MISSING:
+                del self.entries[key]
+            else:
+                self.entries[key] = old
+
+
+class GlobalValueNumbering(FunctionPass):
+    name = "gvn"
+
+    def __init__(self) -> None:
+        self.eliminated = 0
+
+    def summary(self) -> str:
+        return "%d redundant" % self.eliminated
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        cfg: CFG = am.get(CFGAnalysis, func)
+        dom: DominatorTree = am.get(DominatorAnalysis, func)
+        self.eliminated = 0
+
+        fresh = itertools.count()
+        # temp index -> the number of the value it holds
+        numbers = ScopedTable()
+        # number -> the temps that held it at some point, latest last (check `numbers` before using one)
+        holders = ScopedTable()
+        # key of a computation -> the number of its result
+        table = ScopedTable()
+
+        def define(temp: Temp, number: int) -> None:
+            numbers[temp.index] = number
+            holders[number] = holders.get(number, ()) + (temp,)
+
+        def numberOf(temp: Temp) -> int:
+            # a value from before the block, and before every block dominating it
+            if temp.index not in numbers:
+                define(temp, next(fresh))
+            return numbers.get(temp.index)
+
+        def holderOf(number: int) -> Optional[Temp]:
+            return next((t for t in reversed(holders.get(number, ())) if numbers.get(t.index) == number), None)
+
+        written = [{index for loc in bb.locs for index in loc.instr.getWritten()} for bb in cfg.nodes]
+
+        # (block, whether its subtree is done, the marks to go back to)
+        stack: list[tuple[int, bool, tuple[int, int, int]]] = [(0, False, (0, 0, 0))] if dom.rpo else []
+        while stack:
+            b, done, marks = stack.pop()
+            if done:
+                numbers.undo(marks[0])
+                holders.undo(marks[1])
+                table.undo(marks[2])
+                continue
+            stack.append((b, True, (numbers.mark(), holders.mark(), table.mark())))
+            stack.extend((child, False, ()) for child in reversed(dom.children[b]))
+
+            if b != 0:
+                for index in self.rewritten(cfg, dom, b, written):
+                    if index in numbers:
+                        numbers[index] = next(fresh)
+
+            bb = cfg.getBlock(b)
+            locs: list[Loc] = []
+            for loc in bb.locs:
+                instr = loc.instr
+                if isinstance(instr, Assign):
+                    define(instr.dst, numberOf(instr.src))
+                    locs.append(loc)
+                    continue
+                key = None if isPhi(instr) else expressionKey(instr, numberOf)
+                if key is None:
+                    for temp in instr.dsts:
+                        define(temp, next(fresh))
+                    locs.append(loc)
+                    continue
+                number = table.get(key)
+                holder = holderOf(number) if number is not None else None
+                if holder is None:
+                    number = next(fresh)
+                    table[key] = number
+                    define(instr.dst, number)
+                    locs.append(loc)
+                    continue
+                if isinstance(instr, LoadImm4):
+                    define(instr.dst, number)
+                    locs.append(loc)
+                    continue
+                self.eliminated += 1
+                if numbers.get(instr.dst.index) == number:
+                    continue
+                define(instr.dst, number)
+                locs.append(Loc(Assign(instr.dst, holder)))
+            bb.locs = locs
+
+        if self.eliminated:
+            writeBack(func, cfg)
+        return self.eliminated > 0
+
+    # the temps that may be written between the end of the immediate dominator d of b and
+    # the start of b: the ones written in the blocks that reach b without going through d
+    def rewritten(self, cfg: CFG, dom: DominatorTree, b: int, written: list[set[int]]) -> set[int]:
+        d = dom.idom[b]
+        result: set[int] = set()
+        seen = {d}
+        work = [p for p in cfg.getPrev(b) if dom.isReachable(p)]
+        while work:
+            x = work.pop()
+            if x in seen:
+                continue
+            seen.add(x)
+            result |= written[x]
+            work.extend(p for p in cfg.getPrev(x) if dom.isReachable(p))
+        return result
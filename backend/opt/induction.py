@@ -0,0 +1,341 @@
+from typing import Optional, Union
+
+from backend.dataflow.cfg import CFG
+from backend.dataflow.dominance import DominatorTree
+from backend.dataflow.loc import Loc
+from backend.dataflow.loop import Loop, LoopForest
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.temp import Temp
+
+from .constfold import INT_MIN, wrap
+from .loopsimplify import insertPoint
+from .looppass import LoopPass
+from .passmanager import AnalysisManager
+from .ssa import inSSA
+
+"""
+Induction variables of TAC loops, and the optimizations built on them
+
+LoopFacts: what the instructions of a loop write and read, and which operands are invariant
+InductionVar: a basic induction variable -- a temp whose only change in the loop is the
+    addition of an invariant amount (`i = i + c`, or `t = i + c; i = t` as TACGen writes it)
+findInductionVars: the basic induction variables of a loop
+findExitTest: the comparison of an induction variable deciding whether a loop goes on
+
+IndVars ("indvars") does, for each loop:
+1. strength reduction: `x = i * k` (k invariant) becomes `x = r`, where the new temp r is
+   set to `i * k` before the loop and has `c * k` added wherever i has c added, so that
+   r == i * k holds all through the loop (also with 32-bit wrap-around);
+2. exit test replacement: the exit test `i < n` (of the header, or of the latch of a
+   rotated loop) is rewritten as `r < n * k`, and i, now unused, stops being updated.
+Comparing multiples is only the same as comparing the numbers when nothing overflows, so
+the test is rewritten only when k > 0 and the start, the step and the bound are known
+constants for which no value i or r takes during the loop wraps around.
+
+A new recurrence is a value living across blocks (see analysis.py for what that costs): a
+load, an add and a store per iteration, more than the multiplication it saves. It is only
+worth it when it takes the place of i, so multiplications are reduced only for an induction
+variable that is otherwise used just by its update and the exit test, and goes away.
+"""
+
+INT_MAX = 0x7FFF_FFFF
+
+# a known constant, or a temp holding the value
+Operand = Union[int, Temp]
+
+
+class LoopFacts:
+    def __init__(self, cfg: CFG, loop: Loop, preheader: int) -> None:
+        self.cfg = cfg
+        self.loop = loop
+        self.preheader = preheader
+        # temp index -> the instructions of the loop writing it
+        self.defs: dict[int, list[Loc]] = {}
+        # temp index -> how many times instructions of the loop read it
+        self.uses: dict[int, int] = {}
+        for b in loop.blocks:
+            for loc in cfg.getBlock(b).locs:
+                for index in loc.instr.getWritten():
+                    self.defs.setdefault(index, []).append(loc)
+                for index in loc.instr.getRead():
+                    self.uses[index] = self.uses.get(index, 0) + 1
+        self.liveIntoHeader = cfg.getBlock(loop.header).liveIn
+        self.liveAfter: set[int] = set()
+        for _, s in loop.exitEdges(cfg):
+            self.liveAfter |= cfg.getBlock(s).liveIn
+
+    def defsOf(self, index: int) -> list[Loc]:
+        return self.defs.get(index, [])
+
+    # the value of a temp that is the same all through the loop, if it is: a constant when known
+    def invariant(self, temp: Temp) -> Optional[Operand]:
+        defs = self.defsOf(temp.index)
+        if not defs:
+            value = self.valueBefore(temp)
+            return temp if value is None else value
+        # a constant loaded in the loop, that no use can see an older value of
+        if len(defs) == 1 and isinstance(defs[0].instr, LoadImm4) and temp.index not in self.liveIntoHeader:
+            return defs[0].instr.value
+        return None
+
+    # the constant a temp holds when the loop is entered, if it is set in the preheader
+    # or in the blocks leading to it without any other way in (like the guard of a rotated loop)
+    def valueBefore(self, temp: Temp) -> Optional[int]:
+        b = self.preheader
+        seen = set()
+        while b not in seen:
+            seen.add(b)
+            for loc in reversed(self.cfg.getBlock(b).locs):
+                if temp.index in loc.instr.getWritten():
+                    return loc.instr.value if isinstance(loc.instr, LoadImm4) else None
+            if self.cfg.getInDegree(b) != 1:
+                return None
+            b = next(iter(self.cfg.getPrev(b)))
+        return None
+
+
+class InductionVar:
+    def __init__(self, temp: Temp, step: Operand, sub: bool, update: Loc, via: Optional[Loc]) -> None:
+        self.temp = temp
+        # what is added to (or subtracted from, if `sub`) the temp
+        self.step = step
+        self.sub = sub
+        # the instruction writing the temp, and the one computing its new value if that's another
+        self.update = update
+        self.via = via
+
+    # the constant added each time, if known
+    def stepValue(self) -> Optional[int]:
+        if isinstance(self.step, int):
+            return -self.step if self.sub else self.step
+        return None
+
+
+# new = i + c, i + c or c + i with c invariant: (c, whether it's subtracted)
+def increment(instr: TACInstr, index: int, facts: LoopFacts) -> Optional[tuple[Operand, bool]]:
+    if not isinstance(instr, Binary) or instr.op not in (TacBinaryOp.ADD, TacBinaryOp.SUB):
+        return None
+    if instr.lhs.index == index and instr.rhs.index != index:
+        step = facts.invariant(instr.rhs)
+        return None if step is None else (step, instr.op == TacBinaryOp.SUB)
+    if instr.op == TacBinaryOp.ADD and instr.rhs.index == index and instr.lhs.index != index:
+        step = facts.invariant(instr.lhs)
+        return None if step is None else (step, False)
+    return None
+
+
+def findInductionVars(facts: LoopFacts) -> dict[int, InductionVar]:
+    result: dict[int, InductionVar] = {}
+    for index, defs in facts.defs.items():
+        if len(defs) != 1:
+            continue
+        update = defs[0]
+        instr = update.instr
+        found = increment(instr, index, facts)
+        if found is not None:
+            result[index] = InductionVar(instr.dst, found[0], found[1], update, None)
+            continue
+        if isinstance(instr, Assign) and len(facts.defsOf(instr.src.index)) == 1:
+            via = facts.defsOf(instr.src.index)[0]
+            found = increment(via.instr, index, facts)
+            if found is not None and sameBlockBefore(facts, via, update):
+                result[index] = InductionVar(instr.dst, found[0], found[1], update, via)
+    return result
+
+
+# whether `first` comes before `second` in the same block (so nothing writes i in between)
+def sameBlockBefore(facts: LoopFacts, first: Loc, second: Loc) -> bool:
+    for b in facts.loop.blocks:
+        locs = facts.cfg.getBlock(b).locs
+        if second in locs:
+            return first in locs and locs.index(first) < locs.index(second)
+    return False
+
+
+class IndVars(LoopPass):
+    name = "indvars"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        if inSSA(func):
+            return False
+        return super().runOnFunction(func, am)
+
+    def runOnLoop(
+        self, func: TACFunc, cfg: CFG, dom: DominatorTree, forest: LoopForest, loop: Loop, preheader: int
+    ) -> bool:
+        facts = LoopFacts(cfg, loop, preheader)
+        ivs = findInductionVars(facts)
+        if not ivs:
+            return False
+
+        # code for the preheader, instructions to put after some loc, and locs to replace
+        setup: list[TACInstr] = []
+        after: dict[int, list[TACInstr]] = {}
+        replace: dict[int, Optional[TACInstr]] = {}
+
+        def operand(value: Operand) -> Temp:
+            if isinstance(value, Temp):
+                return value
+            temp = func.freshTemp()
+            setup.append(LoadImm4(temp, value))
+            return temp
+
+        for index, iv in ivs.items():
+            muls = self.multiplications(cfg, facts, ivs, index)
+            # i must be read by nothing else than its update, the exit test and these
+            if not muls or facts.uses.get(index, 0) != 2 + len(muls):
+                continue
+            if iv.via is not None:
+                t = iv.via.instr.dst.index
+                if facts.uses.get(t, 0) != 1 or t in facts.liveAfter:
+                    continue
+            k = next((k for _, k in muls if isinstance(k, int) and k > 0 and self.exitTest(cfg, facts, iv, k)), None)
+            if k is None:
+                continue
+            test, op, bound = self.exitTest(cfg, facts, iv, k)
+
+            # (k) -> the temp tracking i * k
+            tracking: dict[Union[int, tuple], Temp] = {}
+            for loc, factor in muls:
+                key = factor if isinstance(factor, int) else ("temp", factor.index)
+                if key not in tracking:
+                    tracking[key] = self.reduce(func, iv, factor, operand, setup, after)
+                replace[id(loc)] = Assign(loc.instr.dst, tracking[key])
+
+            # compare r = i * k with bound * k instead, and stop updating i
+            scaled = func.freshTemp()
+            replace[id(test)] = None
+            after.setdefault(id(test), []).extend(
+                [LoadImm4(scaled, bound * k), Binary(op, test.instr.dst, tracking[k], scaled)]
+            )
+            replace[id(iv.update)] = None
+            if iv.via is not None:
+                replace[id(iv.via)] = None
+
+        if not replace:
+            return False
+        for b in loop.blocks:
+            bb = cfg.getBlock(b)
+            locs = []
+            for loc in bb.locs:
+                if id(loc) in replace:
+                    if replace[id(loc)] is not None:
+                        locs.append(Loc(replace[id(loc)]))
+                else:
+                    locs.append(loc)
+                locs.extend(Loc(instr) for instr in after.get(id(loc), []))
+            bb.locs = locs
+        ph = cfg.getBlock(preheader)
+        at = insertPoint(ph)
+        ph.locs[at:at] = [Loc(instr) for instr in setup]
+        return True
+
+    # the multiplications of the loop of i by something invariant, with that factor
+    def multiplications(
+        self, cfg: CFG, facts: LoopFacts, ivs: dict[int, InductionVar], index: int
+    ) -> list[tuple[Loc, Operand]]:
+        result = []
+        for b in facts.loop.blocks:
+            for loc in cfg.getBlock(b).locs:
+                instr = loc.instr
+                if not isinstance(instr, Binary) or instr.op != TacBinaryOp.MUL:
+                    continue
+                if instr.lhs.index == index and instr.rhs.index not in ivs:
+                    other = instr.rhs
+                elif instr.rhs.index == index and instr.lhs.index not in ivs:
+                    other = instr.lhs
+                else:
+                    continue
+                k = facts.invariant(other)
+                if k is not None:
+                    result.append((loc, k))
+        return result
+
+    # make r = i * k before the loop and keep it so; returns r
+    def reduce(self, func: TACFunc, iv: InductionVar, k: Operand, operand, setup, after) -> Temp:
+        r = func.freshTemp()
+        setup.append(Binary(TacBinaryOp.MUL, r, iv.temp, operand(k)))
+        # what r changes by when i does
+        delta = func.freshTemp()
+        if isinstance(iv.step, int) and isinstance(k, int):
+            update = [LoadImm4(delta, wrap(iv.step * k))]
+        else:
+            setup.append(Binary(TacBinaryOp.MUL, delta, operand(iv.step), operand(k)))
+            update = []
+        op = TacBinaryOp.SUB if iv.sub else TacBinaryOp.ADD
+        after.setdefault(id(iv.update), []).extend(update + [Binary(op, r, r, delta)])
+        return r
+
+    # The exit test of the header on i, if it can be done on i * k instead:
+    # (the loc computing it, the comparison as `i op bound`, bound)
+    def exitTest(
+        self, cfg: CFG, facts: LoopFacts, iv: InductionVar, k: int
+    ) -> Optional[tuple[Loc, TacBinaryOp, int]]:
+        step = iv.stepValue()
+        start = facts.valueBefore(iv.temp)
+        if step is None or step == 0 or start is None or iv.temp.index in facts.liveAfter:
+            return None
+        # i must change at most once per iteration: not inside an inner loop
+        if not any(iv.update in cfg.getBlock(b).locs for b in facts.loop.ownBlocks):
+            return None
+        found = findExitTest(facts, iv)
+        if found is None:
+            return None
+        _, test, op, bound = found
+        if not isinstance(bound, int):
+            return None
+        # the loop goes on while i moves towards the bound
+        if (step > 0) != (op in (TacBinaryOp.SLT, TacBinaryOp.LEQ)):
+            return None
+        # all the values i takes (the last one fails the test) and their multiples must fit
+        low, high = min(start, bound) - abs(step), max(start, bound) + abs(step)
+        if low * k < INT_MIN or high * k > INT_MAX:
+            return None
+        return test, op, bound
+
+
+SWAPPED = {
+    TacBinaryOp.SLT: TacBinaryOp.SGT,
+    TacBinaryOp.LEQ: TacBinaryOp.GEQ,
+    TacBinaryOp.SGT: TacBinaryOp.SLT,
+    TacBinaryOp.GEQ: TacBinaryOp.LEQ,
+}
+
+
+# The test deciding whether the loop goes on, if it compares i with something invariant:
+# (the block, the loc computing it, the comparison as `i op bound`, bound).
+# It is looked for in the header, or in the latch of a rotated loop (then there must be
+# just one, so that no iteration skips it); the loop goes on exactly when it holds.
+def findExitTest(facts: LoopFacts, iv: InductionVar) -> Optional[tuple[int, Loc, TacBinaryOp, Operand]]:
+    cfg, loop = facts.cfg, facts.loop
+    index = iv.temp.index
+    test = None
+    for b in [loop.header] + (loop.latches if len(loop.latches) == 1 else []):
+        block = cfg.getBlock(b)
+        last = block.locs[-1].instr if block.locs else None
+        if not isinstance(last, CondBranch) or all(loop.contains(s) for s in cfg.getSucc(b)):
+            continue
+        # the loop must go on exactly when the condition is non zero
+        stays = any(loop.contains(s) and cfg.getBlock(s).label is last.target for s in cfg.getSucc(b))
+        if stays != (last.op == CondBranchOp.BNE):
+            continue
+        for loc in block.locs:
+            if loc.instr.getWritten() == [last.cond.index]:
+                test = loc
+        break
+    if test is None or not isinstance(test.instr, Binary) or len(facts.defsOf(test.instr.dst.index)) != 1:
+        return None
+
+    instr: Binary = test.instr
+    if instr.op not in SWAPPED:
+        return None
+    if instr.lhs.index == index and instr.rhs.index != index:
+        op, bound = instr.op, facts.invariant(instr.rhs)
+    elif instr.rhs.index == index and instr.lhs.index != index:
+        op, bound = SWAPPED[instr.op], facts.invariant(instr.lhs)
+    else:
+        return None
+    if bound is None:
+        return None
+    return b, test, op, bound
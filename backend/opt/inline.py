@@ -0,0 +1,212 @@
+from backend.dataflow.cfg import CFG
+from utils.label.funclabel import MAIN_LABEL
+from utils.label.label import Label
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.tacprog import TACProg
+from utils.tac.temp import Temp
+
+from .analysis import CFGAnalysis, LoopAnalysis
+from .passmanager import AnalysisManager, ModulePass, irSize
+from .ssa import inSSA
+
+"""
+Inliner: calls replaced by the bodies of the functions they call
+
+A call is dear in this back end: the arguments are loaded into a0-a7, every value live
+in registers has already gone to the stack at the end of the block before (a call is a
+block of its own), the callee saves and restores its frame, and the result comes back
+through a0 and the stack. Worse, nothing is known across it, so a helper called with a
+constant is computed in full at run time. Inlining copies the body of the callee in
+place of the call: its temps are renamed to new temps of the caller, its labels to new
+labels (from the LabelManager shared by the program, as every label must be unique in
+it), the parameters get the arguments by copies, and every `return v` becomes
+`dst = v` and a jump to a new label after the body (a plain `return` gives 0, as the
+back end does). The copies and jumps are left to the clean-ups.
+
+Whether a call is worth it is guessed from the sizes (instructions, labels excluded):
+the size of the callee, less what the call itself costs (CALL_COST, plus the moving of
+every argument) and a bonus for each argument that's a constant (CONSTANT_ARGUMENT),
+must be at most THRESHOLD, times 1 + the depth of the loops around the call (up to
+MAX_LOOP_DEPTH), as the calls in loops are the ones run often. The only call of a
+function is always worth it, since the function goes away afterwards (the functions
+main can't reach any more are deleted). The program may grow by at most GROWTH times
+its size (plus SLACK instructions, for the small ones), and no function beyond
+MAX_CALLER_SIZE, so that the passes after this one don't get too slow.
+
+The functions are done callees first (the strongly connected components of the call
+graph, as Tarjan's algorithm finds them, in reverse topological order), so that what
+gets inlined has had its own calls inlined already. Functions calling themselves, even
+through others, are never inlined (it wouldn't end), and functions in SSA form are left
+alone.
+"""
+
+THRESHOLD = 20
+CALL_COST = 8
+CONSTANT_ARGUMENT = 4
+MAX_LOOP_DEPTH = 2
+GROWTH = 1.0
+SLACK = 200
+MAX_CALLER_SIZE = 800
+
+
+class Inliner(ModulePass):
+    name = "inline"
+
+    def __init__(self) -> None:
+        self.inlined = 0
+        self.removed = 0
+
+    def summary(self) -> str:
+        return "%d calls inlined, %d functions removed" % (self.inlined, self.removed)
+
+    def runOnModule(self, prog: TACProg, am: AnalysisManager) -> bool:
+        self.inlined = self.removed = 0
+        funcs = {func.entry.name: func for func in prog.funcs}
+        calls = {name: self.callees(func, funcs) for name, func in funcs.items()}
+        sizes = {name: irSize(func) for name, func in funcs.items()}
+        budget = int(sum(sizes.values()) * (1 + GROWTH)) + SLACK
+        # callee -> its number of call sites in the program
+        callers = {name: 0 for name in funcs}
+        for func in prog.funcs:
+            for instr in func.getInstrSeq():
+                if isinstance(instr, Call) and instr.label.name in callers:
+                    callers[instr.label.name] += 1
+
+        recursive: set[str] = set()
+        for component in self.components(calls):
+            if len(component) > 1 or component[0] in calls[component[0]]:
+                recursive.update(component)
+            for name in component:
+                func = funcs[name]
+                if inSSA(func):
+                    continue
+                chosen = self.choose(func, funcs, recursive, callers, am)
+                if not chosen:
+                    continue
+                total = sum(sizes.values())
+                instrs: list[TACInstr] = []
+                for instr in func.getInstrSeq():
+                    callee = funcs.get(instr.label.name) if isinstance(instr, Call) and id(instr) in chosen else None
+                    growth = sizes[callee.entry.name] if callee is not None else 0
+                    if callee is None or total + growth > budget or sizes[name] + growth > MAX_CALLER_SIZE:
+                        instrs.append(instr)
+                        continue
+                    body = self.inlineCall(func, instr, callee)
+                    instrs.extend(body)
+                    sizes[name] += growth
+                    total += growth
+                    callers[callee.entry.name] -= 1
+                    for copied in body:
+                        if isinstance(copied, Call) and copied.label.name in callers:
+                            callers[copied.label.name] += 1
+                    self.inlined += 1
+                func.instrSeq = instrs
+                sizes[name] = irSize(func)
+                am.forget(func)
+
+        # the functions still called, from main
+        reached = {MAIN_LABEL.name}
+        work = [MAIN_LABEL.name]
+        while work:
+            for callee in self.callees(funcs[work.pop()], funcs):
+                if callee not in reached:
+                    reached.add(callee)
+                    work.append(callee)
+        kept = [func for func in prog.funcs if func.entry.name in reached]
+        self.removed = len(prog.funcs) - len(kept)
+        prog.funcs[:] = kept
+        return self.inlined > 0 or self.removed > 0
+
+    def callees(self, func: TACFunc, funcs: dict[str, TACFunc]) -> set[str]:
+        return {instr.label.name for instr in func.getInstrSeq() if isinstance(instr, Call) and instr.label.name in funcs}
+
+    # the strongly connected components of the call graph, callees before callers (Tarjan)
+    def components(self, calls: dict[str, set[str]]) -> list[list[str]]:
+        index: dict[str, int] = {}
+        low: dict[str, int] = {}
+        stack: list[str] = []
+        onStack: set[str] = set()
+        result: list[list[str]] = []
+
+        def visit(name: str) -> None:
+            index[name] = low[name] = len(index)
+            stack.append(name)
+            onStack.add(name)
+            for callee in sorted(calls[name]):
+                if callee not in index:
+                    visit(callee)
+                    low[name] = min(low[name], low[callee])
+                elif callee in onStack:
+                    low[name] = min(low[name], index[callee])
+            if low[name] == index[name]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    onStack.discard(member)
+                    component.append(member)
+                    if member == name:
+                        break
+                result.append(component)
+
+        for name in calls:
+            if name not in index:
+                visit(name)
+        return result
+
+    # the calls of func worth inlining (by id)
+    def choose(
+        self, func: TACFunc, funcs: dict[str, TACFunc], recursive: set[str], callers: dict[str, int], am: AnalysisManager
+    ) -> set[int]:
+        cfg: CFG = am.get(CFGAnalysis, func)
+        am.get(LoopAnalysis, func)
+        constants = func.constants()
+        chosen: set[int] = set()
+        for bb in cfg.nodes:
+            for loc in bb.locs:
+                instr = loc.instr
+                callee = funcs.get(instr.label.name) if isinstance(instr, Call) else None
+                if callee is None or callee.entry.name in recursive or inSSA(callee):
+                    continue
+                if callers[callee.entry.name] == 1 and callee.entry.name != MAIN_LABEL.name:
+                    chosen.add(id(instr))
+                    continue
+                bonus = CONSTANT_ARGUMENT * sum(1 for arg in instr.srcs if arg.index in constants)
+                cost = irSize(callee) - CALL_COST - len(instr.srcs) - bonus
+                if cost <= THRESHOLD * (1 + min(bb.loopDepth, MAX_LOOP_DEPTH)):
+                    chosen.add(id(instr))
+        return chosen
+
+    # the body of callee, in place of call in func
+    def inlineCall(self, func: TACFunc, call: Call, callee: TACFunc) -> list[TACInstr]:
+        temps: dict[int, Temp] = {}
+        labels: dict[Label, Label] = {}
+
+        def temp(t: Temp) -> Temp:
+            if t.index not in temps:
+                temps[t.index] = func.freshTemp()
+            return temps[t.index]
+
+        def label(l: Label) -> Label:
+            if l not in labels:
+                labels[l] = func.freshLabel()
+            return labels[l]
+
+        after = func.freshLabel()
+        instrs: list[TACInstr] = [Assign(temp(param), arg) for param, arg in zip(callee.tempArgs, call.srcs)]
+        for instr in callee.getInstrSeq():
+            if isinstance(instr, Return):
+                if instr.value is None:
+                    instrs.append(LoadImm4(call.dst, 0))
+                else:
+                    instrs.append(Assign(call.dst, temp(instr.value)))
+                instrs.append(Branch(after))
+                continue
+            instr = instr.clone()
+            instr.srcs = [temp(src) for src in instr.srcs]
+            instr.dsts = [temp(dst) for dst in instr.dsts]
+            if isinstance(instr, (Mark, Branch, CondBranch)):
+                instr.label = label(instr.label)
+            instrs.append(instr)
+        instrs.append(Mark(after))
+        return instrs
@@ -0,0 +1,93 @@
+from backend.dataflow.cfg import CFG
+from backend.dataflow.dominance import DominatorTree
+from backend.dataflow.loc import Loc
+from backend.dataflow.loop import Loop, LoopForest
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+from .deadcode import isPure
+from .loopsimplify import insertPoint
+from .looppass import LoopPass
+
+"""
+LICM: loop invariant code motion
+
+An instruction in a loop is invariant when it has no side effect and its operands are
+either not written in the loop, or written only by other invariant instructions. Such an
+instruction computes the same value on every iteration, so it's moved to the preheader of
+the loop and runs once. TACGen repeats the loads of literals and the expressions of values
+the loop doesn't change in every iteration, which is what this catches. Only computations
+(and the invariants they read) are moved: a constant or a copy is as cheap to redo as to
+keep across blocks (see analysis.py).
+
+Temps are not in SSA form in general, so an invariant instruction is moved only if
+1. it is the only instruction of the loop writing its temp,
+2. the temp isn't live into the header (no use in the loop can see an older value), and
+3. the temp isn't live after the loop, or the instruction runs whenever the loop is left
+   (its block dominates all the exits).
+Nothing here can trap, so moving an instruction out of a branch of the loop is safe.
+Loops are done inner first, so an instruction can move out of several loops in turn.
+"""
+
+
+class LICM(LoopPass):
+    name = "licm"
+
+    def runOnLoop(
+        self, func: TACFunc, cfg: CFG, dom: DominatorTree, forest: LoopForest, loop: Loop, preheader: int
+    ) -> bool:
+        # temp index -> how many instructions of the loop write it
+        defs: dict[int, int] = {}
+        for b in loop.blocks:
+            for loc in cfg.getBlock(b).locs:
+                for index in loc.instr.getWritten():
+                    defs[index] = defs.get(index, 0) + 1
+
+        exits = loop.exitEdges(cfg)
+        liveAfter: set[int] = set()
+        for _, s in exits:
+            liveAfter |= cfg.getBlock(s).liveIn
+        exiting = {b for b, _ in exits}
+        liveIntoHeader = cfg.getBlock(loop.header).liveIn
+        everyIteration = [b for b in loop.blocks if all(dom.dominates(b, latch) for latch in loop.latches)]
+
+        # temp index -> the invariant instruction writing it, in the order they were found
+        invariant: dict[int, Loc] = {}
+        found = True
+        while found:
+            found = False
+            for b in everyIteration:
+                for loc in cfg.getBlock(b).locs:
+                    instr = loc.instr
+                    if (
+                        isPure(instr)
+                        and instr.dst.index not in invariant
+                        and defs[instr.dst.index] == 1
+                        and instr.dst.index not in liveIntoHeader
+                        and (instr.dst.index not in liveAfter or all(dom.dominates(b, e) for e in exiting))
+                        and all(defs.get(index, 0) == 0 or index in invariant for index in instr.getRead())
+                    ):
+                        invariant[instr.dst.index] = loc
+                        found = True
+
+        # a constant or a copy costs as much in the loop as loading it back once hoisted,
+        # so only computations are moved, with whatever invariants they read
+        wanted: set[int] = set()
+        work = [index for index, loc in invariant.items() if isinstance(loc.instr, (Unary, Binary))]
+        while work:
+            index = work.pop()
+            if index in wanted:
+                continue
+            wanted.add(index)
+            work.extend(src for src in invariant[index].instr.getRead() if src in invariant)
+        moved = [loc for index, loc in invariant.items() if index in wanted]
+
+        movedSet = set(map(id, moved))
+        for b in loop.blocks:
+            bb = cfg.getBlock(b)
+            bb.locs = [loc for loc in bb.locs if id(loc) not in movedSet]
+        if not moved:
+            return False
+        at = insertPoint(cfg.getBlock(preheader))
+        cfg.getBlock(preheader).locs[at:at] = moved
+        return True
@@ -0,0 +1,76 @@
+from backend.dataflow.basicblock import BasicBlock
+from backend.dataflow.cfg import CFG
+from backend.dataflow.dominance import DominatorTree
+from backend.dataflow.loc import Loc
+from backend.dataflow.loop import Loop, LoopForest
+from utils.label.label import Label
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+from .analysis import DominatorAnalysis, LivenessAnalysis, LoopAnalysis, writeBack
+from .loopsimplify import LoopSimplify, preheaderOf
+from .passmanager import AnalysisManager, FunctionPass
+
+"""
+LoopPass: a pass working on one loop at a time
+
+The loops are given preheaders first (LoopSimplify), then handed to `runOnLoop` inner first,
+with the CFG (liveness filled in), the dominator tree and the loop forest of the function.
+`runOnLoop` edits the blocks in place and returns whether it changed anything; if it did,
+the blocks are written back and the analyses computed again before the next loop.
+Loops are told apart by the label of their header, since the blocks get renumbered.
+
+copyLoop: a copy of the blocks of a loop, for the passes duplicating loops
+"""
+
+
+class LoopPass(FunctionPass):
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        changed = LoopSimplify().runOnFunction(func, am)
+        if changed:
+            am.invalidate(func)
+
+        done: set[Label] = set()
+        while True:
+            cfg: CFG = am.get(LivenessAnalysis, func)
+            dom: DominatorTree = am.get(DominatorAnalysis, func)
+            forest: LoopForest = am.get(LoopAnalysis, func)
+            for loop in forest.loops:
+                header = cfg.getBlock(loop.header).label
+                if header is None or header in done:
+                    continue
+                done.add(header)
+                preheader = preheaderOf(cfg, loop)
+                if preheader is None:
+                    continue
+                if self.runOnLoop(func, cfg, dom, forest, loop, preheader):
+                    writeBack(func, cfg)
+                    am.invalidate(func)
+                    changed = True
+                    break
+            else:
+                return changed
+
+    def runOnLoop(
+        self, func: TACFunc, cfg: CFG, dom: DominatorTree, forest: LoopForest, loop: Loop, preheader: int
+    ) -> bool:
+        raise NotImplementedError
+
+
+# The blocks of a loop (or any other blocks), copied with fresh labels (the first one always
+# has one); the jumps between them go to the copies.
+def copyLoop(func: TACFunc, cfg: CFG, blocks: list[int]) -> list[BasicBlock]:
+    labels = {cfg.getBlock(b).label: func.freshLabel() for b in blocks if cfg.getBlock(b).label is not None}
+    copies = []
+    for b in blocks:
+        bb = cfg.getBlock(b)
+        locs = []
+        for loc in bb.locs:
+            instr = loc.instr.clone()
+            if isinstance(instr, (Branch, CondBranch)) and instr.target in labels:
+                instr.label = labels[instr.target]
+            locs.append(Loc(instr))
+        copies.append(BasicBlock(bb.kind, -1, labels.get(bb.label), locs))
+    if copies[0].label is None:
+        copies[0].label = func.freshLabel()
+    return copies
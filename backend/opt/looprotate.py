@@ -0,0 +1,101 @@
+from backend.dataflow.cfg import CFG
+from backend.dataflow.dominance import DominatorTree
+from backend.dataflow.loc import Loc
+from backend.dataflow.loop import Loop, LoopForest
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+from .looppass import LoopPass
+from .passmanager import AnalysisManager
+from .ssa import inSSA
+
+"""
+LoopRotate: turn top tested loops into guarded bottom tested ones
+
+TACGen writes `while` and `for` loops with the test at the top:
+
+    begin:  test; if (c == 0) branch break
+            body
+    loop:   update; branch begin
+    break:
+
+so that every iteration runs a conditional branch and a jump. Rotation copies the test
+to the end of the loop, and once more in front of it as a guard for the first iteration:
+
+            test; if (c == 0) branch break
+    body:   body
+    loop:   update; test; if (c != 0) branch body
+    break:
+
+Every iteration now runs one conditional branch. `continue` still jumps to the update
+(the label `loop`), which is now followed by the test; `break` still leaves by `break`.
+Only headers with at most MAX_TEST instructions before the branch are copied, and only
+loops with one latch, ending with the jump to the header, are rotated.
+"""
+
+MAX_TEST = 16
+
+NEGATED = {CondBranchOp.BEQ: CondBranchOp.BNE, CondBranchOp.BNE: CondBranchOp.BEQ}
+
+
+class LoopRotate(LoopPass):
+    name = "looprotate"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        if inSSA(func):
+            return False
+        return super().runOnFunction(func, am)
+
+    def runOnLoop(
+        self, func: TACFunc, cfg: CFG, dom: DominatorTree, forest: LoopForest, loop: Loop, preheader: int
+    ) -> bool:
+        if len(loop.latches) != 1 or loop.latches[0] == loop.header:
+            return False
+        header = cfg.getBlock(loop.header)
+        latch = cfg.getBlock(loop.latches[0])
+        pre = cfg.getBlock(preheader)
+
+        if not header.locs or not isinstance(header.locs[-1].instr, CondBranch):
+            return False
+        exitBranch: CondBranch = header.locs[-1].instr
+        test = [loc.instr for loc in header.locs[:-1]]
+        if len(test) > MAX_TEST:
+            return False
+        # the branch leaves the loop, and the header falls through into the body
+        body = loop.header + 1
+        exits = [s for s in cfg.getSucc(loop.header) if not loop.contains(s)]
+        if len(exits) != 1 or cfg.getBlock(exits[0]).label is not exitBranch.target:
+            return False
+        if body >= len(cfg) or not loop.contains(body):
+            return False
+        if not latch.locs or not isinstance(latch.locs[-1].instr, Branch):
+            return False
+        # the preheader jumps to the header, or falls into it
+        preLast = pre.locs[-1].instr if pre.locs else None
+        jumps = isinstance(preLast, Branch)
+        if not jumps and preheader != loop.header - 1:
+            return False
+
+        bodyBlock = cfg.getBlock(body)
+        if bodyBlock.label is None:
+            bodyBlock.label = func.freshLabel()
+
+        def copyOfTest(op: CondBranchOp, target) -> list[Loc]:
+            return [Loc(instr.clone()) for instr in test] + [Loc(CondBranch(op, exitBranch.cond, target))]
+
+        guard = copyOfTest(exitBranch.op, exitBranch.target)
+        if jumps:
+            pre.locs[-1:] = guard + [Loc(Branch(bodyBlock.label))]
+        else:
+            pre.locs.extend(guard)
+
+        bottom = copyOfTest(NEGATED[exitBranch.op], bodyBlock.label)
+        # leaving the loop at the bottom falls into the code after the latch: that must be the exit
+        if latch.id + 1 != exits[0]:
+            bottom.append(Loc(Branch(exitBranch.target)))
+        latch.locs[-1:] = bottom
+
+        # nothing reaches the old header any more
+        header.locs = []
+        header.label = None
+        return True
@@ -0,0 +1,101 @@
+from typing import Optional
+
+from backend.dataflow.basicblock import BasicBlock
+from backend.dataflow.cfg import CFG
+from backend.dataflow.loc import Loc
+from backend.dataflow.loop import Loop
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+from .analysis import CFGAnalysis, LoopAnalysis, linearize
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import inSSA
+
+"""
+LoopSimplify: give every loop a preheader
+
+A preheader is a block outside the loop whose only successor is the header, and through
+which every entry into the loop goes. Code that has to run once before the loop (hoisted
+by LICM, or set up by the other loop passes) is put there.
+
+The block that falls into the header is usually one already. Otherwise a new block is
+made: the jumps from outside the loop are redirected to it, and it goes right before the
+header, unless the loop itself falls into the header: then it goes at the end of the
+function, with a jump to the header.
+Functions in SSA form are left alone, since their phis name the predecessor blocks.
+"""
+
+
+# the preheader of `loop`, if it has one
+def preheaderOf(cfg: CFG, loop: Loop) -> Optional[int]:
+    entries = loop.entries(cfg)
+    if len(entries) != 1:
+        return None
+    p = entries[0]
+    if cfg.getOutDegree(p) != 1:
+        return None
+    last = cfg.getBlock(p).locs[-1].instr if cfg.getBlock(p).locs else None
+    if isinstance(last, CondBranch):
+        return None
+    return p
+
+
+# where code to run before the loop goes in the preheader: before its jump, if any
+def insertPoint(preheader: BasicBlock) -> int:
+    if preheader.locs and isinstance(preheader.locs[-1].instr, Branch):
+        return len(preheader.locs) - 1
+    return len(preheader.locs)
+
+
+class LoopSimplify(FunctionPass):
+    name = "loopsimplify"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        if inSSA(func):
+            return False
+        cfg: CFG = am.get(CFGAnalysis, func)
+        forest = am.get(LoopAnalysis, func)
+
+        # block -> the preheader to put right before it
+        before: dict[int, BasicBlock] = {}
+        atEnd: list[BasicBlock] = []
+        for loop in forest.loops:
+            header = cfg.getBlock(loop.header)
+            if loop.header == 0 or header.label is None or preheaderOf(cfg, loop) is not None:
+                continue
+            entries = loop.entries(cfg)
+            if not entries:
+                continue
+
+            label = func.freshLabel()
+            for p in entries:
+                pred = cfg.getBlock(p)
+                last = pred.locs[-1].instr if pred.locs else None
+                if isinstance(last, Branch) and last.target is header.label:
+                    pred.locs[-1] = Loc(Branch(label))
+                elif isinstance(last, CondBranch) and last.target is header.label:
+                    pred.locs[-1] = Loc(CondBranch(last.op, last.cond, label))
+
+            if self.fallsInto(cfg, loop.header - 1, loop.header) and loop.contains(loop.header - 1):
+                # the new block can't go right before the header, since the loop falls into it
+                atEnd.append(BasicBlock(None, -1, label, [Loc(Branch(header.label))]))
+            else:
+                before[loop.header] = BasicBlock(None, -1, label, [])
+
+        if not before and not atEnd:
+            return False
+        blocks = []
+        for bb in cfg.nodes:
+            if bb.id in before:
+                blocks.append(before[bb.id])
+            blocks.append(bb)
+        blocks.extend(atEnd)
+        func.instrSeq = linearize(func, blocks)
+        return True
+
+    # whether the control can fall through the end of block b into block s
+    def fallsInto(self, cfg: CFG, b: int, s: int) -> bool:
+        if b < 0 or s not in cfg.getSucc(b):
+            return False
+        locs = cfg.getBlock(b).locs
+        return not (locs and isinstance(locs[-1].instr, Branch))
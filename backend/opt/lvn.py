@@ -0,0 +1,149 @@
+import itertools
+from typing import Callable, Hashable, Optional
+
+from backend.dataflow.basicblock import BasicBlock
+from backend.dataflow.cfg import CFG
+from backend.dataflow.loc import Loc
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.temp import Temp
+
+from .analysis import LivenessAnalysis, writeBack
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import isPhi
+
+"""
+LocalValueNumbering: remove the computations repeated within a basic block
+
+Every temp is given a value number, standing for the value it holds: two temps with the
+same number hold the same value. The numbers of the operands make up a key for each
+computation (a literal, or an operation with the numbers of its operands), and a table
+maps the keys seen so far in the block to the number of their result. A computation whose
+key is in the table, and whose result some temp still holds, becomes a copy of that temp
+(left to CopyProp and DeadCodeElim), or goes away if its own dst already holds it. Every
+value is read from the first temp of the block holding it, or from the last copy made of
+it (`t = a + b; x = t` is `x = a + b` for CopyProp only if nothing else reads t). A literal
+loaded again is kept as it is (a copy would cost as much), and what reads it then reads
+the first one, unless the new one lives on after the block.
+Commutative operations have their operands sorted, and `a > b` / `a >= b` are keyed as
+`b < a` / `b <= a`, so that `a * b` and `b * a` get the same key. Copies give their dst
+the number of their src. Nothing in TAC reads or writes memory, so only the instructions
+writing a temp change what it holds.
+
+expressionKey: the key of a computation, also used by GlobalValueNumbering
+"""
+
+COMMUTATIVE = {
+    TacBinaryOp.ADD,
+    TacBinaryOp.MUL,
+    TacBinaryOp.EQU,
+    TacBinaryOp.NEQ,
+    TacBinaryOp.AND,
+    TacBinaryOp.OR,
+}
+
+# a op b is the same as b op' a
+MIRRORED = {TacBinaryOp.SGT: TacBinaryOp.SLT, TacBinaryOp.GEQ: TacBinaryOp.LEQ}
+
+
+# the key of what instr computes, from the value numbers of its operands; None if it's
+# not a computation to reuse (a copy, a call, a branch...)
+def expressionKey(instr: TACInstr, numberOf: Callable[[Temp], int]) -> Optional[Hashable]:
+    if isinstance(instr, LoadImm4):
+        return ("imm", instr.value)
+    if isinstance(instr, Unary):
+        return ("unary", instr.op, numberOf(instr.operand))
+    if isinstance(instr, Binary):
+        op, lhs, rhs = instr.op, numberOf(instr.lhs), numberOf(instr.rhs)
+        if op in MIRRORED:
+            op, lhs, rhs = MIRRORED[op], rhs, lhs
+        elif op in COMMUTATIVE and rhs < lhs:
+            lhs, rhs = rhs, lhs
+        return ("binary", op, lhs, rhs)
+    return None
+
+
+class LocalValueNumbering(FunctionPass):
+    name = "lvn"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        cfg: CFG = am.get(LivenessAnalysis, func)
+        changed = False
+        for bb in cfg.nodes:
+            changed = self.numberBlock(bb) or changed
+        if changed:
+            writeBack(func, cfg)
+        return changed
+
+    def numberBlock(self, bb: BasicBlock) -> bool:
+        fresh = itertools.count()
+        # temp index -> the number of the value it holds
+        numbers: dict[int, int] = {}
+        # number -> the temps that held it at some point (check `numbers` before using one)
+        holders: dict[int, list[Temp]] = {}
+        table: dict[Hashable, int] = {}
+
+        def define(temp: Temp, number: int) -> None:
+            numbers[temp.index] = number
+            holders.setdefault(number, []).append(temp)
+
+        def numberOf(temp: Temp) -> int:
+            # a value from before the block
+            if temp.index not in numbers:
+                define(temp, next(fresh))
+            return numbers[temp.index]
+
+        def holderOf(number: int) -> Optional[Temp]:
+            return next((t for t in holders.get(number, []) if numbers.get(t.index) == number), None)
+
+        changed = False
+        locs: list[Loc] = []
+        for loc in bb.locs:
+            instr = loc.instr
+            # read every value from the temp that got it first
+            if not isPhi(instr):
+                srcs = [holderOf(numberOf(src)) for src in instr.srcs]
+                if any(new.index != src.index for new, src in zip(srcs, instr.srcs)):
+                    instr.srcs = srcs
+                    changed = True
+
+            if isinstance(instr, Assign):
+                number = numberOf(instr.src)
+                if numbers.get(instr.dst.index) == number:
+                    changed = True
+                    continue
+                # read it from the dst from here on, so that CopyProp can still coalesce the copy
+                define(instr.dst, number)
+                holders[number].insert(0, holders[number].pop())
+                locs.append(loc)
+                continue
+
+            key = expressionKey(instr, numberOf)
+            if key is None:
+                for temp in instr.dsts:
+                    define(temp, next(fresh))
+                locs.append(loc)
+                continue
+            number = table.get(key)
+            holder = holderOf(number) if number is not None else None
+            if holder is None:
+                number = next(fresh)
+                table[key] = number
+                define(instr.dst, number)
+                locs.append(loc)
+                continue
+            if numbers.get(instr.dst.index) == number:
+                changed = True
+                continue
+            define(instr.dst, number)
+            if isinstance(instr, LoadImm4):
+                # loading it again is as cheap as a copy, and keeps the constant in sight;
+                # if this one is needed after the block anyway, read it from here on
+                if instr.dst.index in bb.liveOut:
+                    holders[number].insert(0, holders[number].pop())
+                locs.append(loc)
+            else:
+                locs.append(Loc(Assign(instr.dst, holder)))
+                changed = True
+        bb.locs = locs
+        return changed
@@ -0,0 +1,165 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional, TextIO
+
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacprog import TACProg
+
+"""
+PassManager: run a pipeline of optimizations over a TAC program
+
+      Analysis: a fact about a function (its CFG, liveness, dominators...), computed on demand
+AnalysisManager: caches the analyses of every function, and drops them once the function changes
+  FunctionPass: an optimization applied to each function on its own
+    ModulePass: an optimization that needs to see the whole program (e.g. an inliner)
+
+A pass returns whether it changed the IR. When it did, every analysis of that function
+is invalidated, except the ones the pass lists in `preserves`.
+"""
+
+
+class Analysis(ABC):
+    name: str
+
+    @abstractmethod
+    def compute(self, func: TACFunc, am: "AnalysisManager") -> Any:
+        raise NotImplementedError
+
+
+class AnalysisManager:
+    def __init__(self) -> None:
+        # func -> (analysis -> result)
+        self.cache: dict[TACFunc, dict[type[Analysis], Any]] = {}
+
+    def get(self, analysis: type[Analysis], func: TACFunc) -> Any:
+        results = self.cache.setdefault(func, {})
+        if analysis not in results:
+            results[analysis] = analysis().compute(func, self)
+        return results[analysis]
+
+    def invalidate(self, func: TACFunc, preserved: tuple[type[Analysis], ...] = ()) -> None:
+        results = self.cache.get(func)
+        if results is None:
+            return
+        for analysis in list(results):
+            if analysis not in preserved:
+                del results[analysis]
+
+    def forget(self, func: TACFunc) -> None:
+        self.cache.pop(func, None)
+
+
+class Pass(ABC):
+    name: str
+    # analyses that stay valid even when the pass changes a function
+    preserves: tuple[type[Analysis], ...] = ()
+
+    # what the last run did beyond the size change (e.g. what it replaced), for the statistics
+    def summary(self) -> str:
+        return ""
+
+
+class FunctionPass(Pass):
+    @abstractmethod
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        raise NotImplementedError
+
+
+class ModulePass(Pass):
+    @abstractmethod
+    def runOnModule(self, prog: TACProg, am: AnalysisManager) -> bool:
+        raise NotImplementedError
+
+
+# The size of a function, as reported by the statistics: its instructions, labels excluded.
+def irSize(func: TACFunc) -> int:
+    return sum(1 for instr in func.getInstrSeq() if not instr.isLabel())
+
+
+class PassManager:
+    def __init__(self, passes: list[Pass], stats: Optional[TextIO] = None) -> None:
+        self.passes = passes
+        self.am = AnalysisManager()
+        # when set, a line with the size delta and time of every pass is written to it
+        self.stats = stats
+
+    def describe(self) -> str:
+        return ", ".join(p.name for p in self.passes) if self.passes else "(none)"
+
+    # run the whole pipeline, module passes included
+    def run(self, prog: TACProg) -> bool:
+        changed = False
+        for p in self.passes:
+            if isinstance(p, ModulePass):
+                changed |= self.runModulePass(p, prog)
+            elif isinstance(p, FixedPoint):
+                for func in prog.funcs:
+                    changed |= self.runFixedPoint(p, func)
+            else:
+                for func in prog.funcs:
+                    changed |= self.runFunctionPass(p, func)
+        return changed
+
+    # run only the function passes, for when the rest of the program isn't available (streaming)
+    def runOnFunction(self, func: TACFunc) -> bool:
+        changed = False
+        for p in self.passes:
+            if isinstance(p, FixedPoint):
+                changed |= self.runFixedPoint(p, func)
+            elif isinstance(p, FunctionPass):
+                changed |= self.runFunctionPass(p, func)
+        self.am.forget(func)
+        return changed
+
+    def runFunctionPass(self, p: FunctionPass, func: TACFunc) -> bool:
+        before = irSize(func) if self.stats else 0
+        start = time.perf_counter()
+        changed = p.runOnFunction(func, self.am)
+        if changed:
+            self.am.invalidate(func, p.preserves)
+        if self.stats:
+            self.report(p, func.entry.name, before, irSize(func), start)
+        return changed
+
+    def runFixedPoint(self, group: "FixedPoint", func: TACFunc) -> bool:
+        changed = False
+        for _ in range(group.maxRounds):
+            roundChanged = False
+            for p in group.passes:
+                roundChanged |= self.runFunctionPass(p, func)
+            if not roundChanged:
+                break
+            changed = True
+        return changed
+
+    def runModulePass(self, p: ModulePass, prog: TACProg) -> bool:
+        before = sum(map(irSize, prog.funcs)) if self.stats else 0
+        start = time.perf_counter()
+        changed = p.runOnModule(prog, self.am)
+        if changed:
+            # a module pass may have touched any function
+            self.am = AnalysisManager()
+        if self.stats:
+            self.report(p, "<module>", before, sum(map(irSize, prog.funcs)), start)
+        return changed
+
+    def report(self, p: Pass, where: str, before: int, after: int, start: float) -> None:
+        elapsed = (time.perf_counter() - start) * 1000
+        print(
+            "{:<16} {:<16} {:>6} -> {:<6} ({:+d}) {:8.3f} ms {}".format(
+                p.name, where, before, after, after - before, elapsed, p.summary()
+            ).rstrip(),
+            file=self.stats,
+        )
+
+
+class FixedPoint(Pass):
+    """
+    Repeat a group of function passes until none of them changes the function any more,
+    or `maxRounds` rounds have been run (which bounds the extra compile time).
+    """
+
+    def __init__(self, passes: list[FunctionPass], maxRounds: int) -> None:
+        self.passes = passes
+        self.maxRounds = maxRounds
+        self.name = "fixpoint<%d>(%s)" % (maxRounds, ", ".join(p.name for p in passes))
@@ -0,0 +1,105 @@
+import importlib
+from typing import Optional, TextIO
+
+from .passmanager import FixedPoint, Pass, PassManager
+
+"""
+The optimization levels, and the names `--passes` accepts.
+
+-O0: no optimization, the TAC goes to the back end as generated
+-O1: one round of cheap, local clean-ups
+-O2: the self tail calls made loops (through an accumulator for `n + f(n - 1)`), the
+     clean-ups, with constants propagated over the whole function (SCCP), repeated
+     until they stop finding anything (bounded), before and after inlining the calls
+     worth it, then the loop optimizations, the simplifications from value ranges,
+     global value numbering, partial redundancy elimination, the cheapest forms of the
+     expressions of each block (by equality saturation) and another round of clean-ups;
+     more compile time for faster code
+
+The passes are named by module and class, and their modules imported only when a
+pipeline uses them, so that -O0 (or a single pass) doesn't load the whole optimizer.
+"""
+
+PASSES: dict[str, str] = {
+    "algebra": "algebra.AlgebraicSimplify",
+    "constfold": "constfold.ConstFold",
+    "copyprop": "copyprop.CopyProp",
+    "dce": "deadcode.DeadCodeElim",
+    "egraph": "egraph.EqualitySaturation",
+    "gvn": "gvn.GlobalValueNumbering",
+    "indvars": "induction.IndVars",
+    "inline": "inline.Inliner",
+    "licm": "licm.LICM",
+    "lvn": "lvn.LocalValueNumbering",
+    "looprotate": "looprotate.LoopRotate",
+    "loopsimplify": "loopsimplify.LoopSimplify",
+    "unroll": "unroll.LoopUnroll",
+    "unswitch": "unswitch.LoopUnswitch",
+    "pre": "pre.PRE",
+    "ranges": "ranges.RangeSimplify",
+    "sccp": "sccp.SCCP",
+    "simplifycfg": "simplifycfg.SimplifyCFG",
+    "ssa": "ssa.SSAConstruct",
+    "outofssa": "ssa.SSADestruct",
+    "tailrec": "tailrec.TailRecursion",
+}
+
+# the bound on the rounds of a fixed point iteration at -O2
+MAX_ROUNDS = 4
+
+
+def passClass(name: str) -> type[Pass]:
+    module, cls = PASSES[name].rsplit(".", 1)
+    return getattr(importlib.import_module("." + module, __package__), cls)
+
+
+# `options` are the arguments of the constructor, e.g. create("unroll", factor=2)
+def create(name: str, **options) -> Pass:
+    return passClass(name)(**options)
+
+
+# `fold` is the constant propagation: constfold (local) or sccp (global, a bit slower)
+def cleanup(fold: str = "constfold") -> list[Pass]:
+    return [create(name) for name in ("simplifycfg", fold, "algebra", "lvn", "copyprop", "dce", "simplifycfg")]
+
+
+# `options` maps the name of a loop pass to the arguments it's made with, e.g. the limits
+# of LoopUnroll and LoopUnswitch; the passes not in it are made with their defaults
+def pipelineFor(level: int, options: Optional[dict[str, dict]] = None) -> list[Pass]:
+    if level <= 0:
+        return []
+    if level == 1:
+        return cleanup()
+    options = options or {}
+    loops = [
+        create(name, **options.get(name, {})) for name in ("looprotate", "licm", "unswitch", "indvars", "unroll")
+    ]
+    late = [create(name) for name in ("ranges", "gvn", "pre", "egraph")]
+    # the clean-ups run before inlining too, so that the sizes of the callees are their final ones
+    early: list[Pass] = [
+        create("tailrec"),
+        FixedPoint(cleanup("sccp"), MAX_ROUNDS),
+        create("inline"),
+        FixedPoint(cleanup("sccp"), MAX_ROUNDS),
+    ]
+    return early + loops + late + cleanup("sccp")
+
+
+def buildPassManager(
+    level: int,
+    passes: Optional[list[str]] = None,
+    stats: Optional[TextIO] = None,
+    options: Optional[dict[str, dict]] = None,
+) -> PassManager:
+    if passes is None:
+        return PassManager(pipelineFor(level, options), stats)
+    unknown = [name for name in passes if name not in PASSES]
+    if unknown:
+        raise ValueError("unknown pass: " + ", ".join(unknown))
+    # the back end only takes normal TAC, so leave SSA form at the end if the list doesn't
+    if "ssa" in passes:
+        lastEnter = len(passes) - 1 - passes[::-1].index("ssa")
+        if "outofssa" not in passes[lastEnter:]:
+            passes = passes + ["outofssa"]
+    options = options or {}
+    return PassManager([create(name, **options.get(name, {})) for name in passes], stats)
@@ -0,0 +1,219 @@
+from typing import Hashable, Optional
+
+from backend.dataflow.basicblock import BasicBlock
+from backend.dataflow.cfg import CFG
+from backend.dataflow.loc import Loc
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.temp import Temp
+
+from .analysis import CFGAnalysis, insertOnEdges
+from .lvn import expressionKey
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import inSSA
+
+"""
+PRE: partial redundancy elimination, by lazy code motion
+
+An expression is partially redundant when it's computed again on some of the paths where
+its value is already known, like `a * b` computed in one arm of an `if` and again after
+the join. Lazy code motion (Knoop, Rüthing and Steffen; the edge-based form of Drechsler
+and Stadel) inserts the expression on the edges where that makes it available on every
+path to such a computation, which then goes away. Nothing is inserted on a path that
+didn't compute the expression anyway, so no path gets longer, and the insertions are
+as late as possible, so that the values don't live longer than they need to.
+
+The expressions are lexical: an operation on some temps (the keys of LocalValueNumbering,
+with the temps themselves in place of value numbers). Only the operations dearer than
+keeping a value across blocks (see analysis.py) are moved: mul, div and rem; the others
+are as cheap to compute again.
+Each block gets, as bit vectors over the expressions (ints):
+   used: computed before any of its operands is written in the block (upward exposed)
+   made: computed, and none of its operands written after that (downward exposed)
+ killed: some operand written in the block
+and the data flow goes: available and anticipated on the blocks, then earliest and later
+on the edges, giving where to insert (on an edge) and what to delete (in a block).
+Every expression that moves gets a temp of its own: what's inserted computes into it,
+every computation of it that stays and is downward exposed copies its result into it,
+and a deleted one becomes a copy from it. The copies nobody reads are left to
+DeadCodeElim, the others to CopyProp.
+
+The code is put on the edges by insertOnEdges (see analysis.py). Functions in SSA form,
+or whose entry block can be jumped back to (nowhere to put what the entry edge needs),
+are left alone.
+"""
+
+
+# the operations worth keeping the value of across blocks
+COSTLY = {TacBinaryOp.MUL, TacBinaryOp.DIV, TacBinaryOp.REM, TacBinaryOp.DIVU, TacBinaryOp.REMU}
+
+
+class PRE(FunctionPass):
+    name = "pre"
+
+    def __init__(self) -> None:
+        self.deleted = 0
+
+    def summary(self) -> str:
+        return "%d redundant" % self.deleted
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        self.deleted = 0
+        cfg: CFG = am.get(CFGAnalysis, func)
+        if inSSA(func) or len(cfg) == 0 or cfg.getInDegree(0) > 0:
+            return False
+
+        # expression key -> its bit, and an instance of it, for the insertions
+        bits: dict[Hashable, int] = {}
+        samples: list[TACInstr] = []
+        # temp index -> the expressions reading it
+        readers: dict[int, int] = {}
+        for bb in cfg.nodes:
+            for loc in bb.locs:
+                key = self.keyOf(loc.instr)
+                if key is not None and key not in bits:
+                    bits[key] = 1 << len(samples)
+                    samples.append(loc.instr)
+                    for index in loc.instr.getRead():
+                        readers[index] = readers.get(index, 0) | bits[key]
+        if not samples:
+            return False
+        everything = (1 << len(samples)) - 1
+
+        n = len(cfg)
+        used, made, killed = [0] * n, [0] * n, [0] * n
+        for bb in cfg.nodes:
+            b = bb.id
+            for loc in bb.locs:
+                key = self.keyOf(loc.instr)
+                if key is not None:
+                    used[b] |= bits[key] & ~killed[b]
+                    made[b] |= bits[key]
+                for index in loc.instr.getWritten():
+                    killed[b] |= readers.get(index, 0)
+                    made[b] &= ~readers.get(index, 0)
+
+        order = cfg.getReversePostorder()
+        availOut = [everything] * n
+        availOut[0] = made[0]
+        changed = True
+        while changed:
+            changed = False
+            for b in order[1:]:
+                availIn = everything
+                for p in cfg.getPrev(b):
+                    availIn &= availOut[p]
+                new = made[b] | (availIn & ~killed[b])
+                if new != availOut[b]:
+                    availOut[b] = new
+                    changed = True
+
+        antIn = [everything] * n
+        changed = True
+        while changed:
+            changed = False
+            for b in reversed(order):
+                antOut = everything
+                for s in cfg.getSucc(b):
+                    antOut &= antIn[s]
+                if cfg.getOutDegree(b) == 0:
+                    antOut = 0
+                new = used[b] | (antOut & ~killed[b])
+                if new != antIn[b]:
+                    antIn[b] = new
+                    changed = True
+
+        def antOutOf(b: int) -> int:
+            if cfg.getOutDegree(b) == 0:
+                return 0
+            result = everything
+            for s in cfg.getSucc(b):
+                result &= antIn[s]
+            return result
+
+        earliest: dict[tuple[int, int], int] = {}
+        for b in order:
+            for s in cfg.getSucc(b):
+                if b == 0:
+                    earliest[(b, s)] = antIn[s] & ~availOut[b]
+                else:
+                    earliest[(b, s)] = antIn[s] & ~availOut[b] & (killed[b] | ~antOutOf(b))
+
+        laterIn = [everything] * n
+        laterIn[0] = 0
+        later: dict[tuple[int, int], int] = {}
+        changed = True
+        while changed:
+            changed = False
+            for b in order:
+                for s in cfg.getSucc(b):
+                    later[(b, s)] = earliest[(b, s)] | (laterIn[b] & ~used[b])
+            for b in order[1:]:
+                new = everything
+                for p in cfg.getPrev(b):
+                    # an unreachable predecessor doesn't count
+                    new &= later.get((p, b), everything)
+                if new != laterIn[b]:
+                    laterIn[b] = new
+                    changed = True
+
+        delete = [0] * n
+        for b in order[1:]:
+            delete[b] = used[b] & ~laterIn[b]
+        moved = 0
+        for mask in delete:
+            moved |= mask
+        if not moved:
+            return False
+        insert = {edge: mask & moved & ~laterIn[edge[1]] for edge, mask in later.items()}
+
+        holders = {bit: func.freshTemp() for bit in self.bitsOf(moved)}
+        for bb in cfg.nodes:
+            self.rewrite(bb, bits, readers, holders, delete[bb.id])
+
+        edges: dict[tuple[int, int], list[Loc]] = {}
+        for edge, mask in insert.items():
+            computations = edges[edge] = []
+            for bit in self.bitsOf(mask):
+                instr = samples[bit.bit_length() - 1].clone()
+                instr.dsts = [holders[bit]]
+                computations.append(Loc(instr))
+        insertOnEdges(func, cfg, edges)
+        return True
+
+    def keyOf(self, instr: TACInstr) -> Optional[Hashable]:
+        if not (isinstance(instr, Binary) and instr.op in COSTLY):
+            return None
+        return expressionKey(instr, lambda temp: temp.index)
+
+    def bitsOf(self, mask: int) -> list[int]:
+        return [1 << i for i in range(mask.bit_length()) if mask >> i & 1]
+
+    # delete the upward exposed computations in `delete`, and save the downward exposed
+    # ones of the moved expressions into their temps
+    def rewrite(
+        self, bb: BasicBlock, bits: dict[Hashable, int], readers: dict[int, int], holders: dict[int, Temp], delete: int
+    ) -> None:
+        killed = 0
+        locs: list[Loc] = []
+        # bit -> the position in locs of the last computation of it, while downward exposed
+        last: dict[int, int] = {}
+        for loc in bb.locs:
+            instr = loc.instr
+            key = self.keyOf(instr)
+            bit = bits[key] if key is not None else 0
+            if bit in holders:
+                if bit & delete & ~killed:
+                    loc = Loc(Assign(instr.dst, holders[bit]))
+                    self.deleted += 1
+                last[bit] = len(locs)
+            locs.append(loc)
+            for index in instr.getWritten():
+                killed |= readers.get(index, 0)
+                for other in self.bitsOf(readers.get(index, 0)):
+                    last.pop(other, None)
+        for bit, i in sorted(last.items(), key=lambda item: -item[1]):
+            instr = locs[i].instr
+            if not (isinstance(instr, Assign) and instr.src is holders[bit]):
+                locs.insert(i + 1, Loc(Assign(holders[bit], instr.dst)))
+        bb.locs = locs
@@ -0,0 +1,581 @@
+import heapq
+from typing import Optional
+
+from backend.dataflow.cfg import CFG
+from backend.dataflow.loc import Loc
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.temp import Temp
+
+from .analysis import LivenessAnalysis, writeBack
+from .constfold import INT_MIN
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import inSSA
+
+"""
+RangeSimplify: simplifications from the ranges of the values (intervals and known bits)
+
+Range: what is known of a 32-bit value -- an interval [lo, hi] (signed) and the bits known
+to be 0 or 1. The two are kept consistent: a value in [0, 5] has its high bits 0, and one
+whose low two bits are 0 and that lies in [-3, 3] is 0. The operations follow the machine:
+a sum that may overflow gives nothing on its interval (but still its low bits).
+
+The ranges are computed by a forward data flow over the CFG. What a block knows is a map
+from temps to their ranges (a temp that isn't there can hold anything), and each edge
+out of a block gets its own copy, refined by the branch taken on it: on the way into
+`if (i < n)`, i < n, and so is what made the condition (the comparison, both sides of a
+true `&&`, ...) as long as its operands haven't been written since. An edge found
+impossible this way is never taken. At a loop header the ranges that keep growing are
+widened, to the next of the constants in the function (or one off) and at last to the
+whole range, so that a counter compared with 100 settles at [0, 99] in its loop. Two
+more rounds over the blocks, without widening, then narrow what went too far.
+
+What the ranges are used for:
+1. a computation whose result is known becomes a load of it (comparisons decided by
+   earlier guards, like `i < 200` in a loop up to 100),
+2. a conditional branch that only goes one way becomes a jump or goes away, and the
+   blocks no longer reached are deleted,
+3. snez of a value that is already 0 or 1 becomes a copy,
+4. x % d with |x| < |d| is x, and a division or remainder of a value known not to be
+   negative by a positive one is done unsigned (DIVU / REMU), which the back end does in
+   fewer instructions (x / 4 is a shift, x % 8 a mask).
+Functions in SSA form are left alone.
+"""
+
+INT_MAX = 0x7FFF_FFFF
+MASK = 0xFFFF_FFFF
+SIGN = 0x8000_0000
+
+# the times the ranges at a loop header may grow before the ones still growing are dropped
+MAX_VISITS = 24
+# the rounds over the whole function after the widening
+NARROWING_ROUNDS = 2
+
+
+def toInt32(value: int) -> int:
+    value &= MASK
+    return value - (1 << 32) if value & SIGN else value
+
+
+# the bits 0 .. k - 1, for the k lowest bits known in `known`
+def lowRun(known: int) -> int:
+    return (~known & (known + 1)) - 1 & MASK
+
+
+class Range:
+    """
+    lo <= value <= hi, and the bits in `zeros` / `ones` are 0 / 1 in it.
+    """
+
+    __slots__ = ("lo", "hi", "zeros", "ones")
+
+    def __init__(self, lo: int, hi: int, zeros: int = 0, ones: int = 0) -> None:
+        self.lo, self.hi, self.zeros, self.ones = lo, hi, zeros & MASK, ones & MASK
+        self.tighten()
+
+    @staticmethod
+    def const(value: int) -> "Range":
+        return Range(value, value)
+
+    def tighten(self) -> None:
+        if self.isEmpty():
+            return
+        if self.lo == self.hi:
+            self.zeros, self.ones = ~self.lo & MASK, self.lo & MASK
+            return
+        # the interval gives the high bits
+        if self.lo >= 0:
+            self.zeros |= MASK & ~((1 << self.hi.bit_length()) - 1)
+        elif self.hi < 0:
+            self.ones |= MASK & ~((1 << (~self.lo).bit_length()) - 1)
+        # the bits give the bounds: the sign bit set if it can be, then the others
+        least = toInt32(self.ones | (0 if self.zeros & SIGN else SIGN))
+        most = toInt32(~self.zeros & (MASK if self.ones & SIGN else INT_MAX))
+        self.lo, self.hi = max(self.lo, least), min(self.hi, most)
+        # and the low bits known to be 0 round them to a multiple
+        step = 1 << (lowRun(self.zeros | self.ones) & self.zeros).bit_length()
+        if step > 1 and lowRun(self.zeros | self.ones) & self.ones == 0:
+            self.lo, self.hi = -(-self.lo // step) * step, self.hi // step * step
+        if self.lo == self.hi:
+            self.zeros, self.ones = ~self.lo & MASK, self.lo & MASK
+
+    def isEmpty(self) -> bool:
+        return self.lo > self.hi or self.zeros & self.ones != 0
+
+    def isConst(self) -> bool:
+        return self.lo == self.hi
+
+    def isBoolean(self) -> bool:
+        return 0 <= self.lo and self.hi <= 1
+
+    # True if it can't be 0, False if it can only be 0, None if it may or may not be
+    def truth(self) -> Optional[bool]:
+        if self.lo > 0 or self.hi < 0 or self.ones:
+            return True
+        if self.lo == self.hi == 0:
+            return False
+        return None
+
+    def join(self, other: "Range") -> "Range":
+        return Range(
+            min(self.lo, other.lo), max(self.hi, other.hi), self.zeros & other.zeros, self.ones & other.ones
+        )
+
+    def meet(self, other: "Range") -> "Range":
+        return Range(max(self.lo, other.lo), min(self.hi, other.hi), self.zeros | other.zeros, self.ones | other.ones)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Range) and (self.lo, self.hi, self.zeros, self.ones) == (
+            other.lo,
+            other.hi,
+            other.zeros,
+            other.ones,
+        )
+
+    def __repr__(self) -> str:
+        return "[%d, %d]" % (self.lo, self.hi)
+
+
+FULL = Range(INT_MIN, INT_MAX)
+BOOLEAN = Range(0, 1)
+
+# a < b is b > a, ...
+SWAPPED = {
+    TacBinaryOp.SLT: TacBinaryOp.SGT,
+    TacBinaryOp.SGT: TacBinaryOp.SLT,
+    TacBinaryOp.LEQ: TacBinaryOp.GEQ,
+    TacBinaryOp.GEQ: TacBinaryOp.LEQ,
+    TacBinaryOp.EQU: TacBinaryOp.EQU,
+    TacBinaryOp.NEQ: TacBinaryOp.NEQ,
+}
+# a < b is false when a >= b, ...
+NEGATED = {
+    TacBinaryOp.SLT: TacBinaryOp.GEQ,
+    TacBinaryOp.GEQ: TacBinaryOp.SLT,
+    TacBinaryOp.LEQ: TacBinaryOp.SGT,
+    TacBinaryOp.SGT: TacBinaryOp.LEQ,
+    TacBinaryOp.EQU: TacBinaryOp.NEQ,
+    TacBinaryOp.NEQ: TacBinaryOp.EQU,
+}
+
+
+def interval(lo: int, hi: int) -> Range:
+    return Range(lo, hi) if INT_MIN <= lo and hi <= INT_MAX else FULL
+
+
+def trailingZeros(r: Range) -> int:
+    return (lowRun(r.zeros | r.ones) & r.zeros & ~r.ones).bit_length() if r.ones & lowRun(r.zeros | r.ones) == 0 else 0
+
+
+# a + b (or a - b): the interval if it can't overflow, and the low bits known in both
+def addRange(a: Range, b: Range, sign: int) -> Range:
+    result = interval(a.lo + b.lo, a.hi + b.hi) if sign > 0 else interval(a.lo - b.hi, a.hi - b.lo)
+    run = lowRun(a.zeros | a.ones) & lowRun(b.zeros | b.ones)
+    low = (a.ones + sign * b.ones) & run
+    return Range(result.lo, result.hi, ~low & run, low)
+
+
+def mulRange(a: Range, b: Range) -> Range:
+    corners = [x * y for x in (a.lo, a.hi) for y in (b.lo, b.hi)]
+    result = interval(min(corners), max(corners))
+    run = lowRun(a.zeros | a.ones) & lowRun(b.zeros | b.ones)
+    low = (a.ones * b.ones) & run
+    zeros = (1 << min(32, trailingZeros(a) + trailingZeros(b))) - 1
+    return Range(result.lo, result.hi, (~low & run) | zeros, low & ~zeros)
+
+
+def truncDiv(x: int, y: int) -> int:
+    quotient = abs(x) // abs(y)
+    return quotient if (x < 0) == (y < 0) else -quotient
+
+
+def divRange(a: Range, b: Range) -> Range:
+    if b.lo > 0 or b.hi < 0:
+        if a.lo == INT_MIN and b.lo <= -1 <= b.hi:
+            return FULL
+        corners = [truncDiv(x, y) for x in (a.lo, a.hi) for y in (b.lo, b.hi)]
+        return Range(min(corners), max(corners))
+    # / 0 gives -1, and the others are no bigger than a
+    if a.lo == INT_MIN:
+        return FULL
+    most = max(-a.lo, a.hi)
+    return Range(min(-most, -1), max(most, -1))
+
+
+def remRange(a: Range, b: Range) -> Range:
+    # what's left has the sign of a and is no bigger than it (% 0 gives a)
+    result = Range(min(a.lo, 0), max(a.hi, 0))
+    if b.lo > 0 or b.hi < 0:
+        most = max(-b.lo, b.hi) - 1
+        result = result.meet(Range(-most, most))
+    if b.isConst() and b.lo != 0 and abs(b.lo) & (abs(b.lo) - 1) == 0:
+        # a - a / 2^k * 2^k: the low k bits are those of a
+        low = abs(b.lo) - 1
+        result = result.meet(Range(INT_MIN, INT_MAX, a.zeros & low, a.ones & low))
+    return result
+
+
+def compareRange(op: TacBinaryOp, a: Range, b: Range) -> Range:
+    if op in (TacBinaryOp.SGT, TacBinaryOp.GEQ):
+        op, a, b = SWAPPED[op], b, a
+    if op == TacBinaryOp.SLT:
+        decided = True if a.hi < b.lo else False if a.lo >= b.hi else None
+    elif op == TacBinaryOp.LEQ:
+        decided = True if a.hi <= b.lo else False if a.lo > b.hi else None
+    else:
+        apart = a.hi < b.lo or b.hi < a.lo or (a.zeros & b.ones) or (a.ones & b.zeros)
+        same = a.isConst() and a == b
+        decided = False if apart else True if same else None
+        if decided is not None and op == TacBinaryOp.NEQ:
+            decided = not decided
+    return BOOLEAN if decided is None else Range.const(int(decided))
+
+
+def binaryRange(op: TacBinaryOp, a: Range, b: Range) -> Range:
+    if op == TacBinaryOp.ADD:
+        return addRange(a, b, 1)
+    if op == TacBinaryOp.SUB:
+        return addRange(a, b, -1)
+    if op == TacBinaryOp.MUL:
+        return mulRange(a, b)
+    if op in (TacBinaryOp.DIV, TacBinaryOp.DIVU):
+        if op == TacBinaryOp.DIVU and not (a.lo >= 0 and b.lo > 0):
+            return FULL
+        return divRange(a, b)
+    if op == TacBinaryOp.REM:
+        return remRange(a, b)
+    if op == TacBinaryOp.REMU:
+        if a.lo >= 0 and b.lo > 0:
+            return remRange(a, b)
+        return Range(0, b.hi - 1) if b.lo > 0 else FULL
+    if op in (TacBinaryOp.AND, TacBinaryOp.OR):
+        x, y = a.truth(), b.truth()
+        if op == TacBinaryOp.AND:
+            decided = False if x is False or y is False else True if x and y else None
+        else:
+            decided = True if x or y else False if x is False and y is False else None
+        return BOOLEAN if decided is None else Range.const(int(decided))
+    return compareRange(op, a, b)
+
+
+def unaryRange(op: TacUnaryOp, a: Range) -> Range:
+    if op == TacUnaryOp.NEG:
+        if a.lo == INT_MIN:
+            zeros = (1 << trailingZeros(a)) - 1
+            return Range(INT_MIN, INT_MAX, zeros)
+        return Range(-a.hi, -a.lo, (1 << trailingZeros(a)) - 1)
+    if op == TacUnaryOp.NOT:
+        return Range(~a.hi, ~a.lo, a.ones, a.zeros)
+    truth = a.truth()
+    if truth is None:
+        return BOOLEAN
+    return Range.const(int(truth if op == TacUnaryOp.SNEZ else not truth))
+
+
+# temp index -> its range, for the temps something is known of
+Ranges = dict[int, Range]
+
+
+def joinRanges(a: Ranges, b: Ranges) -> Ranges:
+    return {index: r.join(b[index]) for index, r in a.items() if index in b}
+
+
+class RangeSimplify(FunctionPass):
+    name = "ranges"
+
+    def __init__(self) -> None:
+        self.simplified = 0
+
+    def summary(self) -> str:
+        return "%d simplified" % self.simplified
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        self.simplified = 0
+        cfg: CFG = am.get(LivenessAnalysis, func)
+        if inSSA(func) or len(cfg) == 0:
+            return False
+        self.cfg = cfg
+        self.thresholds = self.findThresholds(cfg)
+        self.blockOf = {bb.label: bb.id for bb in cfg.nodes if bb.label is not None}
+        edges = self.analyze()
+
+        changed = False
+        reached = [False] * len(cfg)
+        for bb in cfg.nodes:
+            ranges = self.rangesAtStart(bb.id, edges)
+            if ranges is not None:
+                reached[bb.id] = True
+                changed = self.simplify(bb, ranges, edges) or changed
+        if not all(reached):
+            cfg.nodes = [bb for bb in cfg.nodes if reached[bb.id]]
+            changed = True
+        if changed:
+            writeBack(func, cfg)
+        return changed
+
+    # the constants of the function, and one off them: where a growing range is likely
+    # to stop (a counter compared with n, a value taken % n)
+    def findThresholds(self, cfg: CFG) -> list[int]:
+        values = {INT_MIN, INT_MIN + 1, INT_MAX - 1, INT_MAX}
+        for bb in cfg.nodes:
+            for loc in bb.locs:
+                if isinstance(loc.instr, LoadImm4):
+                    value = loc.instr.value
+                    values.update(v for v in (value - 1, value, value + 1) if INT_MIN <= v <= INT_MAX)
+        return sorted(values)
+
+    def widen(self, old: Range, new: Range) -> Range:
+        lo, hi = old.lo, old.hi
+        if new.lo < lo:
+            lo = max(t for t in self.thresholds if t <= new.lo)
+        if new.hi > hi:
+            hi = min(t for t in self.thresholds if t >= new.hi)
+        zeros, ones = old.zeros & new.zeros, old.ones & new.ones
+        if (lo, hi) != (old.lo, old.hi):
+            # keep only the low bits: the high ones follow the interval, and would hold
+            # it back (to 2^k - 1, one bit at a time)
+            run = lowRun(zeros | ones)
+            zeros, ones = zeros & run, ones & run
+        return Range(lo, hi, zeros, ones)
+
+    # (block, successor) -> the ranges on that edge; None if it's never taken
+    def analyze(self) -> dict[tuple[int, int], Optional[Ranges]]:
+        cfg = self.cfg
+        order = cfg.getReversePostorder()
+        position = {b: i for i, b in enumerate(order)}
+        headers = {b for b in order if any(position.get(p, -1) >= position[b] for p in cfg.getPrev(b))}
+
+        edges: dict[tuple[int, int], Optional[Ranges]] = {}
+        atStart: dict[int, Ranges] = {}
+        visits: dict[int, int] = {}
+        work = [(0, 0)]
+        queued = {0}
+        while work:
+            _, b = heapq.heappop(work)
+            queued.discard(b)
+            ranges = self.rangesAtStart(b, edges)
+            if ranges is None:
+                # every edge into it was found never taken (for now)
+                continue
+            if b in headers and b in atStart:
+                old = atStart[b]
+                if visits[b] > MAX_VISITS:
+                    ranges = {index: r for index, r in ranges.items() if index in old and old[index] == r}
+                else:
+                    ranges = {index: self.widen(old[index], r) for index, r in ranges.items() if index in old}
+                if ranges == old:
+                    continue
+            visits[b] = visits.get(b, 0) + 1
+            atStart[b] = dict(ranges)
+
+            for loc in cfg.getBlock(b).locs:
+                self.step(loc.instr, ranges)
+            for s, out in self.outgoing(b, ranges).items():
+                if (b, s) not in edges or edges[(b, s)] != out:
+                    edges[(b, s)] = out
+                    if s not in queued:
+                        queued.add(s)
+                        heapq.heappush(work, (position[s], s))
+
+        # what widening gave away, going round again without it wins some of it back
+        for _ in range(NARROWING_ROUNDS):
+            for b in order:
+                ranges = self.rangesAtStart(b, edges)
+                if ranges is None:
+                    continue
+                for loc in cfg.getBlock(b).locs:
+                    self.step(loc.instr, ranges)
+                edges.update(((b, s), out) for s, out in self.outgoing(b, ranges).items())
+        return edges
+
+    # the join of the ranges on the edges into b that can be taken; None if there's none
+    def rangesAtStart(self, b: int, edges: dict[tuple[int, int], Optional[Ranges]]) -> Optional[Ranges]:
+        if b == 0:
+            # nothing is known of the arguments, or of what's read before being written
+            return {}
+        result: Optional[Ranges] = None
+        for p in self.cfg.getPrev(b):
+            ranges = edges.get((p, b))
+            if ranges is not None:
+                result = dict(ranges) if result is None else joinRanges(result, ranges)
+        return result
+
+    def rangeOf(self, temp: Temp, ranges: Ranges) -> Range:
+        return ranges.get(temp.index, FULL)
+
+    def valueOf(self, instr: TACInstr, ranges: Ranges) -> Optional[Range]:
+        if isinstance(instr, LoadImm4):
+            return Range.const(instr.value)
+        if isinstance(instr, Assign):
+            return ranges.get(instr.src.index)
+        if isinstance(instr, Unary):
+            return unaryRange(instr.op, self.rangeOf(instr.operand, ranges))
+        if isinstance(instr, Binary):
+            return binaryRange(instr.op, self.rangeOf(instr.lhs, ranges), self.rangeOf(instr.rhs, ranges))
+        return None
+
+    def step(self, instr: TACInstr, ranges: Ranges) -> None:
+        value = self.valueOf(instr, ranges)
+        for index in instr.getWritten():
+            ranges.pop(index, None)
+        if value is not None and value != FULL:
+            ranges[instr.dst.index] = value
+
+    # the ranges on each edge out of b, given the ranges at its end
+    def outgoing(self, b: int, ranges: Ranges) -> dict[int, Optional[Ranges]]:
+        bb = self.cfg.getBlock(b)
+        succs = self.cfg.getSucc(b)
+        last = bb.locs[-1].instr if bb.locs else None
+        if not isinstance(last, CondBranch) or len(succs) < 2:
+            return {s: self.liveAt(s, ranges) for s in succs}
+        target = self.blockOf[last.target]
+        definitions = self.definitions(bb)
+        result: dict[int, Optional[Ranges]] = {}
+        for s in succs:
+            taken = s == target
+            # the condition is nonzero on the way to the target of a bne, and to the other side of a beq
+            truth = taken == (last.op == CondBranchOp.BNE)
+            refined = dict(ranges)
+            result[s] = self.liveAt(s, refined) if self.assume(last.cond, truth, refined, definitions, 4) else None
+        if all(out is None for out in result.values()):
+            # only in code that can't run: take both ways rather than neither
+            return {s: self.liveAt(s, ranges) for s in succs}
+        return result
+
+    # the ranges of the temps live at the start of s (what the others hold doesn't matter)
+    def liveAt(self, s: int, ranges: Ranges) -> Ranges:
+        live = self.cfg.getBlock(s).liveIn
+        return {index: r for index, r in ranges.items() if index in live}
+
+    # temp index -> the instruction of bb that last writes it, if what it reads is the same
+    # at the end of bb
+    def definitions(self, bb) -> dict[int, TACInstr]:
+        result: dict[int, TACInstr] = {}
+        for loc in bb.locs:
+            instr = loc.instr
+            for index in instr.getWritten():
+                result.pop(index, None)
+                for other in [t for t, definition in result.items() if index in definition.getRead()]:
+                    del result[other]
+            if isinstance(instr, (Assign, Unary, Binary)) and instr.dst.index not in instr.getRead():
+                result[instr.dst.index] = instr
+        return result
+
+    def restrict(self, temp: Temp, r: Range, ranges: Ranges) -> bool:
+        r = self.rangeOf(temp, ranges).meet(r)
+        if r.isEmpty():
+            return False
+        if r != FULL:
+            ranges[temp.index] = r
+        return True
+
+    # refine the ranges with `temp` being nonzero (truth) or zero; False if it can't be
+    def assume(self, temp: Temp, truth: bool, ranges: Ranges, definitions: dict[int, TACInstr], depth: int) -> bool:
+        r = self.rangeOf(temp, ranges)
+        if truth:
+            if r.truth() is False:
+                return False
+            lo, hi = (1 if r.lo == 0 else r.lo), (-1 if r.hi == 0 else r.hi)
+            if not self.restrict(temp, Range(lo, hi), ranges):
+                return False
+        elif r.truth() is True or not self.restrict(temp, Range.const(0), ranges):
+            return False
+
+        definition = definitions.get(temp.index)
+        if depth == 0 or definition is None:
+            return True
+        if isinstance(definition, Assign):
+            return self.assume(definition.src, truth, ranges, definitions, depth - 1)
+        if isinstance(definition, Unary) and definition.op in (TacUnaryOp.SEQZ, TacUnaryOp.SNEZ):
+            same = definition.op == TacUnaryOp.SNEZ
+            return self.assume(definition.operand, truth == same, ranges, definitions, depth - 1)
+        if not isinstance(definition, Binary):
+            return True
+        op, lhs, rhs = definition.op, definition.lhs, definition.rhs
+        if (op == TacBinaryOp.AND and truth) or (op == TacBinaryOp.OR and not truth):
+            return self.assume(lhs, truth, ranges, definitions, depth - 1) and self.assume(
+                rhs, truth, ranges, definitions, depth - 1
+            )
+        if op not in NEGATED:
+            return True
+        return self.relate(op if truth else NEGATED[op], lhs, rhs, ranges)
+
+    # refine the ranges of a and b with `a op b` holding; False if it can't
+    def relate(self, op: TacBinaryOp, a: Temp, b: Temp, ranges: Ranges) -> bool:
+        if op in (TacBinaryOp.SGT, TacBinaryOp.GEQ):
+            op, a, b = SWAPPED[op], b, a
+        x, y = self.rangeOf(a, ranges), self.rangeOf(b, ranges)
+        if op == TacBinaryOp.SLT:
+            if y.hi == INT_MIN or x.lo == INT_MAX:
+                return False
+            return self.restrict(a, Range(INT_MIN, y.hi - 1), ranges) and self.restrict(
+                b, Range(x.lo + 1, INT_MAX), ranges
+            )
+        if op == TacBinaryOp.LEQ:
+            return self.restrict(a, Range(INT_MIN, y.hi), ranges) and self.restrict(b, Range(x.lo, INT_MAX), ranges)
+        if op == TacBinaryOp.EQU:
+            both = x.meet(y)
+            return self.restrict(a, both, ranges) and self.restrict(b, both, ranges)
+        # a != b: only a bound equal to the other side's only value can move
+        for one, other, r in ((a, b, x), (b, a, y)):
+            value = self.rangeOf(other, ranges)
+            if value.isConst():
+                if r.isConst() and r.lo == value.lo:
+                    return False
+                lo, hi = r.lo + (r.lo == value.lo), r.hi - (r.hi == value.lo)
+                if not self.restrict(one, Range(lo, hi), ranges):
+                    return False
+        return True
+
+    # apply what the ranges say to the instructions of bb
+    def simplify(self, bb, ranges: Ranges, edges: dict[tuple[int, int], Optional[Ranges]]) -> bool:
+        changed = False
+        locs: list[Loc] = []
+        for loc in bb.locs:
+            instr = loc.instr
+            simpler = self.simpler(instr, ranges)
+            if isinstance(instr, CondBranch):
+                simpler = self.branch(bb.id, instr, edges)
+            self.step(instr, ranges)
+            if simpler is not instr:
+                self.simplified += 1
+                changed = True
+                if simpler is None:
+                    continue
+                loc.instr = simpler
+            locs.append(loc)
+        bb.locs = locs
+        return changed
+
+    # the simpler form of instr, given the ranges of what it reads (itself if there's none)
+    def simpler(self, instr: TACInstr, ranges: Ranges) -> TACInstr:
+        if not isinstance(instr, (Assign, Unary, Binary)):
+            return instr
+        value = self.valueOf(instr, ranges)
+        if value is not None and value.isConst():
+            return LoadImm4(instr.dst, value.lo)
+        if isinstance(instr, Unary) and instr.op == TacUnaryOp.SNEZ:
+            if self.rangeOf(instr.operand, ranges).isBoolean():
+                return Assign(instr.dst, instr.operand)
+        if isinstance(instr, Binary) and instr.op in (TacBinaryOp.DIV, TacBinaryOp.REM):
+            x, d = self.rangeOf(instr.lhs, ranges), self.rangeOf(instr.rhs, ranges)
+            smallest = min(abs(d.lo), abs(d.hi)) if d.lo > 0 or d.hi < 0 else 0
+            if instr.op == TacBinaryOp.REM and max(-x.lo, x.hi) < smallest:
+                return Assign(instr.dst, instr.lhs)
+            if x.lo >= 0 and d.lo > 0:
+                op = TacBinaryOp.DIVU if instr.op == TacBinaryOp.DIV else TacBinaryOp.REMU
+                return Binary(op, instr.dst, instr.lhs, instr.rhs)
+        return instr
+
+    # a branch that only goes one way: a jump if it's always taken, None if never
+    def branch(self, b: int, instr: CondBranch, edges: dict[tuple[int, int], Optional[Ranges]]) -> Optional[TACInstr]:
+        target = self.blockOf[instr.target]
+        succs = self.cfg.getSucc(b)
+        if len(succs) < 2:
+            return instr
+        other = next(s for s in succs if s != target)
+        if edges.get((b, target)) is None and edges.get((b, other)) is not None:
+            return None
+        if edges.get((b, other)) is None and edges.get((b, target)) is not None:
+            return Branch(instr.target)
+        return instr
@@ -0,0 +1,178 @@
+from typing import Optional
+
+from backend.dataflow.cfg import CFG
+from utils.label.label import Label
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+from .analysis import CFGAnalysis, writeBack
+from .constfold import branchTaken, foldBinary, foldUnary
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import inSSA, isPhi
+
+"""
+SCCP: conditional constant propagation (Wegman and Zadeck)
+
+ConstFold only knows the constants loaded in the same block. This propagates them over
+the whole function, optimistically: a block isn't looked at until some edge into it is
+known to be executable, and a conditional branch on a known constant makes only one of
+its edges executable. So `x = 5; if (x > 3) ... else ...` never reaches the else branch,
+and a value that a loop only ever sets to the same constant stays that constant, where a
+pessimistic propagation would give up at the loop header (whose back edge it hasn't seen).
+
+Temps are not in SSA form in general, so what's known is kept per block rather than per
+temp: the constants the temps hold at the end of it (a temp that isn't there can hold
+anything; a block not reached yet has nothing at all). The start of a block knows what
+the ends of all its executable predecessors agree on. Blocks and edges are worked on
+until nothing changes: the known constants only go away, and the edges only become
+executable, so that ends. A phi (in SSA form) takes the values of its executable edges.
+
+Then the operations with a known result become loads of it, the branches on known
+conditions become jumps (or go away), and the blocks that were never reached are
+deleted. In SSA form the branches and the blocks stay, as in ConstFold, since the phis
+name the predecessors.
+"""
+
+# temp index -> the constant it holds
+Known = dict[int, int]
+
+
+class SCCP(FunctionPass):
+    name = "sccp"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        cfg: CFG = am.get(CFGAnalysis, func)
+        if len(cfg) == 0:
+            return False
+        ssa = inSSA(func)
+        blockOf: dict[Label, int] = {func.entry: 0}
+        for bb in cfg.nodes:
+            if bb.label is not None:
+                blockOf[bb.label] = bb.id
+
+        # block -> the constants known at its end; None until it's been reached
+        out: list[Optional[Known]] = [None] * len(cfg)
+        executable: set[tuple[int, int]] = set()
+        work = [0]
+        while work:
+            b = work.pop()
+            known = self.knownAtStart(cfg, b, out, executable)
+            for loc in cfg.getBlock(b).locs:
+                self.step(loc.instr, known, blockOf, out, executable, b)
+            changed = out[b] != known
+            out[b] = known
+            for s in self.executableSuccs(cfg, b, known, blockOf):
+                if (b, s) not in executable:
+                    executable.add((b, s))
+                    changed = True
+                if changed and s not in work:
+                    work.append(s)
+
+        changed = False
+        for bb in cfg.nodes:
+            if out[bb.id] is None:
+                continue
+            known = self.knownAtStart(cfg, bb.id, out, executable)
+            locs = []
+            for loc in bb.locs:
+                instr = loc.instr
+                folded = self.fold(instr, known, ssa)
+                self.step(instr, known, blockOf, out, executable, bb.id)
+                if folded is not instr:
+                    changed = True
+                    if folded is None:
+                        continue
+                    loc.instr = folded
+                locs.append(loc)
+            bb.locs = locs
+
+        if not ssa and any(known is None for known in out):
+            cfg.nodes = [bb for bb in cfg.nodes if out[bb.id] is not None]
+            changed = True
+        if changed:
+            writeBack(func, cfg)
+        return changed
+
+    # what the ends of the executable edges into b agree on
+    def knownAtStart(
+        self, cfg: CFG, b: int, out: list[Optional[Known]], executable: set[tuple[int, int]]
+    ) -> Known:
+        if b == 0:
+            # nothing is known of the arguments, or of what's read before being written
+            return {}
+        known: Optional[Known] = None
+        for p in cfg.getPrev(b):
+            if (p, b) not in executable or out[p] is None:
+                continue
+            if known is None:
+                known = dict(out[p])
+            else:
+                known = {index: value for index, value in known.items() if out[p].get(index) == value}
+        return known or {}
+
+    def step(
+        self,
+        instr: TACInstr,
+        known: Known,
+        blockOf: dict[Label, int],
+        out: list[Optional[Known]],
+        executable: set[tuple[int, int]],
+        b: int,
+    ) -> None:
+        value = self.valueOf(instr, known, blockOf, out, executable, b)
+        for index in instr.getWritten():
+            known.pop(index, None)
+        if value is not None:
+            known[instr.dst.index] = value
+
+    # the constant instr writes, if it's known
+    def valueOf(
+        self,
+        instr: TACInstr,
+        known: Known,
+        blockOf: dict[Label, int],
+        out: list[Optional[Known]],
+        executable: set[tuple[int, int]],
+        b: int,
+    ) -> Optional[int]:
+        if isinstance(instr, LoadImm4):
+            return instr.value
+        if isinstance(instr, Assign):
+            return known.get(instr.src.index)
+        if isinstance(instr, Unary) and instr.operand.index in known:
+            return foldUnary(instr.op, known[instr.operand.index])
+        if isinstance(instr, Binary) and instr.lhs.index in known and instr.rhs.index in known:
+            return foldBinary(instr.op, known[instr.lhs.index], known[instr.rhs.index])
+        if isPhi(instr):
+            values = {
+                out[blockOf[label]].get(src.index)
+                for label, src in zip(instr.labels, instr.srcs)
+                if (blockOf[label], b) in executable and out[blockOf[label]] is not None
+            }
+            if len(values) == 1:
+                return values.pop()
+        return None
+
+    # the successors of b that can be reached from it, given what's known at its end
+    def executableSuccs(self, cfg: CFG, b: int, known: Known, blockOf: dict[Label, int]) -> list[int]:
+        succs = sorted(cfg.getSucc(b))
+        locs = cfg.getBlock(b).locs
+        last = locs[-1].instr if locs else None
+        if len(succs) < 2 or not isinstance(last, CondBranch) or last.cond.index not in known:
+            return succs
+        target = blockOf[last.target]
+        if branchTaken(last.op, known[last.cond.index]):
+            return [target]
+        return [s for s in succs if s != target]
+
+    # the folded form of `instr` (itself if nothing can be done, None to drop it)
+    def fold(self, instr: TACInstr, known: Known, ssa: bool) -> Optional[TACInstr]:
+        if isinstance(instr, CondBranch):
+            if ssa or instr.cond.index not in known:
+                return instr
+            return Branch(instr.target) if branchTaken(instr.op, known[instr.cond.index]) else None
+        if isinstance(instr, (Assign, Unary, Binary)) and not isPhi(instr):
+            value = self.valueOf(instr, known, {}, [], set(), -1)
+            if value is not None:
+                return LoadImm4(instr.dst, value)
+        return instr
@@ -0,0 +1,86 @@
+from backend.dataflow.cfg import CFG
+from utils.label.label import Label
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+from .analysis import CFGAnalysis, linearize
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import inSSA
+
+"""
+SimplifyCFG: clean up the control flow left by TAC generation and other passes
+
+1. blocks that can't be reached from the entry are removed
+2. jumps to a block that only jumps further are redirected to the final target
+3. jumps (and conditional jumps) to the very next block are removed
+4. labels nobody jumps to are dropped, which merges the block into the previous one
+
+Functions in SSA form are left alone, since their phis name the predecessor blocks.
+"""
+
+
+class SimplifyCFG(FunctionPass):
+    name = "simplifycfg"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        if inSSA(func):
+            return False
+        cfg: CFG = am.get(CFGAnalysis, func)
+        blocks = [bb for bb in cfg.nodes if bb.id in cfg.reachable]
+
+        # label -> where a jump to it ends up eventually
+        forward: dict[Label, Label] = {}
+        for bb in blocks:
+            if bb.label is not None and len(bb.locs) == 1 and isinstance(bb.locs[0].instr, Branch):
+                forward[bb.label] = bb.locs[0].instr.target
+
+        def resolve(label: Label) -> Label:
+            seen = set()
+            while label in forward and label not in seen:
+                seen.add(label)
+                label = forward[label]
+            return label
+
+        for bb in blocks:
+            if not bb.locs:
+                continue
+            instr = bb.locs[-1].instr
+            if isinstance(instr, Branch):
+                target = resolve(instr.target)
+                if target is not instr.target:
+                    bb.locs[-1].instr = Branch(target)
+            elif isinstance(instr, CondBranch):
+                target = resolve(instr.target)
+                if target is not instr.target:
+                    bb.locs[-1].instr = CondBranch(instr.op, instr.cond, target)
+
+        for i, bb in enumerate(blocks[:-1]):
+            if bb.locs and isinstance(bb.locs[-1].instr, (Branch, CondBranch)):
+                nextLabel = self.nextLabel(blocks, i)
+                if nextLabel is not None and bb.locs[-1].instr.target is nextLabel:
+                    bb.locs.pop()
+
+        targets = {
+            loc.instr.target
+            for bb in blocks
+            for loc in bb.locs
+            if isinstance(loc.instr, (Branch, CondBranch))
+        }
+        for bb in blocks:
+            if bb.label not in targets:
+                bb.label = None
+
+        seq = linearize(func, blocks)
+        if [str(instr) for instr in seq] == [str(instr) for instr in func.getInstrSeq()]:
+            return False
+        func.instrSeq = seq
+        return True
+
+    # the label the control reaches when falling through the end of blocks[i]
+    def nextLabel(self, blocks, i: int):
+        for bb in blocks[i + 1 :]:
+            if bb.label is not None:
+                return bb.label
+            if bb.locs:
+                return None
+        return None
@@ -0,0 +1,221 @@
+from typing import Callable, Optional
+
+from backend.dataflow.basicblock import BasicBlock
+from backend.dataflow.cfg import CFG
+from backend.dataflow.dominance import DominatorTree
+from backend.dataflow.loc import Loc
+from utils.label.label import Label
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.temp import Temp
+
+from .analysis import CFGAnalysis, DominatorAnalysis, LivenessAnalysis, insertOnEdges, linearize, writeBack
+from .passmanager import AnalysisManager, FunctionPass
+
+"""
+SSA form for TAC functions
+
+SSAConstruct ("ssa") gives every definition its own temp. Phi functions are placed on the
+iterated dominance frontiers of the definitions of a temp, but only where the temp is live
+(pruned SSA), and the temps are renamed by a walk of the dominator tree.
+A temp that is read before any definition (an uninitialized variable) keeps its own name,
+and the arguments of the function are defined on entry by themselves.
+
+SSADestruct ("outofssa") turns phis back into copies on the edges from the predecessors
+(see insertOnEdges in analysis.py). The copies of one edge happen at the same time, so
+they are sequentialized first (a swap needs a temporary).
+
+Phis name their predecessors by label, so the construction labels every block that has
+a predecessor. The entry block can't have one, and is named by the label of the function.
+"""
+
+
+def isPhi(instr: TACInstr) -> bool:
+    return isinstance(instr, Phi)
+
+
+def inSSA(func: TACFunc) -> bool:
+    return any(isPhi(instr) for instr in func.getInstrSeq())
+
+
+def blockLabel(func: TACFunc, bb: BasicBlock) -> Label:
+    return func.entry if bb.id == 0 else bb.label
+
+
+class SSAConstruct(FunctionPass):
+    name = "ssa"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        if inSSA(func):
+            return False
+        if self.prepare(func, am):
+            am.invalidate(func)
+
+        cfg: CFG = am.get(LivenessAnalysis, func)
+        dom: DominatorTree = am.get(DominatorAnalysis, func)
+
+        # temp index -> the blocks that define it
+        defSites: dict[int, set[int]] = {}
+        for b in dom.rpo:
+            for loc in cfg.getBlock(b).locs:
+                for index in loc.instr.getWritten():
+                    defSites.setdefault(index, set()).add(b)
+        for temp in func.tempArgs:
+            defSites.setdefault(temp.index, set()).add(0)
+
+        # block -> the phis placed at its start, and the temp each phi merges
+        phis: dict[int, list[Phi]] = {}
+        phiVar: dict[Phi, int] = {}
+        for index, sites in defSites.items():
+            work = list(sites)
+            placed = set()
+            while work:
+                d = work.pop()
+                for y in dom.frontier[d]:
+                    if y in placed or index not in cfg.getBlock(y).liveIn:
+                        continue
+                    placed.add(y)
+                    preds = [p for p in sorted(cfg.getPrev(y)) if dom.isReachable(p)]
+                    temp = Temp(index)
+                    phi = Phi(temp, [temp] * len(preds), [blockLabel(func, cfg.getBlock(p)) for p in preds])
+                    phis.setdefault(y, []).append(phi)
+                    phiVar[phi] = index
+                    if y not in sites:
+                        work.append(y)
+
+        self.rename(func, cfg, dom, phis, phiVar)
+
+        for b, placed in phis.items():
+            bb = cfg.getBlock(b)
+            bb.locs = [Loc(phi) for phi in placed] + bb.locs
+        # blocks the entry can't reach are dropped: nothing defines their temps any more
+        func.instrSeq = linearize(func, [bb for bb in cfg.nodes if dom.isReachable(bb.id)])
+        return True
+
+    # Give a label to every block that can be reached by falling through. Returns whether it changed anything.
+    def prepare(self, func: TACFunc, am: AnalysisManager) -> bool:
+        cfg: CFG = am.get(CFGAnalysis, func)
+        changed = False
+        for bb in cfg.nodes[1:]:
+            if bb.label is None and cfg.getInDegree(bb.id) > 0:
+                bb.label = func.freshLabel()
+                changed = True
+        if changed:
+            writeBack(func, cfg)
+        return changed
+
+    def rename(
+        self,
+        func: TACFunc,
+        cfg: CFG,
+        dom: DominatorTree,
+        phis: dict[int, list[Phi]],
+        phiVar: dict[Phi, int],
+    ) -> None:
+        # temp index -> the names it has had along the current path of the dominator tree
+        stacks: dict[int, list[Temp]] = {}
+
+        def current(index: int) -> Temp:
+            names = stacks.get(index)
+            return names[-1] if names else Temp(index)
+
+        def define(index: int, pushed: list[int]) -> Temp:
+            temp = func.freshTemp()
+            stacks.setdefault(index, []).append(temp)
+            pushed.append(index)
+            return temp
+
+        # explicit stack: (block, None) to enter it, (block, pushed) to leave it
+        work: list[tuple[int, Optional[list[int]]]] = [(0, None)]
+        while work:
+            b, pushed = work.pop()
+            if pushed is not None:
+                for index in pushed:
+                    stacks[index].pop()
+                continue
+            pushed = []
+            work.append((b, pushed))
+
+            bb = cfg.getBlock(b)
+            for phi in phis.get(b, []):
+                phi.dst = define(phiVar[phi], pushed)
+            for loc in bb.locs:
+                instr = loc.instr
+                instr.srcs = [current(src.index) for src in instr.srcs]
+                instr.dsts = [define(dst.index, pushed) for dst in instr.dsts]
+
+            label = blockLabel(func, bb)
+            for s in cfg.getSucc(b):
+                for phi in phis.get(s, []):
+                    for i, pred in enumerate(phi.labels):
+                        if pred is label:
+                            phi.srcs[i] = current(phiVar[phi])
+
+            for child in reversed(dom.children[b]):
+                work.append((child, None))
+
+
+def sequentialize(copies: list[tuple[Temp, Temp]], fresh: Callable[[], Temp]) -> list[Assign]:
+    """
+    Order parallel copies (dst, src) as a sequence of assignments with the same effect.
+    A copy can go once no pending copy still reads its destination; what is left after that
+    are cycles, and one of them is broken by saving a destination in a fresh temp.
+    """
+    pending: dict[int, Temp] = {}
+    dstOf: dict[int, Temp] = {}
+    for dst, src in copies:
+        if dst.index != src.index:
+            pending[dst.index] = src
+            dstOf[dst.index] = dst
+
+    # how many pending copies read each temp
+    readers: dict[int, int] = {}
+    for src in pending.values():
+        readers[src.index] = readers.get(src.index, 0) + 1
+
+    result: list[Assign] = []
+    ready = [d for d in pending if readers.get(d, 0) == 0]
+    while pending:
+        while ready:
+            d = ready.pop()
+            src = pending.pop(d)
+            result.append(Assign(dstOf[d], src))
+            readers[src.index] -= 1
+            if readers[src.index] == 0 and src.index in pending:
+                ready.append(src.index)
+        if not pending:
+            break
+        d = next(iter(pending))
+        saved = fresh()
+        result.append(Assign(saved, dstOf[d]))
+        for k, src in pending.items():
+            if src.index == d:
+                pending[k] = saved
+        readers[saved.index] = readers.pop(d)
+        ready.append(d)
+    return result
+
+
+class SSADestruct(FunctionPass):
+    name = "outofssa"
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        if not inSSA(func):
+            return False
+        cfg: CFG = am.get(CFGAnalysis, func)
+        blockOf: dict[Label, int] = {func.entry: 0}
+        for bb in cfg.nodes:
+            if bb.label is not None:
+                blockOf[bb.label] = bb.id
+
+        # (pred, succ) -> the copies on that edge
+        copies: dict[tuple[int, int], list[tuple[Temp, Temp]]] = {}
+        for bb in cfg.nodes:
+            while bb.locs and isPhi(bb.locs[0].instr):
+                phi = bb.locs.pop(0).instr
+                for label, src in zip(phi.labels, phi.srcs):
+                    copies.setdefault((blockOf[label], bb.id), []).append((phi.dst, src))
+
+        moves = {edge: [Loc(instr) for instr in sequentialize(pairs, func.freshTemp)] for edge, pairs in copies.items()}
+        insertOnEdges(func, cfg, moves)
+        return True
@@ -0,0 +1,156 @@
+from typing import Optional
+
+from utils.label.label import Label
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+from .passmanager import AnalysisManager, FunctionPass
+from .ssa import inSSA
+
+"""
+TailRecursion: the calls of a function to itself whose result it returns, made a loop
+
+In `return f(n - 1, acc * n)` nothing of the caller is needed once the call is made, so
+instead of a new frame, the call can give the parameters their new values and jump back
+to the start of the function. The recursion becomes a loop, running in constant stack
+space (deep recursion would otherwise overflow the stack), which the loop optimizations
+can then work on, and the function stops being recursive, so the Inliner may take it.
+
+A call is in tail position when what follows it, up to a `return`, only copies its
+result (possibly into other temps, through jumps and labels). The parameters are
+assigned the arguments all at once (through new temps, as an argument may read a
+parameter that another one writes), and the function gets a label of its own after its
+entry, which the calls jump to instead (the entry block stays first, with nothing jumping
+back to it). The copies are left to the clean-ups. Functions in SSA form are left alone.
+
+`return n * f(n - 1)` isn't a tail call, but as * is associative and commutative, an
+accumulator makes it one: with f'(args, acc) = acc * f(args), the call is
+f'(n - 1, acc * n), and every `return v` of f is `return acc * v` in f'. So the result
+may also go through additions (or subtractions of something from it) or multiplications
+on the way to the `return`, all of the same kind (ACCUMULATORS), by values known at the
+time of the call (and constants loaded on the way). The accumulator is a temp set to the
+identity of the operation at the entry, which the calls update before jumping, and which
+every `return` combines its value with. It's a parameter of the loop rather than of the
+function, which keeps its signature for the other callers.
+
+The other tail calls (to another function) are the back end's: see
+RiscvInstrSelector.tailCalls.
+"""
+
+# the operations a result can be accumulated through, and the identity of each
+ACCUMULATORS = {TacBinaryOp.ADD: 0, TacBinaryOp.MUL: 1}
+
+
+class TailRecursion(FunctionPass):
+    name = "tailrec"
+
+    def __init__(self) -> None:
+        self.rewritten = 0
+        self.accumulated = 0
+
+    def summary(self) -> str:
+        return "%d tail calls, %d through an accumulator" % (self.rewritten, self.accumulated)
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        self.rewritten = self.accumulated = 0
+        if inSSA(func):
+            return False
+        seq = func.getInstrSeq()
+        positions = {instr.label: i for i, instr in enumerate(seq) if isinstance(instr, Mark)}
+        # call position -> the operations on its result before it's returned
+        sites: dict[int, list[TACInstr]] = {}
+        op: Optional[TacBinaryOp] = None
+        for i, instr in enumerate(seq):
+            if not (isinstance(instr, Call) and instr.label.name == func.entry.name):
+                continue
+            chain = self.chain(seq, i, positions)
+            kinds = {self.kindOf(other) for other in chain or [] if isinstance(other, Binary)}
+            if chain is None or len(kinds) > 1 or (op is not None and kinds - {op}):
+                continue
+            op = op or next(iter(kinds), None)
+            sites[i] = chain
+        if not sites:
+            return False
+
+        start = func.freshLabel()
+        acc = func.freshTemp() if op is not None else None
+        instrs: list[TACInstr] = []
+        for i, instr in enumerate(seq):
+            if isinstance(instr, Mark) and instr.label is func.entry:
+                instrs.append(instr)
+                if acc is not None:
+                    instrs.append(LoadImm4(acc, ACCUMULATORS[op]))
+                instrs.append(Mark(start))
+            elif isinstance(instr, Return) and acc is not None:
+                instrs += self.combine(func, instr, op, acc)
+            elif i in sites:
+                values = [func.freshTemp() for _ in instr.srcs]
+                instrs += [Assign(value, arg) for value, arg in zip(values, instr.srcs)]
+                for other in sites[i]:
+                    if isinstance(other, LoadImm4):
+                        instrs.append(other.clone())
+                    else:
+                        instrs.append(Binary(other.op, acc, acc, other.srcs[1]))
+                instrs += [Assign(param, value) for param, value in zip(func.tempArgs, values)]
+                instrs.append(Branch(start))
+                self.rewritten += 1
+                self.accumulated += any(isinstance(other, Binary) for other in sites[i])
+            else:
+                instrs.append(instr)
+        func.instrSeq = instrs
+        return True
+
+    # the constants loaded and the operations done (as `result op value`) on the result of the
+    # call at seq[i] until it's returned, None if something else is done first
+    def chain(self, seq: list[TACInstr], i: int, positions: dict[Label, int]) -> Optional[list[TACInstr]]:
+        # the temps holding the result (as it is so far), and the others written since the call
+        holders = {seq[i].dst.index}
+        written: set[int] = set()
+        operations: list[TACInstr] = []
+        seen: set[int] = set()
+        i += 1
+        while i < len(seq) and i not in seen:
+            seen.add(i)
+            instr = seq[i]
+            if isinstance(instr, Return):
+                return operations if instr.value is not None and instr.value.index in holders else None
+            if isinstance(instr, Branch):
+                i = positions[instr.target]
+                continue
+            if isinstance(instr, Assign) and instr.src.index in holders:
+                holders.add(instr.dst.index)
+            elif isinstance(instr, LoadImm4) and instr.dst.index not in holders:
+                written.discard(instr.dst.index)
+                operations.append(instr)
+                i += 1
+                continue
+            elif isinstance(instr, Binary) and instr.op in (*ACCUMULATORS, TacBinaryOp.SUB):
+                lhs, rhs = instr.lhs.index, instr.rhs.index
+                if lhs in holders and rhs not in holders and rhs not in written:
+                    value = instr.rhs
+                elif instr.op != TacBinaryOp.SUB and rhs in holders and lhs not in holders and lhs not in written:
+                    value = instr.lhs
+                else:
+                    return None
+                operations.append(Binary(instr.op, instr.dst, instr.dst, value))
+                holders = {instr.dst.index}
+            elif not isinstance(instr, (Mark, Memo)):
+                return None
+            written.update(instr.getWritten())
+            i += 1
+        return None
+
+    # the accumulating operation a step of a chain stands for
+    def kindOf(self, instr: Binary) -> TacBinaryOp:
+        return TacBinaryOp.ADD if instr.op == TacBinaryOp.SUB else instr.op
+
+    # `return v` as `return acc op v`
+    def combine(self, func: TACFunc, instr: Return, op: TacBinaryOp, acc: Temp) -> list[TACInstr]:
+        instrs: list[TACInstr] = []
+        value = instr.value
+        if value is None:
+            value = func.freshTemp()
+            instrs.append(LoadImm4(value, 0))
+        result = func.freshTemp()
+        instrs += [Binary(op, result, acc, value), Return(result)]
+        return instrs
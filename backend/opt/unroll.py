@@ -0,0 +1,232 @@
+from typing import Optional
+
+from backend.dataflow.basicblock import BasicBlock
+from backend.dataflow.cfg import CFG
+from backend.dataflow.dominance import DominatorTree
+from backend.dataflow.loc import Loc
+from backend.dataflow.loop import Loop, LoopForest
+from utils.label.label import Label
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.temp import Temp
+
+from .constfold import INT_MIN, wrap
+from .induction import INT_MAX, InductionVar, LoopFacts, Operand, findExitTest, findInductionVars
+from .loopsimplify import insertPoint
+from .looppass import LoopPass, copyLoop
+from .passmanager import AnalysisManager
+from .ssa import inSSA
+
+"""
+LoopUnroll: run several iterations of an inner loop per trip
+
+Only rotated loops (see LoopRotate) are unrolled: the blocks of the loop follow each other,
+from the header to the single latch, which ends with the test of an induction variable i
+against an invariant bound n and a branch back to the header. i must be updated exactly
+once per iteration, before the test, by a constant step.
+
+1. Full unrolling: when i starts from a known constant and n is one, the number of
+   iterations is known. If it is at most `maxTrips` and the copies stay within `fullBudget`
+   instructions, the loop is replaced by that many copies of its body, one after the other,
+   without the tests. ConstFold then usually turns i into constants in each copy.
+2. Partial unrolling: otherwise the loop is run `factor` (or 2) iterations at a time, as
+   long as at least that many are left, and the original loop does the rest:
+
+            nb = n - (factor - 1) * step; if (nb wrapped around) branch rest
+            if (!(i op nb)) branch rest
+    u1:     body
+            ...
+            body; if (i op nb) branch u1
+    rest:   if (!(i op n)) branch exit
+    loop:   body; if (i op n) branch loop
+    exit:
+
+   With i op nb true, the factor - 1 tests skipped inside the unrolled trip would all hold.
+   The unrolled copies must stay within `partialBudget` instructions.
+
+`break` and `continue` keep working in every copy: they jump to the labels of their copy.
+The limits are MAX_TRIPS, FULL_BUDGET, FACTOR and PARTIAL_BUDGET unless the pass is made
+with others: a factor below 2 turns partial unrolling off, and so does a budget of 0.
+"""
+
+MAX_TRIPS = 16
+FULL_BUDGET = 256
+FACTOR = 4
+PARTIAL_BUDGET = 96
+
+
+class LoopUnroll(LoopPass):
+    name = "unroll"
+
+    def __init__(
+        self,
+        maxTrips: int = MAX_TRIPS,
+        fullBudget: int = FULL_BUDGET,
+        factor: int = FACTOR,
+        partialBudget: int = PARTIAL_BUDGET,
+    ) -> None:
+        self.maxTrips = maxTrips
+        self.fullBudget = fullBudget
+        self.factor = factor
+        self.partialBudget = partialBudget
+        # the headers of the unrolled loops made here, not to be unrolled again
+        self.made: set[Label] = set()
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        if inSSA(func):
+            return False
+        return super().runOnFunction(func, am)
+
+    def runOnLoop(
+        self, func: TACFunc, cfg: CFG, dom: DominatorTree, forest: LoopForest, loop: Loop, preheader: int
+    ) -> bool:
+        if loop.children or len(loop.latches) != 1:
+            return False
+        header = cfg.getBlock(loop.header)
+        latch = loop.latches[0]
+        if header.label is None or header.label in self.made:
+            return False
+        # the loop is laid out from the header to the latch, which falls into the exit
+        if loop.blocks != list(range(loop.header, latch + 1)) or latch + 1 >= len(cfg):
+            return False
+        last = cfg.getBlock(latch).locs[-1].instr if cfg.getBlock(latch).locs else None
+        if not isinstance(last, CondBranch) or last.op != CondBranchOp.BNE or last.target is not header.label:
+            return False
+
+        facts = LoopFacts(cfg, loop, preheader)
+        found = self.counter(cfg, dom, facts, latch)
+        if found is None:
+            return False
+        iv, test, op, bound = found
+        size = sum(len(cfg.getBlock(b).locs) for b in loop.blocks)
+
+        trips = self.tripCount(facts.valueBefore(iv.temp), iv.stepValue(), op, bound)
+        if trips is not None and trips * size <= self.fullBudget:
+            region = []
+            for _ in range(trips):
+                blocks = copyLoop(func, cfg, loop.blocks)
+                blocks[-1].locs.pop()
+                region.extend(blocks)
+            self.enter(cfg, preheader, header.label, region[0].label, [])
+        else:
+            fits = [n for n in (self.factor, 2) if 2 <= n <= self.factor and n * size <= self.partialBudget]
+            factor = fits[0] if fits else None
+            if factor is None:
+                return False
+            region = self.partial(func, cfg, loop, preheader, latch, iv, test, op, bound, factor)
+            if region is None:
+                return False
+        # the loop passes write cfg.nodes back: the region takes the place of the loop
+        cfg.nodes[loop.header : latch + 1] = region
+        return True
+
+    # The induction variable the latch tests, with the test: (i, the loc of the test, op, bound)
+    # for a loop going on while `i op bound`. i must be updated exactly once per iteration.
+    def counter(
+        self, cfg: CFG, dom: DominatorTree, facts: LoopFacts, latch: int
+    ) -> Optional[tuple[InductionVar, Loc, TacBinaryOp, Operand]]:
+        for iv in findInductionVars(facts).values():
+            step = iv.stepValue()
+            if step is None or step == 0:
+                continue
+            found = findExitTest(facts, iv)
+            if found is None or found[0] != latch:
+                continue
+            _, test, op, bound = found
+            if (step > 0) != (op in (TacBinaryOp.SLT, TacBinaryOp.LEQ)):
+                continue
+            block = next(b for b in facts.loop.blocks if iv.update in cfg.getBlock(b).locs)
+            if not dom.dominates(block, latch):
+                continue
+            locs = cfg.getBlock(latch).locs
+            if block == latch and locs.index(iv.update) > locs.index(test):
+                continue
+            return iv, test, op, bound
+        return None
+
+    # how many times the body runs, if known and at most maxTrips (it runs at least once)
+    def tripCount(self, start: Optional[int], step: int, op: TacBinaryOp, bound: Operand) -> Optional[int]:
+        if start is None or not isinstance(bound, int):
+            return None
+        holds = {
+            TacBinaryOp.SLT: lambda a, b: a < b,
+            TacBinaryOp.LEQ: lambda a, b: a <= b,
+            TacBinaryOp.SGT: lambda a, b: a > b,
+            TacBinaryOp.GEQ: lambda a, b: a >= b,
+        }[op]
+        value = start
+        for trips in range(1, self.maxTrips + 1):
+            value = wrap(value + step)
+            if not holds(value, bound):
+                return trips
+        return None
+
+    # add `setup` to the preheader, and enter the loop at `target` instead of `header`
+    # (the preheader jumps to the header, or falls into where the new code goes)
+    def enter(self, cfg: CFG, preheader: int, header: Label, target: Label, setup: list[TACInstr]) -> None:
+        pre = cfg.getBlock(preheader)
+        at = insertPoint(pre)
+        pre.locs[at:at] = [Loc(instr) for instr in setup]
+        last = pre.locs[-1].instr if pre.locs else None
+        if isinstance(last, Branch) and last.target is header:
+            pre.locs[-1] = Loc(Branch(target))
+
+    # the blocks running `factor` iterations per trip, followed by the original loop
+    def partial(
+        self,
+        func: TACFunc,
+        cfg: CFG,
+        loop: Loop,
+        preheader: int,
+        latch: int,
+        iv: InductionVar,
+        test: Loc,
+        op: TacBinaryOp,
+        bound: Operand,
+        factor: int,
+    ) -> Optional[list[BasicBlock]]:
+        back = (factor - 1) * iv.stepValue()
+        setup: list[TACInstr] = []
+        rest = func.freshLabel()
+        nb = func.freshTemp()
+        if isinstance(bound, int):
+            if not INT_MIN <= bound - back <= INT_MAX:
+                return None
+            setup.append(LoadImm4(nb, bound - back))
+        else:
+            delta, ok = func.freshTemp(), func.freshTemp()
+            wrapped = TacBinaryOp.SLT if back > 0 else TacBinaryOp.SGT
+            setup += [
+                LoadImm4(delta, back),
+                Binary(TacBinaryOp.SUB, nb, bound, delta),
+                Binary(wrapped, ok, nb, bound),
+                CondBranch(CondBranchOp.BEQ, ok, rest),
+            ]
+        enough = func.freshTemp()
+        setup += [Binary(op, enough, iv.temp, nb), CondBranch(CondBranchOp.BEQ, enough, rest)]
+
+        unrolled: list[BasicBlock] = []
+        for _ in range(factor):
+            blocks = copyLoop(func, cfg, loop.blocks)
+            blocks[-1].locs.pop()
+            unrolled.extend(blocks)
+        more = func.freshTemp()
+        unrolled[-1].locs += [
+            Loc(Binary(op, more, iv.temp, nb)),
+            Loc(CondBranch(CondBranchOp.BNE, more, unrolled[0].label)),
+        ]
+
+        exit = cfg.getBlock(latch + 1)
+        if exit.label is None:
+            exit.label = func.freshLabel()
+        cond: Temp = test.instr.dst
+        check = []
+        if isinstance(bound, int):
+            n = func.freshTemp()
+            check.append(Loc(LoadImm4(n, bound)))
+            bound = n
+        check += [Loc(Binary(op, cond, iv.temp, bound)), Loc(CondBranch(CondBranchOp.BEQ, cond, exit.label))]
+
+        self.enter(cfg, preheader, cfg.getBlock(loop.header).label, unrolled[0].label, setup)
+        self.made.add(unrolled[0].label)
+        return unrolled + [BasicBlock(None, -1, rest, check)] + [cfg.getBlock(b) for b in loop.blocks]
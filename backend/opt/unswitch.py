@@ -0,0 +1,106 @@
+from backend.dataflow.cfg import CFG
+from backend.dataflow.dominance import DominatorTree
+from backend.dataflow.loc import Loc
+from backend.dataflow.loop import Loop, LoopForest
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+from .loopsimplify import insertPoint
+from .looppass import LoopPass, copyLoop
+from .looprotate import NEGATED
+from .passmanager import AnalysisManager
+from .ssa import inSSA
+
+"""
+LoopUnswitch: take loop invariant conditions out of loops
+
+A conditional branch in a loop on a temp the loop never writes goes the same way on every
+iteration. The loop is then copied: in the copy the branch is always taken (it becomes a
+jump), in the original it never is (it's removed). One test of the condition in the
+preheader chooses which of the two loops runs:
+
+            if (!taken) branch loop
+    copy:   ...; branch target; ...     (the loop, specialized)
+            branch exit
+    loop:   ...; ...                    (the loop, specialized the other way)
+    exit:
+
+SimplifyCFG then drops the blocks each version can no longer reach. Every unswitching
+copies a whole loop, so the instructions added to a function are bounded by `growth`
+(GROWTH unless the pass is made with another).
+"""
+
+GROWTH = 160
+
+
+class LoopUnswitch(LoopPass):
+    name = "unswitch"
+
+    def __init__(self, growth: int = GROWTH) -> None:
+        self.growth = growth
+        # what's left of the growth allowed for the current function
+        self.left = growth
+
+    def runOnFunction(self, func: TACFunc, am: AnalysisManager) -> bool:
+        if inSSA(func):
+            return False
+        self.left = self.growth
+        return super().runOnFunction(func, am)
+
+    def runOnLoop(
+        self, func: TACFunc, cfg: CFG, dom: DominatorTree, forest: LoopForest, loop: Loop, preheader: int
+    ) -> bool:
+        header = cfg.getBlock(loop.header)
+        end = loop.blocks[-1]
+        # the blocks from the header to the last one of the loop; those in between that aren't
+        # in the loop (like the jumps out of it, or the headers LoopRotate leaves empty) are
+        # copied along, the copy doing just what they do
+        region = list(range(loop.header, end + 1))
+        if header.label is None:
+            return False
+        size = sum(len(cfg.getBlock(b).locs) for b in region)
+        if size > self.left:
+            return False
+
+        written = set()
+        for b in loop.blocks:
+            for loc in cfg.getBlock(b).locs:
+                written.update(loc.instr.getWritten())
+        switch = None
+        for b in loop.blocks:
+            locs = cfg.getBlock(b).locs
+            if locs and isinstance(locs[-1].instr, CondBranch) and locs[-1].instr.cond.index not in written:
+                switch = b
+                break
+        if switch is None:
+            return False
+        branch: CondBranch = cfg.getBlock(switch).locs[-1].instr
+
+        # the copy doesn't go right before the exit, so it must jump there if it can fall through
+        tail = cfg.getBlock(end).locs
+        fallsOut = not tail or not isinstance(tail[-1].instr, (Branch, Return))
+        if fallsOut:
+            if end + 1 >= len(cfg):
+                return False
+            exit = cfg.getBlock(end + 1)
+            if exit.label is None:
+                exit.label = func.freshLabel()
+
+        copy = copyLoop(func, cfg, region)
+        taken = copy[switch - loop.header]
+        taken.locs[-1] = Loc(Branch(taken.locs[-1].instr.target))
+        if fallsOut:
+            copy[-1].locs.append(Loc(Branch(exit.label)))
+        cfg.getBlock(switch).locs.pop()
+
+        pre = cfg.getBlock(preheader)
+        at = insertPoint(pre)
+        pre.locs.insert(at, Loc(CondBranch(NEGATED[branch.op], branch.cond, header.label)))
+        last = pre.locs[-1].instr
+        if isinstance(last, Branch) and last.target is header.label:
+            pre.locs[-1] = Loc(Branch(copy[0].label))
+
+        # the loop passes write cfg.nodes back: the copy goes right before the loop
+        cfg.nodes[loop.header : loop.header] = copy
+        self.left -= size
+        return True
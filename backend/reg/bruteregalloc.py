@@ -15,6 +15,8 @@ from utils.tac.temp import Temp
 BruteRegAlloc: one kind of RegAlloc
 
 bindings: map from temp.index to Reg
+   dirty: the temps whose register holds a value the stack doesn't have yet
+          (written in the current block); only those are stored at the end of it
 
 we don't need to take care of GlobalTemp here
 because we can remove all the GlobalTemp in selectInstr process
@@ -31,12 +33,15 @@ class BruteRegAlloc(RegAlloc):
     def __init__(self, emitter: RiscvAsmEmitter) -> None:
         super().__init__(emitter)
         self.bindings = {}
+        self.dirty: set[int] = set()
         for reg in emitter.allocatableRegs:
             reg.used = False
 
     def accept(self, graph: CFG, info: SubroutineInfo) -> None:
         subEmitter = self.emitter.emitSubroutine(info)
         self.clearUsed()
+        # the last block of the function before leaves its bindings behind
+        self.restoreBindings()
 
         # bind (actually stash) A0 ~ A7
         # other args are marked in `RiscvSubroutineEmitter.argOffset`
@@ -47,6 +52,16 @@ class BruteRegAlloc(RegAlloc):
                 if tempindex in self.bindings:
                     subEmitter.emitStoreToStack(self.bindings.get(tempindex))
         self.restoreBindings()
+
+        # copy the other args from the frame of the caller to their own slots, where the
+        # blocks expect every temp to be
+        if len(graph) > 0:
+            for temp in subEmitter.info.argTemps[8:]:
+                if temp.index in graph.nodes[0].liveIn:
+                    subEmitter.emitLoadFromStack(Riscv.T0, temp)
+                    self.bind(temp, Riscv.T0)
+                    subEmitter.emitStoreToStack(Riscv.T0)
+                    self.unbind(temp)
         
         for bb in graph.iterator():
             # you need to think more here
@@ -66,15 +81,31 @@ class BruteRegAlloc(RegAlloc):
         if temp.index in self.bindings:
             self.bindings[temp.index].occupied = False
             self.bindings.pop(temp.index)
+        self.dirty.discard(temp.index)
     
+    def clearUsed(self):
+        for reg in self.emitter.allocatableRegs:
+            reg.used = False
+
     def restoreBindings(self):
         self.bindings.clear()
+        self.dirty.clear()
         for reg in self.emitter.allocatableRegs:
             reg.occupied = False
 
     def localAlloc(self, bb: BasicBlock, subEmitter: SubroutineEmitter):
         self.restoreBindings()
         # in step9, you may need to think about how to store callersave regs here
+        if bb.kind == BlockKind.TAIL_CALL:
+            # the arguments in a0-a7 (all of them: see RiscvInstrSelector.tailCalls), then the
+            # frame is given back and the callee jumped to
+            call = bb.locs[0].instr
+            for temp, reg in zip(call.srcs, Riscv.ArgRegs):
+                subEmitter.emitLoadFromStack(reg, temp)
+                self.bind(temp, reg)
+            subEmitter.emitComment(str(call))
+            subEmitter.emitNative(Riscv.NativeTailCall(call.label))
+            return
         if bb.kind == BlockKind.CALL:
             assert len(bb.locs) == 1
             loc = bb.locs[0]
@@ -130,7 +161,7 @@ class BruteRegAlloc(RegAlloc):
                 self.allocForLoc(loc, subEmitter)
 
             for tempindex in bb.liveOut:
-                if tempindex in self.bindings:
+                if tempindex in self.bindings and tempindex in self.dirty:
                     subEmitter.emitStoreToStack(self.bindings.get(tempindex))
 
             if (not bb.isEmpty()) and (bb.kind not in {BlockKind.CONTINUOUS, BlockKind.CALL}):
@@ -154,6 +185,7 @@ class BruteRegAlloc(RegAlloc):
                 dstRegs.append(temp)
             else:
                 dstRegs.append(self.allocRegFor(temp, False, loc.liveIn, subEmitter))
+                self.dirty.add(temp.index)
 
         subEmitter.emitNative(instr.toNative(dstRegs, srcRegs))
 
@@ -180,7 +212,8 @@ class BruteRegAlloc(RegAlloc):
         reg = self.emitter.allocatableRegs[
             random.randint(0, len(self.emitter.allocatableRegs) - 1)
         ]
-        subEmitter.emitStoreToStack(reg)
+        if reg.temp.index in self.dirty:
+            subEmitter.emitStoreToStack(reg)
         subEmitter.emitComment("  spill {} ({})".format(str(reg), str(reg.temp)))
         self.unbind(reg.temp)
         self.bind(temp, reg)
@@ -0,0 +1,107 @@
+from functools import lru_cache
+from typing import Optional
+
+"""
+Multiplication and division by a constant without mul / div / rem
+
+mulTerms: x * c as at most two shifted copies of x, added or subtracted
+    (like x * 10 == (x << 3) + (x << 1)), when that takes few instructions
+divMagic: the magic number and shift for x / d (signed, rounding towards zero, d not 0,
+    1, -1 or a power of two): with the high word of the product x * magic, shifted right,
+    plus one if that is negative (Hacker's Delight, 10-4)
+divMagicUnsigned: the same for x / d with x not negative, with the unsigned high word and
+    no correction (Granlund and Montgomery)
+
+All of it is exact modulo 2^32, like the instructions it replaces.
+"""
+
+# the most instructions a multiplication by a constant is replaced by (a `mul` takes a few cycles)
+MAX_MUL_COST = 3
+
+
+def toInt32(value: int) -> int:
+    value &= 0xFFFF_FFFF
+    return value - (1 << 32) if value & 0x8000_0000 else value
+
+
+# the k with |d| == 2^k, if there is one
+def log2(d: int) -> Optional[int]:
+    d = abs(d)
+    if d & (d - 1) or d == 0:
+        return None
+    return d.bit_length() - 1
+
+
+# Terms (shift, sign) with x * c == sum of sign * (x << shift) modulo 2^32, and the
+# instructions they take: a shift unless it's by 0, an add or sub between two terms, and a
+# neg when no term is positive. None if x * c takes more than MAX_MUL_COST instructions so.
+@lru_cache(maxsize=None)
+def mulTerms(c: int) -> Optional[tuple[tuple[tuple[int, int], ...], int]]:
+    c = toInt32(c)
+    best = None
+
+    def consider(terms: tuple[tuple[int, int], ...]) -> None:
+        nonlocal best
+        cost = sum(1 for shift, _ in terms if shift) + len(terms) - 1
+        if all(sign < 0 for _, sign in terms):
+            cost += 1
+        if best is None or cost < best[1]:
+            best = (terms, cost)
+
+    # the shift k with sign << k == value modulo 2^32, if there is one
+    def single(value: int, sign: int) -> Optional[int]:
+        k = log2(toInt32(value * sign))
+        return k if k is not None and toInt32(sign << k) == toInt32(value) else None
+
+    for sa in (1, -1):
+        a = single(c, sa)
+        if a is not None:
+            consider(((a, sa),))
+    for a in range(32):
+        for sa in (1, -1):
+            rest = c - (sa << a)
+            for sb in (1, -1):
+                b = single(rest, sb)
+                if b is not None and b < a:
+                    consider(((a, sa), (b, sb)))
+    if best is None or best[1] > MAX_MUL_COST:
+        return None
+    return best
+
+
+# (magic, shift) for x / d, 2 <= |d| < 2^31
+@lru_cache(maxsize=None)
+def divMagic(d: int) -> tuple[int, int]:
+    two31 = 1 << 31
+    ad = abs(d)
+    t = two31 + (1 if d < 0 else 0)
+    anc = t - 1 - t % ad
+    p = 31
+    q1, r1 = divmod(two31, anc)
+    q2, r2 = divmod(two31, ad)
+    while True:
+        p += 1
+        q1, r1 = 2 * q1, 2 * r1
+        if r1 >= anc:
+            q1, r1 = q1 + 1, r1 - anc
+        q2, r2 = 2 * q2, 2 * r2
+        if r2 >= ad:
+            q2, r2 = q2 + 1, r2 - ad
+        delta = ad - r2
+        if not (q1 < delta or (q1 == delta and r1 == 0)):
+            break
+    magic = q2 + 1
+    return toInt32(-magic if d < 0 else magic), p - 32
+
+
+# (magic, shift) for x / d with 0 <= x < 2^31, 2 <= d < 2^31, d not a power of two: the
+# high word of x * magic (unsigned), shifted right. With x of 31 bits, the smallest shift
+# whose error x * (magic * d - 2^p) stays below 2^p has a magic of 32 bits.
+@lru_cache(maxsize=None)
+def divMagicUnsigned(d: int) -> tuple[int, int]:
+    p = 32
+    while True:
+        magic = -(-(1 << p) // d)
+        if magic * d - (1 << p) <= 1 << (p - 31):
+            return toInt32(magic), p - 32
+        p += 1
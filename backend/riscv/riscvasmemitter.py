@@ -1,9 +1,9 @@
-from typing import Sequence, Tuple, List, Dict
+from typing import Sequence, Tuple, List, Dict, Optional
 
 from backend.asmemitter import AsmEmitter
 from utils.error import IllegalArgumentException
 from utils.label.label import Label, LabelKind
-from utils.riscv import Riscv, RvBinaryOp, RvUnaryOp
+from utils.riscv import Riscv, RvBinaryImmOp, RvBinaryOp, RvUnaryOp
 from utils.tac.reg import Reg
 from utils.tac.tacfunc import TACFunc
 from utils.tac.tacinstr import *
@@ -11,19 +11,36 @@ from utils.tac.tacvisitor import TACVisitor
 
 from ..subroutineemitter import SubroutineEmitter
 from ..subroutineinfo import SubroutineInfo
+from .byconstant import divMagic, divMagicUnsigned, log2, mulTerms
 
 """
 RiscvAsmEmitter: an AsmEmitter for RiscV
 """
 
+# the operations whose result is always 0 or 1
+BOOLEAN_OPS = {
+    TacBinaryOp.EQU,
+    TacBinaryOp.NEQ,
+    TacBinaryOp.SLT,
+    TacBinaryOp.LEQ,
+    TacBinaryOp.SGT,
+    TacBinaryOp.GEQ,
+    TacBinaryOp.AND,
+    TacBinaryOp.OR,
+}
+
 
 class RiscvAsmEmitter(AsmEmitter):
     def __init__(
         self,
         allocatableRegs: list[Reg],
         callerSaveRegs: list[Reg],
+        tailCalls: bool = False,
     ) -> None:
         super().__init__(allocatableRegs, callerSaveRegs)
+        # whether a call whose result is returned right away may reuse the frame (-O2 only, as
+        # it changes the code and leaves the caller out of backtraces)
+        self.tailCalls = tailCalls
 
     
         # the start of the asm code
@@ -37,12 +54,12 @@ class RiscvAsmEmitter(AsmEmitter):
     def selectInstr(self, func: TACFunc) -> tuple[list[str], SubroutineInfo]:
 
         selector: RiscvAsmEmitter.RiscvInstrSelector = (
-            RiscvAsmEmitter.RiscvInstrSelector(func.entry)
+            RiscvAsmEmitter.RiscvInstrSelector(func.entry, func, self.tailCalls)
         )
         for instr in func.getInstrSeq():
             instr.accept(selector)
 
-        info = SubroutineInfo(func.entry)
+        info = SubroutineInfo(func)
 
         return (selector.seq, info)
 
@@ -55,15 +72,76 @@ class RiscvAsmEmitter(AsmEmitter):
         return self.printer.close()
 
     class RiscvInstrSelector(TACVisitor):
-        def __init__(self, entry: Label) -> None:
+        def __init__(self, entry: Label, func: TACFunc, tailCalls: bool = False) -> None:
             self.entry = entry
             self.seq = []
+            self.func = func
+
+            # temp index -> the constant it holds, for the temps only ever loaded with it
+            self.constants = func.constants()
+            # the temps only ever written 0 or 1 (comparisons, && and ||...), which need no
+            # normalizing with snez
+            self.booleans = self.findBooleans(func)
+            # the calls whose result is returned right away (and the returns after them), which
+            # become tail calls: when all the arguments go in registers, as the ones passed on the
+            # stack would go in the frame that is given back
+            self.tailCalls: set[int] = set()
+            seq = func.getInstrSeq() if tailCalls else []
+            for call, after in zip(seq, seq[1:]):
+                if (
+                    isinstance(call, Call)
+                    and isinstance(after, Return)
+                    and after.value is not None
+                    and after.value.index == call.dst.index
+                    and len(call.srcs) <= len(Riscv.ArgRegs)
+                ):
+                    self.tailCalls.update((id(call), id(after)))
+            # the temps read from a register: a constant that only multiplications or divisions
+            # by it read needn't be loaded at all
+            self.needed: set[int] = set()
+            for instr in func.getInstrSeq():
+                reduced = self.byConstant(instr) if isinstance(instr, Binary) else None
+                if reduced is None:
+                    self.needed.update(instr.getRead())
+                else:
+                    self.needed.add(reduced[0].index)
+
+        @staticmethod
+        def findBooleans(func: TACFunc) -> set[int]:
+            writers: dict[int, list[TACInstr]] = {}
+            for instr in func.getInstrSeq():
+                for index in instr.getWritten():
+                    writers.setdefault(index, []).append(instr)
+            # the arguments are written by the caller
+            candidates = set(writers) - {temp.index for temp in func.tempArgs}
+
+            def yieldsBoolean(instr: TACInstr) -> bool:
+                if isinstance(instr, LoadImm4):
+                    return instr.value in (0, 1)
+                if isinstance(instr, Unary):
+                    return instr.op in (TacUnaryOp.SEQZ, TacUnaryOp.SNEZ)
+                if isinstance(instr, Binary):
+                    return instr.op in BOOLEAN_OPS
+                if isinstance(instr, Assign):
+                    return instr.src.index in candidates
+                return False
+
+            changed = True
+            while changed:
+                changed = False
+                for index in list(candidates):
+                    if not all(yieldsBoolean(instr) for instr in writers[index]):
+                        candidates.discard(index)
+                        changed = True
+            return candidates
 
         def visitOther(self, instr: TACInstr) -> None:
             raise NotImplementedError("RiscvInstrSelector visit{} not implemented".format(type(instr).__name__))
 
         # in step11, you need to think about how to deal with globalTemp in almost all the visit functions. 
         def visitReturn(self, instr: Return) -> None:
+            if id(instr) in self.tailCalls:
+                return
             if instr.value is not None:
                 self.seq.append(Riscv.Move(Riscv.A0, instr.value))
             else:
@@ -74,6 +152,8 @@ class RiscvAsmEmitter(AsmEmitter):
             self.seq.append(Riscv.RiscvLabel(instr.label))
 
         def visitLoadImm4(self, instr: LoadImm4) -> None:
+            if instr.dst.index in self.constants and instr.dst.index not in self.needed:
+                return
             self.seq.append(Riscv.LoadImm(instr.dst, instr.value))
 
         def visitUnary(self, instr: Unary) -> None:
@@ -85,6 +165,9 @@ class RiscvAsmEmitter(AsmEmitter):
                 TacUnaryOp.SNEZ: RvUnaryOp.SNEZ,
 
             }[instr.op]
+            if op == RvUnaryOp.SNEZ and instr.operand.index in self.booleans:
+                self.seq.append(Riscv.Move(instr.dst, instr.operand))
+                return
             self.seq.append(Riscv.Unary(op, instr.dst, instr.operand))
 
         def visitBinary(self, instr: Binary) -> None:
@@ -92,10 +175,27 @@ class RiscvAsmEmitter(AsmEmitter):
             For different tac operation, you should translate it to different RiscV code
             A tac operation may need more than one RiscV instruction
             """
+            reduced = self.byConstant(instr)
+            if reduced is not None:
+                {
+                    TacBinaryOp.MUL: self.emitMul,
+                    TacBinaryOp.DIV: self.emitDiv,
+                    TacBinaryOp.REM: self.emitRem,
+                    TacBinaryOp.DIVU: self.emitDivu,
+                    TacBinaryOp.REMU: self.emitRemu,
+                }[instr.op](instr.dst, *reduced)
+                return
+            if instr.op in (TacBinaryOp.AND, TacBinaryOp.OR) and (
+                instr.lhs.index in self.booleans or instr.rhs.index in self.booleans
+            ):
+                self.emitLogical(instr)
+                return
             if instr.op == TacBinaryOp.AND:
-                self.seq.append(Riscv.Unary(RvUnaryOp.SNEZ, instr.dst, instr.lhs))
+                # dst is written before rhs is read: start from rhs if it's the same temp
+                lhs, rhs = (instr.rhs, instr.lhs) if instr.dst.index == instr.rhs.index else (instr.lhs, instr.rhs)
+                self.seq.append(Riscv.Unary(RvUnaryOp.SNEZ, instr.dst, lhs))
                 self.seq.append(Riscv.Binary(RvBinaryOp.SUB,instr.dst,Riscv.ZERO,instr.dst))
-                self.seq.append(Riscv.Binary(RvBinaryOp.AND,instr.dst,instr.dst, instr.rhs))
+                self.seq.append(Riscv.Binary(RvBinaryOp.AND,instr.dst,instr.dst, rhs))
                 self.seq.append(Riscv.Unary(RvUnaryOp.SNEZ, instr.dst, instr.dst))
                 return
             if instr.op == TacBinaryOp.OR:
@@ -128,19 +228,196 @@ class RiscvAsmEmitter(AsmEmitter):
                     TacBinaryOp.AND: RvBinaryOp.AND,
                     TacBinaryOp.SLT: RvBinaryOp.SLT,
                     TacBinaryOp.SGT: RvBinaryOp.SGT,
+                    TacBinaryOp.DIVU: RvBinaryOp.DIVU,
+                    TacBinaryOp.REMU: RvBinaryOp.REMU,
                     # You can add binary operations here.
                 }[instr.op]
                 self.seq.append(Riscv.Binary(op, instr.dst, instr.lhs, instr.rhs))
 
+        # (x, c) if instr is x * c, c * x, x / c or x % c with c a known constant, and done
+        # without mul / div / rem
+        def byConstant(self, instr: Binary) -> Optional[tuple[Temp, int]]:
+            c = self.constants.get(instr.rhs.index)
+            if instr.op == TacBinaryOp.MUL:
+                if c is not None and (c == 0 or mulTerms(c) is not None):
+                    return instr.lhs, c
+                c = self.constants.get(instr.lhs.index)
+                if c is not None and (c == 0 or mulTerms(c) is not None):
+                    return instr.rhs, c
+            elif instr.op in (TacBinaryOp.DIV, TacBinaryOp.REM) and c is not None and c != 0:
+                return instr.lhs, c
+            elif instr.op in (TacBinaryOp.DIVU, TacBinaryOp.REMU) and c is not None and c > 0:
+                return instr.lhs, c
+            return None
+
+        # && and || with a boolean operand: the bitwise operation does, once the other
+        # operand (if it isn't boolean too) is normalized
+        def emitLogical(self, instr: Binary) -> None:
+            lhs, rhs = instr.lhs, instr.rhs
+            if lhs.index not in self.booleans:
+                lhs, rhs = rhs, lhs
+            if rhs.index not in self.booleans:
+                normalized = self.func.freshTemp()
+                self.seq.append(Riscv.Unary(RvUnaryOp.SNEZ, normalized, rhs))
+                rhs = normalized
+            op = RvBinaryOp.AND if instr.op == TacBinaryOp.AND else RvBinaryOp.OR
+            self.seq.append(Riscv.Binary(op, instr.dst, lhs, rhs))
+
+        def imm(self, op: RvBinaryImmOp, src: Temp, imm: int, dst: Optional[Temp] = None) -> Temp:
+            dst = dst or self.func.freshTemp()
+            self.seq.append(Riscv.BinaryImm(op, dst, src, imm))
+            return dst
+
+        # dst = x * c with shifts and adds (see mulTerms)
+        def emitMul(self, dst: Temp, x: Temp, c: int) -> None:
+            if c == 0:
+                self.seq.append(Riscv.LoadImm(dst, 0))
+                return
+            terms, _ = mulTerms(c)
+            if len(terms) == 1:
+                shift, sign = terms[0]
+                if sign > 0:
+                    if shift:
+                        self.imm(RvBinaryImmOp.SLLI, x, shift, dst)
+                    else:
+                        self.seq.append(Riscv.Move(dst, x))
+                else:
+                    shifted = self.imm(RvBinaryImmOp.SLLI, x, shift) if shift else x
+                    self.seq.append(Riscv.Unary(RvUnaryOp.NEG, dst, shifted))
+                return
+            (a, signA), (b, signB) = terms
+            ta = self.imm(RvBinaryImmOp.SLLI, x, a) if a else x
+            tb = self.imm(RvBinaryImmOp.SLLI, x, b) if b else x
+            if signA > 0 and signB > 0:
+                self.seq.append(Riscv.Binary(RvBinaryOp.ADD, dst, ta, tb))
+            elif signA > 0:
+                self.seq.append(Riscv.Binary(RvBinaryOp.SUB, dst, ta, tb))
+            elif signB > 0:
+                self.seq.append(Riscv.Binary(RvBinaryOp.SUB, dst, tb, ta))
+            else:
+                total = self.func.freshTemp()
+                self.seq.append(Riscv.Binary(RvBinaryOp.ADD, total, ta, tb))
+                self.seq.append(Riscv.Unary(RvUnaryOp.NEG, dst, total))
+
+        # x + (2^k - 1) if x < 0, else x: rounds the shift by k towards zero
+        def biased(self, x: Temp, k: int) -> Temp:
+            sign = x if k == 1 else self.imm(RvBinaryImmOp.SRAI, x, 31)
+            bias = self.imm(RvBinaryImmOp.SRLI, sign, 32 - k)
+            result = self.func.freshTemp()
+            self.seq.append(Riscv.Binary(RvBinaryOp.ADD, result, x, bias))
+            return result
+
+        # dst = x / d, rounding towards zero: shifts for powers of two, else the high word of
+        # a multiplication by the magic number of d (see divMagic)
+        def emitDiv(self, dst: Temp, x: Temp, d: int) -> None:
+            if d == 1:
+                self.seq.append(Riscv.Move(dst, x))
+                return
+            if d == -1:
+                self.seq.append(Riscv.Unary(RvUnaryOp.NEG, dst, x))
+                return
+            k = log2(d)
+            if k is not None:
+                if d > 0:
+                    self.imm(RvBinaryImmOp.SRAI, self.biased(x, k), k, dst)
+                else:
+                    quotient = self.imm(RvBinaryImmOp.SRAI, self.biased(x, k), k)
+                    self.seq.append(Riscv.Unary(RvUnaryOp.NEG, dst, quotient))
+                return
+            magic, shift = divMagic(d)
+            m, q = self.func.freshTemp(), self.func.freshTemp()
+            self.seq.append(Riscv.LoadImm(m, magic))
+            self.seq.append(Riscv.Binary(RvBinaryOp.MULH, q, x, m))
+            if (d > 0) != (magic > 0):
+                corrected = self.func.freshTemp()
+                self.seq.append(Riscv.Binary(RvBinaryOp.ADD if d > 0 else RvBinaryOp.SUB, corrected, q, x))
+                q = corrected
+            if shift:
+                q = self.imm(RvBinaryImmOp.SRAI, q, shift)
+            # add one to a negative quotient, to round it towards zero
+            self.seq.append(Riscv.Binary(RvBinaryOp.ADD, dst, q, self.imm(RvBinaryImmOp.SRLI, q, 31)))
+
+        # dst = x % d == x - x / d * d, with the sign of x
+        def emitRem(self, dst: Temp, x: Temp, d: int) -> None:
+            if d in (1, -1):
+                self.seq.append(Riscv.LoadImm(dst, 0))
+                return
+            k = log2(d)
+            if k is not None:
+                # x / d * d: x rounded towards zero to a multiple of 2^k
+                biased = self.biased(x, k)
+                if k <= 11:
+                    multiple = self.imm(RvBinaryImmOp.ANDI, biased, -(1 << k))
+                else:
+                    multiple = self.imm(RvBinaryImmOp.SLLI, self.imm(RvBinaryImmOp.SRAI, biased, k), k)
+            else:
+                q, multiple = self.func.freshTemp(), self.func.freshTemp()
+                self.emitDiv(q, x, d)
+                if mulTerms(d) is not None:
+                    self.emitMul(multiple, q, d)
+                else:
+                    factor = self.func.freshTemp()
+                    self.seq.append(Riscv.LoadImm(factor, d))
+                    self.seq.append(Riscv.Binary(RvBinaryOp.MUL, multiple, q, factor))
+            self.seq.append(Riscv.Binary(RvBinaryOp.SUB, dst, x, multiple))
+
+        # dst = x / d, x not negative, d > 0: a shift for powers of two, else the unsigned high
+        # word of a multiplication by the magic number of d (see divMagicUnsigned)
+        def emitDivu(self, dst: Temp, x: Temp, d: int) -> None:
+            if d == 1:
+                self.seq.append(Riscv.Move(dst, x))
+                return
+            k = log2(d)
+            if k is not None:
+                self.imm(RvBinaryImmOp.SRLI, x, k, dst)
+                return
+            magic, shift = divMagicUnsigned(d)
+            m, q = self.func.freshTemp(), self.func.freshTemp()
+            self.seq.append(Riscv.LoadImm(m, magic))
+            self.seq.append(Riscv.Binary(RvBinaryOp.MULHU, q, x, m))
+            if shift:
+                self.imm(RvBinaryImmOp.SRLI, q, shift, dst)
+            else:
+                self.seq.append(Riscv.Move(dst, q))
+
+        # dst = x % d, x not negative, d > 0: the low bits for powers of two, else x - x / d * d
+        def emitRemu(self, dst: Temp, x: Temp, d: int) -> None:
+            if d == 1:
+                self.seq.append(Riscv.LoadImm(dst, 0))
+                return
+            k = log2(d)
+            if k is not None:
+                if k <= 11:
+                    self.imm(RvBinaryImmOp.ANDI, x, d - 1, dst)
+                else:
+                    self.imm(RvBinaryImmOp.SRLI, self.imm(RvBinaryImmOp.SLLI, x, 32 - k), 32 - k, dst)
+                return
+            q, multiple = self.func.freshTemp(), self.func.freshTemp()
+            self.emitDivu(q, x, d)
+            if mulTerms(d) is not None:
+                self.emitMul(multiple, q, d)
+            else:
+                factor = self.func.freshTemp()
+                self.seq.append(Riscv.LoadImm(factor, d))
+                self.seq.append(Riscv.Binary(RvBinaryOp.MUL, multiple, q, factor))
+            self.seq.append(Riscv.Binary(RvBinaryOp.SUB, dst, x, multiple))
+
         def visitAssign(self, instr: Assign) -> None:
             self.seq.append(Riscv.Move(instr.dst, instr.src))
             
         def visitCondBranch(self, instr: CondBranch) -> None:
-            self.seq.append(Riscv.Branch(instr.cond, instr.label))
+            op = "bne" if instr.op == CondBranchOp.BNE else "beq"
+            self.seq.append(Riscv.Branch(instr.cond, instr.label, op))
         
         def visitBranch(self, instr: Branch) -> None:
             self.seq.append(Riscv.Jump(instr.target))
 
+        def visitCall(self, instr: Call) -> None:
+            if id(instr) in self.tailCalls:
+                self.seq.append(Riscv.RTailCall(instr.label, instr.srcs))
+                return
+            self.seq.append(Riscv.RCall.fromCall(instr))
+
         # in step9, you need to think about how to pass the parameters and how to store and restore callerSave regs
         # in step11, you need to think about how to store the array 
 """
@@ -180,19 +457,24 @@ class RiscvSubroutineEmitter(SubroutineEmitter):
             self.offsets[src.temp.index] = self.nextLocalOffset
             self.nextLocalOffset += 4
         self.buf.append(
-            Riscv.NativeStoreWord(src, Riscv.SP, self.offsets[src.temp.index])
+            Riscv.NativeStoreWord(src, Riscv.SP, self.offsets[src.temp.index] - self.sp_offset)
         )
 
     # load some temp from stack
-    # usually happen when using a temp which is stored to stack before
+    # the slot is made here if the temp wasn't stored yet: the block storing it may come later
+    # in the code than this one, though it runs before
     # in step9, you need to think about the fuction parameters here
     def emitLoadFromStack(self, dst: Reg, src: Temp):
+        if src.index not in self.offsets and src.index in self.argOffset:
+            # an argument passed on the stack, in the frame of the caller (fixed up in emitEnd)
+            self.buf.append(Riscv.NativeLoadWord(dst, Riscv.SP, self.argOffset[src.index] - self.sp_offset, src))
+            return
         if src.index not in self.offsets:
-            pass
-        else:
-            self.buf.append(
-                Riscv.NativeLoadWord(dst, Riscv.SP, self.offsets[src.index])
-            )
+            self.offsets[src.index] = self.nextLocalOffset
+            self.nextLocalOffset += 4
+        self.buf.append(
+            Riscv.NativeLoadWord(dst, Riscv.SP, self.offsets[src.index] - self.sp_offset)
+        )
 
     # add a NativeInstr to buf
     # when calling the fuction emitEnd, all the instr in buf will be transformed to RiscV code
@@ -259,6 +541,10 @@ class RiscvSubroutineEmitter(SubroutineEmitter):
                 assert instr.temp.index in self.argOffset
                 instr.offset += self.nextLocalOffset
 
+            # a tail call gives the frame back before jumping
+            if isinstance(instr, Riscv.NativeTailCall):
+                self.printRestore()
+
             self.printer.printInstr(instr)
 
         self.printer.printComment("end of body")
@@ -268,8 +554,15 @@ class RiscvSubroutineEmitter(SubroutineEmitter):
             Label(LabelKind.TEMP, self.info.funcLabel.name + Riscv.EPILOGUE_SUFFIX)
         )
         self.printer.printComment("start of epilogue")
+        self.printRestore()
+        self.printer.printComment("end of epilogue")
+        self.printer.println("")
+
+        self.printer.printInstr(Riscv.NativeReturn())
+        self.printer.println("")
 
-        # Restore RA
+    # restore RA and the callee saved registers, and give the frame back
+    def printRestore(self) -> None:
         self.printer.printInstr(
             Riscv.NativeLoadWord(Riscv.RA, Riscv.SP, 4 * len(Riscv.CalleeSaved))
         )
@@ -280,9 +573,4 @@ class RiscvSubroutineEmitter(SubroutineEmitter):
                     Riscv.NativeLoadWord(Riscv.CalleeSaved[i], Riscv.SP, 4 * i)
                 )
 
-        self.printer.printInstr(Riscv.SPAdd(self.nextLocalOffset))
-        self.printer.printComment("end of epilogue")
-        self.printer.println("")
-
-        self.printer.printInstr(Riscv.NativeReturn())
-        self.printer.println("")
\ No newline at end of file
+        self.printer.printInstr(Riscv.SPAdd(self.nextLocalOffset))
\ No newline at end of file
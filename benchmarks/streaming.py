@@ -0,0 +1,73 @@
+import contextlib
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+Peak memory against the number of functions: `python benchmarks/streaming.py`
+
+Compiles generated programs of 250 to 8000 functions to RISC-V, whole (the default) and
+with --stream, and prints the peak of the memory traced by tracemalloc during the
+compilation, each in a process of its own. The whole-program pipeline keeps the tree,
+the TAC and the assembly of every function until the end, so its peak grows with the
+program; the streaming one frees each function once it's written out, so its peak only
+grows by the source text and the symbol of each function (which the calls further down
+need). The lexer and parser tables are built before the measurement starts.
+"""
+
+SIZES = (250, 1000, 4000, 8000)
+
+
+def program(functions: int) -> str:
+    source = "".join(
+        "int f%d(int a) { int b = a * %d + 1; while (b > 100) b = b / 2; return b; }\n" % (i, i)
+        for i in range(functions)
+    )
+    return source + "int main() { return f0(3); }\n"
+
+
+# the peak in KiB of compiling path with flags, in this process
+def measure(path: str, flags: list[str]) -> int:
+    sys.path.insert(0, ROOT)
+    # importing them builds the tables, which is the same for both and not what is measured
+    from frontend.lexer import lexer
+    from frontend.parser import parser
+
+    sys.argv = ["main.py", "--input", path, "--riscv", *flags]
+    tracemalloc.start()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        runpy.run_path(os.path.join(ROOT, "main.py"), run_name="__main__")
+    return tracemalloc.get_traced_memory()[1] // 1024
+
+
+def peak(path: str, flags: list[str]) -> int:
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--measure", path, *flags],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    return int(result.stdout)
+
+
+def main() -> None:
+    print("%10s %18s %18s" % ("functions", "whole (KiB)", "--stream (KiB)"))
+    with tempfile.TemporaryDirectory() as directory:
+        for functions in SIZES:
+            path = os.path.join(directory, "input%d.c" % functions)
+            with open(path, "w") as f:
+                f.write(program(functions))
+            print("%10d %18d %18d" % (functions, peak(path, []), peak(path, ["--stream"])))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        print(measure(sys.argv[2], sys.argv[3:]))
+    else:
+        main()
@@ -8,9 +8,11 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from enum import Enum, auto, unique
-from typing import Any, Optional, TypeVar, Union
+from typing import TYPE_CHECKING, Any, Optional, TypeVar, Union
 
-from .visitor import Visitor
+if TYPE_CHECKING:
+    # only used in annotations; importing it here would make `node` and `visitor` circular
+    from .visitor import Visitor
 
 _T = TypeVar("_T", bound=Enum)
 
@@ -5,6 +5,7 @@ Module that defines the base type of visitor.
 
 from __future__ import annotations
 
+from types import GeneratorType
 from typing import Callable, Protocol, Sequence, TypeVar
 
 from .node import *
@@ -18,6 +19,39 @@ def accept(visitor: Visitor[T, U], ctx: T) -> Callable[[Node], Optional[U]]:
     return lambda node: node.accept(visitor, ctx)
 
 
+def walk(visitor: Visitor[T, U], node: Node, ctx: T) -> Optional[U]:
+    """
+    Visit `node` with an explicit stack instead of the Python call stack.
+
+    A visit method may be written as a generator: every node it yields is visited
+    (with the same `ctx`) before the generator is resumed, and the result of that visit
+    is sent back as the value of the `yield` expression.
+    The value returned by the generator becomes the result of the visit.
+    Visit methods that are plain functions behave exactly as with `accept`.
+
+    This keeps deeply nested inputs (e.g. `((((...))))` or long `a+b+c+...` chains)
+    from overflowing the recursion limit.
+    """
+    ret = node.accept(visitor, ctx)
+    if not isinstance(ret, GeneratorType):
+        return ret
+
+    stack = [ret]
+    value = None
+    while stack:
+        try:
+            child = stack[-1].send(value)
+        except StopIteration as e:
+            stack.pop()
+            value = e.value
+            continue
+        value = child.accept(visitor, ctx)
+        if isinstance(value, GeneratorType):
+            stack.append(value)
+            value = None
+    return value
+
+
 class Visitor(Protocol[T, U]):  # type: ignore
     def visitOther(self, node: Node, ctx: T) -> None:
         return None
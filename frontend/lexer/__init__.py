@@ -7,10 +7,6 @@ from utils.error import DecafLexError
 
 from . import lex
 
-# * replace the '.ply-lexer' by '.xxx' to use your own-defined lexer, where 'xxx' is the module/package name of it
-# * note that your lexer should be iterable, and should have the method 'input' in order to accept the input source file
-from .ply_lexer import lexer as ply_lexer
-
 
 class LexToken(Protocol):
     def __init__(self) -> None:
@@ -41,6 +37,9 @@ class Lexer(Protocol):
     def token(self) -> LexToken:
         ...
 
+    def clone(self) -> Lexer:
+        ...
+
     def __iter__(self) -> Iterator[LexToken]:
         ...
 
@@ -48,7 +47,23 @@ class Lexer(Protocol):
         ...
 
 
-lexer: Lexer = ply_lexer
+lexer: Lexer
+
+
+def __getattr__(name: str):
+    """
+    Build the lexer on first use, so that importing this package (e.g. for `lex.tokens`)
+    doesn't compile the token regexes as a side effect.
+    """
+    if name in ("lexer", "ply_lexer"):
+        # * replace the '.ply-lexer' by '.xxx' to use your own-defined lexer, where 'xxx' is the module/package name of it
+        # * note that your lexer should be iterable, and should have the method 'input' in order to accept the input source file
+        from .ply_lexer import lexer as ply_lexer
+
+        globals().update(lexer=ply_lexer, ply_lexer=ply_lexer)
+        return ply_lexer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "lexer",
@@ -1,21 +1,36 @@
-from typing import Optional, Protocol, cast
+from typing import Callable, Optional, Protocol, cast
 
 from frontend.ast.tree import Program
-from frontend.lexer import Lexer
+from frontend.lexer import Lexer, LexToken
 from utils.error import DecafSyntaxError
 
-from .ply_parser import parser as _parser
-
 
 class Parser(Protocol):
     def __init__(self) -> None:
         self.error_stack: list[DecafSyntaxError]
 
-    def parse(self, input: str, lexer: Optional[Lexer] = None) -> Program:
+    def parse(
+        self,
+        input: Optional[str] = None,
+        lexer: Optional[Lexer] = None,
+        tokenfunc: Optional[Callable[[], Optional[LexToken]]] = None,
+    ) -> Program:
         ...
 
 
-parser = cast(Parser, _parser)
+parser: Parser
+
+
+def __getattr__(name: str):
+    """
+    Load (or generate) the LALR tables on first use instead of as an import side effect.
+    """
+    if name == "parser":
+        from .ply_parser import parser as _parser
+
+        globals()["parser"] = cast(Parser, _parser)
+        return _parser
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
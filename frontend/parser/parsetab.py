@@ -0,0 +1,107 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'programAnd Assign BitAnd BitNot BitOr Break Colon Comma Continue Div Else Equal For Greater GreaterEqual Identifier If Int Integer LBrace LParen Less LessEqual Minus Mod Mul Not NotEqual Or Plus Question RBrace RParen Return Semi While Xor\n    empty :\n    \n    program : empty\n    \n    program : program function\n    \n    type : Int\n    \n    parameter : type Identifier\n    \n    parameter_list : empty\n    \n    parameter_list : parameters\n    \n    parameters : parameter\n    \n    parameters : parameters Comma parameter\n    \n    function : type Identifier LParen parameter_list RParen LBrace block RBrace\n    \n    function : type Identifier LParen parameter_list RParen Semi\n    \n    expression_list : empty\n    \n    expression_list : expression\n    \n    expression_list : expression_list Comma expression\n    \n    block : block block_item\n    \n    block : empty\n    \n    block_item : statement\n        | declaration Semi\n    \n    statement : statement_matched\n        | statement_unmatched\n    \n    statement_matched : If LParen expression RParen statement_matched Else statement_matched\n    statement_unmatched : If LParen expression RParen statement_matched Else statement_unmatched\n    \n    statement_unmatched : If LParen expression RParen statement\n    \n    statement_matched : While LParen expression RParen statement_matched\n    statement_unmatched : While LParen expression RParen statement_unmatched\n    \n    for_init_elem : opt_expression\n    for_init_elem : declaration\n    \n    statement_matched : For LParen for_init_elem Semi opt_expression Semi opt_expression RParen statement_matched\n    statement_unmatched : For LParen for_init_elem Semi opt_expression Semi opt_expression RParen statement_unmatched\n    \n    statement_matched : Continue Semi\n    \n    statement_matched : Return expression Semi\n    \n    statement_matched : opt_expression Semi\n    \n    statement_matched : LBrace block RBrace\n    \n    statement_matched : Break Semi\n    \n    opt_expression : expression\n    \n    opt_expression : empty\n    \n    declaration : type Identifier\n    \n    declaration : type Identifier Assign expression\n    \n    expression : assignment\n    assignment : conditional\n    conditional : logical_or\n    logical_or : logical_and\n    logical_and : bit_or\n    bit_or : xor\n    xor : bit_and\n    bit_and : equality\n    equality : relational\n    relational : additive\n    additive : multiplicative\n    multiplicative : unary\n    unary : postfix\n    postfix : primary\n    \n    postfix : Identifier LParen expression_list RParen\n    \n    unary : Minus unary\n        | BitNot unary\n        | Not unary\n    \n    assignment : Identifier Assign expression\n    logical_or : logical_or Or logical_and\n    logical_and : logical_and And bit_or\n    bit_or : bit_or BitOr xor\n    xor : xor Xor bit_and\n    bit_and : bit_and BitAnd equality\n    equality : equality NotEqual relational\n        | equality Equal relational\n    relational : relational Less additive\n        | relational Greater additive\n        | relational LessEqual additive\n        | relational GreaterEqual additive\n    additive : additive Plus multiplicative\n        | additive Minus multiplicative\n    multiplicative : multiplicative Mul unary\n        | multiplicative Div unary\n        | multiplicative Mod unary\n    \n    conditional : logical_or Question expression Colon conditional\n    \n    primary : Integer\n    \n    primary : Identifier\n    \n    primary : LParen expression RParen\n    '
+    
+_lr_action_items = {'Int':([0,1,2,3,7,15,16,17,19,20,24,25,26,27,29,30,62,63,66,67,68,70,98,104,130,131,132,133,138,139,142,143,],[-1,5,-2,-3,5,5,-1,-11,5,-16,-1,-10,-15,-17,-19,-20,5,-18,5,-32,-30,-34,-33,-31,-19,-23,-24,-25,-21,-22,-28,-29,]),'$end':([0,1,2,3,17,25,],[-1,0,-2,-3,-11,-10,]),'Identifier':([4,5,8,16,19,20,21,23,24,26,27,29,30,37,51,54,55,59,60,62,63,64,65,66,67,68,70,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,92,98,104,124,125,126,127,128,130,131,132,133,136,137,138,139,141,142,143,],[6,-4,13,-1,22,-16,58,22,-1,-15,-17,-19,-20,22,89,89,89,22,22,22,-18,22,22,22,-32,-30,-34,22,89,89,89,89,89,89,89,89,89,89,89,89,89,89,89,89,22,-33,-31,22,22,22,22,89,-19,-23,-24,-25,22,22,-21,-22,22,-28,-29,]),'LParen':([6,16,19,20,22,23,24,26,27,29,30,32,33,34,37,51,54,55,59,60,62,63,64,65,66,67,68,70,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,89,92,98,104,124,125,126,127,128,130,131,132,133,136,137,138,139,141,142,143,],[7,-1,23,-16,60,23,-1,-15,-17,-19,-20,64,65,66,23,23,23,23,23,23,23,-18,23,23,23,-32,-30,-34,23,23,23,23,23,23,23,23,23,23,23,23,23,23,23,23,23,60,23,-33,-31,23,23,23,23,23,-19,-23,-24,-25,23,23,-21,-22,23,-28,-29,]),'RParen':([7,9,10,11,12,13,18,22,31,39,40,41,42,43,44,45,46,47,48,49,50,52,53,56,57,60,61,88,89,90,91,93,94,95,96,97,99,100,106,107,108,109,110,111,112,113,114,115,116,117,118,119,120,121,123,129,135,137,140,],[-1,14,-6,-7,-8,-5,-9,-76,-35,-36,-39,-40,-41,-42,-43,-44,-45,-46,-47,-48,-49,-50,-51,-52,-75,-1,97,-54,-76,-55,-56,-57,123,-12,-13,-77,125,126,-58,-59,-60,-61,-62,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,-14,-74,-1,141,]),'Comma':([11,12,13,18,22,40,41,42,43,44,45,46,47,48,49,50,52,53,56,57,60,88,89,90,91,93,94,95,96,97,106,107,108,109,110,111,112,113,114,115,116,117,118,119,120,121,123,129,135,],[15,-8,-5,-9,-76,-39,-40,-41,-42,-43,-44,-45,-46,-47,-48,-49,-50,-51,-52,-75,-1,-54,-76,-55,-56,-57,124,-12,-13,-77,-58,-59,-60,-61,-62,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,-14,-74,]),'LBrace':([14,16,19,20,24,26,27,29,30,62,63,67,68,70,98,104,125,126,130,131,132,133,136,138,139,141,142,143,],[16,-1,24,-16,-1,-15,-17,-19,-20,24,-18,-32,-30,-34,-33,-31,24,24,-19,-23,-24,-25,24,-21,-22,24,-28,-29,]),'Semi':([14,16,19,20,22,24,26,27,28,29,30,31,35,36,38,39,40,41,42,43,44,45,46,47,48,49,50,52,53,56,57,58,62,63,66,67,68,69,70,88,89,90,91,93,97,98,101,102,103,104,106,107,108,109,110,111,112,113,114,115,116,117,118,119,120,121,122,123,125,126,127,130,131,132,133,134,135,136,138,139,141,142,143,],[17,-1,-1,-16,-76,-1,-15,-17,63,-19,-20,-35,67,68,70,-36,-39,-40,-41,-42,-43,-44,-45,-46,-47,-48,-49,-50,-51,-52,-75,-37,-1,-18,-1,-32,-30,104,-34,-54,-76,-55,-56,-57,-77,-33,127,-26,-27,-31,-58,-59,-60,-61,-62,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-38,-53,-1,-1,-1,-19,-23,-24,-25,137,-74,-1,-21,-22,-1,-28,-29,]),'RBrace':([16,19,20,24,26,27,29,30,62,63,67,68,70,98,104,130,131,132,133,138,139,142,143,],[-1,25,-16,-1,-15,-17,-19,-20,98,-18,-32,-30,-34,-33,-31,-19,-23,-24,-25,-21,-22,-28,-29,]),'If':([16,19,20,24,26,27,29,30,62,63,67,68,70,98,104,125,126,130,131,132,133,136,138,139,141,142,143,],[-1,32,-16,-1,-15,-17,-19,-20,32,-18,-32,-30,-34,-33,-31,32,32,-19,-23,-24,-25,32,-21,-22,32,-28,-29,]),'While':([16,19,20,24,26,27,29,30,62,63,67,68,70,98,104,125,126,130,131,132,133,136,138,139,141,142,143,],[-1,33,-16,-1,-15,-17,-19,-20,33,-18,-32,-30,-34,-33,-31,33,33,-19,-23,-24,-25,33,-21,-22,33,-28,-29,]),'For':([16,19,20,24,26,27,29,30,62,63,67,68,70,98,104,125,126,130,131,132,133,136,138,139,141,142,143,],[-1,34,-16,-1,-15,-17,-19,-20,34,-18,-32,-30,-34,-33,-31,34,34,-19,-23,-24,-25,34,-21,-22,34,-28,-29,]),'Continue':([16,19,20,24,26,27,29,30,62,63,67,68,70,98,104,125,126,130,131,132,133,136,138,139,141,142,143,],[-1,36,-16,-1,-15,-17,-19,-20,36,-18,-32,-30,-34,-33,-31,36,36,-19,-23,-24,-25,36,-21,-22,36,-28,-29,]),'Return':([16,19,20,24,26,27,29,30,62,63,67,68,70,98,104,125,126,130,131,132,133,136,138,139,141,142,143,],[-1,37,-16,-1,-15,-17,-19,-20,37,-18,-32,-30,-34,-33,-31,37,37,-19,-23,-24,-25,37,-21,-22,37,-28,-29,]),'Break':([16,19,20,24,26,27,29,30,62,63,67,68,70,98,104,125,126,130,131,132,133,136,138,139,141,142,143,],[-1,38,-16,-1,-15,-17,-19,-20,38,-18,-32,-30,-34,-33,-31,38,38,-19,-23,-24,-25,38,-21,-22,38,-28,-29,]),'Minus':([16,19,20,22,23,24,26,27,29,30,37,49,50,51,52,53,54,55,56,57,59,60,62,63,64,65,66,67,68,70,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,97,98,104,113,114,115,116,117,118,119,120,121,123,124,125,126,127,128,130,131,132,133,136,137,138,139,141,142,143,],[-1,51,-16,-76,51,-1,-15,-17,-19,-20,51,84,-49,51,-50,-51,51,51,-52,-75,51,51,51,-18,51,51,51,-32,-30,-34,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,-54,-76,-55,-56,51,-77,-33,-31,84,84,84,84,-69,-70,-71,-72,-73,-53,51,51,51,51,51,-19,-23,-24,-25,51,51,-21,-22,51,-28,-29,]),'BitNot':([16,19,20,23,24,26,27,29,30,37,51,54,55,59,60,62,63,64,65,66,67,68,70,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,92,98,104,124,125,126,127,128,130,131,132,133,136,137,138,139,141,142,143,],[-1,54,-16,54,-1,-15,-17,-19,-20,54,54,54,54,54,54,54,-18,54,54,54,-32,-30,-34,54,54,54,54,54,54,54,54,54,54,54,54,54,54,54,54,54,54,-33,-31,54,54,54,54,54,-19,-23,-24,-25,54,54,-21,-22,54,-28,-29,]),'Not':([16,19,20,23,24,26,27,29,30,37,51,54,55,59,60,62,63,64,65,66,67,68,70,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,92,98,104,124,125,126,127,128,130,131,132,133,136,137,138,139,141,142,143,],[-1,55,-16,55,-1,-15,-17,-19,-20,55,55,55,55,55,55,55,-18,55,55,55,-32,-30,-34,55,55,55,55,55,55,55,55,55,55,55,55,55,55,55,55,55,55,-33,-31,55,55,55,55,55,-19,-23,-24,-25,55,55,-21,-22,55,-28,-29,]),'Integer':([16,19,20,23,24,26,27,29,30,37,51,54,55,59,60,62,63,64,65,66,67,68,70,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,92,98,104,124,125,126,127,128,130,131,132,133,136,137,138,139,141,142,143,],[-1,57,-16,57,-1,-15,-17,-19,-20,57,57,57,57,57,57,57,-18,57,57,57,-32,-30,-34,57,57,57,57,57,57,57,57,57,57,57,57,57,57,57,57,57,57,-33,-31,57,57,57,57,57,-19,-23,-24,-25,57,57,-21,-22,57,-28,-29,]),'Assign':([22,58,],[59,92,]),'Mul':([22,50,52,53,56,57,88,89,90,91,97,117,118,119,120,121,123,],[-76,85,-50,-51,-52,-75,-54,-76,-55,-56,-77,85,85,-71,-72,-73,-53,]),'Div':([22,50,52,53,56,57,88,89,90,91,97,117,118,119,120,121,123,],[-76,86,-50,-51,-52,-75,-54,-76,-55,-56,-77,86,86,-71,-72,-73,-53,]),'Mod':([22,50,52,53,56,57,88,89,90,91,97,117,118,119,120,121,123,],[-76,87,-50,-51,-52,-75,-54,-76,-55,-56,-77,87,87,-71,-72,-73,-53,]),'Plus':([22,49,50,52,53,56,57,88,89,90,91,97,113,114,115,116,117,118,119,120,121,123,],[-76,83,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,83,83,83,83,-69,-70,-71,-72,-73,-53,]),'Less':([22,48,49,50,52,53,56,57,88,89,90,91,97,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,79,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,79,79,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'Greater':([22,48,49,50,52,53,56,57,88,89,90,91,97,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,80,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,80,80,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'LessEqual':([22,48,49,50,52,53,56,57,88,89,90,91,97,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,81,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,81,81,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'GreaterEqual':([22,48,49,50,52,53,56,57,88,89,90,91,97,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,82,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,82,82,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'NotEqual':([22,47,48,49,50,52,53,56,57,88,89,90,91,97,110,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,77,-47,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,77,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'Equal':([22,47,48,49,50,52,53,56,57,88,89,90,91,97,110,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,78,-47,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,78,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'BitAnd':([22,46,47,48,49,50,52,53,56,57,88,89,90,91,97,109,110,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,76,-46,-47,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,76,-62,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'Xor':([22,45,46,47,48,49,50,52,53,56,57,88,89,90,91,97,108,109,110,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,75,-45,-46,-47,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,75,-61,-62,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'BitOr':([22,44,45,46,47,48,49,50,52,53,56,57,88,89,90,91,97,107,108,109,110,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,74,-44,-45,-46,-47,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,74,-60,-61,-62,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'And':([22,43,44,45,46,47,48,49,50,52,53,56,57,88,89,90,91,97,106,107,108,109,110,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,73,-43,-44,-45,-46,-47,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,73,-59,-60,-61,-62,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'Question':([22,42,43,44,45,46,47,48,49,50,52,53,56,57,88,89,90,91,97,106,107,108,109,110,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,71,-42,-43,-44,-45,-46,-47,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,-58,-59,-60,-61,-62,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'Or':([22,42,43,44,45,46,47,48,49,50,52,53,56,57,88,89,90,91,97,106,107,108,109,110,111,112,113,114,115,116,117,118,119,120,121,123,],[-76,72,-42,-43,-44,-45,-46,-47,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-77,-58,-59,-60,-61,-62,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,]),'Colon':([22,40,41,42,43,44,45,46,47,48,49,50,52,53,56,57,88,89,90,91,93,97,105,106,107,108,109,110,111,112,113,114,115,116,117,118,119,120,121,123,135,],[-76,-39,-40,-41,-42,-43,-44,-45,-46,-47,-48,-49,-50,-51,-52,-75,-54,-76,-55,-56,-57,-77,128,-58,-59,-60,-61,-62,-63,-64,-65,-66,-67,-68,-69,-70,-71,-72,-73,-53,-74,]),'Else':([67,68,70,98,104,130,132,138,142,],[-32,-30,-34,-33,-31,136,-24,-21,-28,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'program':([0,],[1,]),'empty':([0,7,16,19,24,60,62,66,125,126,127,136,137,141,],[2,10,20,39,20,95,39,39,39,39,39,39,39,39,]),'function':([1,],[3,]),'type':([1,7,15,19,62,66,],[4,8,8,21,21,21,]),'parameter_list':([7,],[9,]),'parameters':([7,],[11,]),'parameter':([7,15,],[12,18,]),'block':([16,24,],[19,62,]),'block_item':([19,62,],[26,26,]),'statement':([19,62,125,],[27,27,131,]),'declaration':([19,62,66,],[28,28,103,]),'statement_matched':([19,62,125,126,136,141,],[29,29,130,132,138,142,]),'statement_unmatched':([19,62,125,126,136,141,],[30,30,30,133,139,143,]),'expression':([19,23,37,59,60,62,64,65,66,71,92,124,125,126,127,136,137,141,],[31,61,69,93,96,31,99,100,31,105,122,129,31,31,31,31,31,31,]),'opt_expression':([19,62,66,125,126,127,136,137,141,],[35,35,102,35,35,134,35,140,35,]),'assignment':([19,23,37,59,60,62,64,65,66,71,92,124,125,126,127,136,137,141,],[40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,]),'conditional':([19,23,37,59,60,62,64,65,66,71,92,124,125,126,127,128,136,137,141,],[41,41,41,41,41,41,41,41,41,41,41,41,41,41,41,135,41,41,41,]),'logical_or':([19,23,37,59,60,62,64,65,66,71,92,124,125,126,127,128,136,137,141,],[42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,]),'logical_and':([19,23,37,59,60,62,64,65,66,71,72,92,124,125,126,127,128,136,137,141,],[43,43,43,43,43,43,43,43,43,43,106,43,43,43,43,43,43,43,43,43,]),'bit_or':([19,23,37,59,60,62,64,65,66,71,72,73,92,124,125,126,127,128,136,137,141,],[44,44,44,44,44,44,44,44,44,44,44,107,44,44,44,44,44,44,44,44,44,]),'xor':([19,23,37,59,60,62,64,65,66,71,72,73,74,92,124,125,126,127,128,136,137,141,],[45,45,45,45,45,45,45,45,45,45,45,45,108,45,45,45,45,45,45,45,45,45,]),'bit_and':([19,23,37,59,60,62,64,65,66,71,72,73,74,75,92,124,125,126,127,128,136,137,141,],[46,46,46,46,46,46,46,46,46,46,46,46,46,109,46,46,46,46,46,46,46,46,46,]),'equality':([19,23,37,59,60,62,64,65,66,71,72,73,74,75,76,92,124,125,126,127,128,136,137,141,],[47,47,47,47,47,47,47,47,47,47,47,47,47,47,110,47,47,47,47,47,47,47,47,47,]),'relational':([19,23,37,59,60,62,64,65,66,71,72,73,74,75,76,77,78,92,124,125,126,127,128,136,137,141,],[48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,111,112,48,48,48,48,48,48,48,48,48,]),'additive':([19,23,37,59,60,62,64,65,66,71,72,73,74,75,76,77,78,79,80,81,82,92,124,125,126,127,128,136,137,141,],[49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,113,114,115,116,49,49,49,49,49,49,49,49,49,]),'multiplicative':([19,23,37,59,60,62,64,65,66,71,72,73,74,75,76,77,78,79,80,81,82,83,84,92,124,125,126,127,128,136,137,141,],[50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,117,118,50,50,50,50,50,50,50,50,50,]),'unary':([19,23,37,51,54,55,59,60,62,64,65,66,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,92,124,125,126,127,128,136,137,141,],[52,52,52,88,90,91,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,119,120,121,52,52,52,52,52,52,52,52,52,]),'postfix':([19,23,37,51,54,55,59,60,62,64,65,66,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,92,124,125,126,127,128,136,137,141,],[53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,]),'primary':([19,23,37,51,54,55,59,60,62,64,65,66,71,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,92,124,125,126,127,128,136,137,141,],[56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,56,]),'expression_list':([60,],[94,]),'for_init_elem':([66,],[101,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> program","S'",1,None,None,None),
+  ('empty -> <empty>','empty',0,'p_empty','ply_parser.py',37),
+  ('program -> empty','program',1,'p_program_empty','ply_parser.py',43),
+  ('program -> program function','program',2,'p_program_component','ply_parser.py',50),
+  ('type -> Int','type',1,'p_type','ply_parser.py',57),
+  ('parameter -> type Identifier','parameter',2,'p_function_parameter_definition','ply_parser.py',63),
+  ('parameter_list -> empty','parameter_list',1,'p_function_parameter_list_empty','ply_parser.py',69),
+  ('parameter_list -> parameters','parameter_list',1,'p_function_parameter_list','ply_parser.py',75),
+  ('parameters -> parameter','parameters',1,'p_function_parameter_list_single','ply_parser.py',81),
+  ('parameters -> parameters Comma parameter','parameters',3,'p_function_parameter_list_component','ply_parser.py',87),
+  ('function -> type Identifier LParen parameter_list RParen LBrace block RBrace','function',8,'p_function_delc_def','ply_parser.py',94),
+  ('function -> type Identifier LParen parameter_list RParen Semi','function',6,'p_function_delc_only','ply_parser.py',100),
+  ('expression_list -> empty','expression_list',1,'p_call_expression_list_empty','ply_parser.py',106),
+  ('expression_list -> expression','expression_list',1,'p_call_expression_list_single','ply_parser.py',112),
+  ('expression_list -> expression_list Comma expression','expression_list',3,'p_call_expression_list_component','ply_parser.py',118),
+  ('block -> block block_item','block',2,'p_block','ply_parser.py',125),
+  ('block -> empty','block',1,'p_block_empty','ply_parser.py',134),
+  ('block_item -> statement','block_item',1,'p_block_item','ply_parser.py',141),
+  ('block_item -> declaration Semi','block_item',2,'p_block_item','ply_parser.py',142),
+  ('statement -> statement_matched','statement',1,'p_statement','ply_parser.py',149),
+  ('statement -> statement_unmatched','statement',1,'p_statement','ply_parser.py',150),
+  ('statement_matched -> If LParen expression RParen statement_matched Else statement_matched','statement_matched',7,'p_if_else','ply_parser.py',157),
+  ('statement_unmatched -> If LParen expression RParen statement_matched Else statement_unmatched','statement_unmatched',7,'p_if_else','ply_parser.py',158),
+  ('statement_unmatched -> If LParen expression RParen statement','statement_unmatched',5,'p_if','ply_parser.py',165),
+  ('statement_matched -> While LParen expression RParen statement_matched','statement_matched',5,'p_while','ply_parser.py',172),
+  ('statement_unmatched -> While LParen expression RParen statement_unmatched','statement_unmatched',5,'p_while','ply_parser.py',173),
+  ('for_init_elem -> opt_expression','for_init_elem',1,'p_for_init','ply_parser.py',179),
+  ('for_init_elem -> declaration','for_init_elem',1,'p_for_init','ply_parser.py',180),
+  ('statement_matched -> For LParen for_init_elem Semi opt_expression Semi opt_expression RParen statement_matched','statement_matched',9,'p_for','ply_parser.py',186),
+  ('statement_unmatched -> For LParen for_init_elem Semi opt_expression Semi opt_expression RParen statement_unmatched','statement_unmatched',9,'p_for','ply_parser.py',187),
+  ('statement_matched -> Continue Semi','statement_matched',2,'p_continue','ply_parser.py',195),
+  ('statement_matched -> Return expression Semi','statement_matched',3,'p_return','ply_parser.py',201),
+  ('statement_matched -> opt_expression Semi','statement_matched',2,'p_expression_statement','ply_parser.py',208),
+  ('statement_matched -> LBrace block RBrace','statement_matched',3,'p_block_statement','ply_parser.py',215),
+  ('statement_matched -> Break Semi','statement_matched',2,'p_break','ply_parser.py',222),
+  ('opt_expression -> expression','opt_expression',1,'p_opt_expression','ply_parser.py',229),
+  ('opt_expression -> empty','opt_expression',1,'p_opt_expression_empty','ply_parser.py',236),
+  ('declaration -> type Identifier','declaration',2,'p_declaration','ply_parser.py',243),
+  ('declaration -> type Identifier Assign expression','declaration',4,'p_declaration_init','ply_parser.py',250),
+  ('expression -> assignment','expression',1,'p_expression_precedence','ply_parser.py',257),
+  ('assignment -> conditional','assignment',1,'p_expression_precedence','ply_parser.py',258),
+  ('conditional -> logical_or','conditional',1,'p_expression_precedence','ply_parser.py',259),
+  ('logical_or -> logical_and','logical_or',1,'p_expression_precedence','ply_parser.py',260),
+  ('logical_and -> bit_or','logical_and',1,'p_expression_precedence','ply_parser.py',261),
+  ('bit_or -> xor','bit_or',1,'p_expression_precedence','ply_parser.py',262),
+  ('xor -> bit_and','xor',1,'p_expression_precedence','ply_parser.py',263),
+  ('bit_and -> equality','bit_and',1,'p_expression_precedence','ply_parser.py',264),
+  ('equality -> relational','equality',1,'p_expression_precedence','ply_parser.py',265),
+  ('relational -> additive','relational',1,'p_expression_precedence','ply_parser.py',266),
+  ('additive -> multiplicative','additive',1,'p_expression_precedence','ply_parser.py',267),
+  ('multiplicative -> unary','multiplicative',1,'p_expression_precedence','ply_parser.py',268),
+  ('unary -> postfix','unary',1,'p_expression_precedence','ply_parser.py',269),
+  ('postfix -> primary','postfix',1,'p_expression_precedence','ply_parser.py',270),
+  ('postfix -> Identifier LParen expression_list RParen','postfix',4,'p_postfix_call','ply_parser.py',276),
+  ('unary -> Minus unary','unary',2,'p_unary_expression','ply_parser.py',282),
+  ('unary -> BitNot unary','unary',2,'p_unary_expression','ply_parser.py',283),
+  ('unary -> Not unary','unary',2,'p_unary_expression','ply_parser.py',284),
+  ('assignment -> Identifier Assign expression','assignment',3,'p_binary_expression','ply_parser.py',291),
+  ('logical_or -> logical_or Or logical_and','logical_or',3,'p_binary_expression','ply_parser.py',292),
+  ('logical_and -> logical_and And bit_or','logical_and',3,'p_binary_expression','ply_parser.py',293),
+  ('bit_or -> bit_or BitOr xor','bit_or',3,'p_binary_expression','ply_parser.py',294),
+  ('xor -> xor Xor bit_and','xor',3,'p_binary_expression','ply_parser.py',295),
+  ('bit_and -> bit_and BitAnd equality','bit_and',3,'p_binary_expression','ply_parser.py',296),
+  ('equality -> equality NotEqual relational','equality',3,'p_binary_expression','ply_parser.py',297),
+  ('equality -> equality Equal relational','equality',3,'p_binary_expression','ply_parser.py',298),
+  ('relational -> relational Less additive','relational',3,'p_binary_expression','ply_parser.py',299),
+  ('relational -> relational Greater additive','relational',3,'p_binary_expression','ply_parser.py',300),
+  ('relational -> relational LessEqual additive','relational',3,'p_binary_expression','ply_parser.py',301),
+  ('relational -> relational GreaterEqual additive','relational',3,'p_binary_expression','ply_parser.py',302),
+  ('additive -> additive Plus multiplicative','additive',3,'p_binary_expression','ply_parser.py',303),
+  ('additive -> additive Minus multiplicative','additive',3,'p_binary_expression','ply_parser.py',304),
+  ('multiplicative -> multiplicative Mul unary','multiplicative',3,'p_binary_expression','ply_parser.py',305),
+  ('multiplicative -> multiplicative Div unary','multiplicative',3,'p_binary_expression','ply_parser.py',306),
+  ('multiplicative -> multiplicative Mod unary','multiplicative',3,'p_binary_expression','ply_parser.py',307),
+  ('conditional -> logical_or Question expression Colon conditional','conditional',5,'p_conditional_expression','ply_parser.py',314),
+  ('primary -> Integer','primary',1,'p_int_literal_expression','ply_parser.py',321),
+  ('primary -> Identifier','primary',1,'p_identifier_expression','ply_parser.py',328),
+  ('primary -> LParen expression RParen','primary',3,'p_brace_expression','ply_parser.py',335),
+]
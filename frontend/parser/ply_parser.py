@@ -49,7 +49,7 @@ def p_program_component(p):
     """
     program : program function
     """
-    p[1] = [p[1],p[2]]
+    p[1].children.append(p[2])
     p[0] = p[1]
 
 def p_type(p):
@@ -62,7 +62,7 @@ def p_function_parameter_definition(p):
     """
     parameter : type Identifier
     """
-    p[0] = [Parameter(*p[1:])]
+    p[0] = Parameter(*p[1:])
 
 def p_function_parameter_list_empty(p):
     """
@@ -70,17 +70,24 @@ def p_function_parameter_list_empty(p):
     """
     p[0] = []
 
-def p_function_parameter_list_single(p):
+def p_function_parameter_list(p):
     """
-    parameter_list : parameter
+    parameter_list : parameters
     """
     p[0] = p[1]
 
+def p_function_parameter_list_single(p):
+    """
+    parameters : parameter
+    """
+    p[0] = [p[1]]
+
 def p_function_parameter_list_component(p):
     """
-    parameter_list : parameter Comma parameter_list
+    parameters : parameters Comma parameter
     """
-    p[0] = p[1] + p[3]
+    p[1].append(p[3])
+    p[0] = p[1]
 
 def p_function_delc_def(p):
     """
@@ -110,7 +117,8 @@ def p_call_expression_list_component(p):
     """
     expression_list : expression_list Comma expression
     """
-    p[0] = p[1] + [p[3]]
+    p[1].append(p[3])
+    p[0] = p[1]
 
 def p_block(p):
     """
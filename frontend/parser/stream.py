@@ -0,0 +1,76 @@
+from typing import Iterator, Optional
+
+from frontend.ast.tree import Function
+from frontend.lexer import Lexer, LexToken
+from frontend.parser import parser
+
+"""
+Function-at-a-time parsing, used by the streaming pipeline.
+
+Instead of building the AST of the whole program, the token stream is cut at the end of
+every top-level function (its closing brace, or the semicolon of a declaration) and each
+piece is handed to the parser on its own. Only the tokens of the current function are
+ever looked at, so nothing of a function is kept after the caller is done with it.
+"""
+
+
+class FunctionTokens:
+    """
+    Feeds the tokens of a single top-level function to the parser, then reports EOF.
+    """
+
+    def __init__(self, lexer: Lexer) -> None:
+        self.lexer = lexer
+        self.depth = 0
+        self.done = False
+        self.seen = False
+
+    def token(self) -> Optional[LexToken]:
+        if self.done:
+            return None
+        tok = self.lexer.token()
+        if tok is None:
+            self.done = True
+            return None
+        self.seen = True
+        if tok.type == "LBrace":
+            self.depth += 1
+        elif tok.type == "RBrace":
+            self.depth -= 1
+            self.done = self.depth <= 0
+        elif tok.type == "Semi":
+            self.done = self.depth <= 0
+        return tok
+
+
+def parseFunctions(code: str, lexer: Lexer) -> Iterator[Function]:
+    """
+    Parse `code` and yield its top-level functions one by one, in source order.
+    Syntax errors are collected in `parser.error_stack`, exactly as `parser.parse` does.
+    """
+    lexer.input(code)
+    while True:
+        tokens = FunctionTokens(lexer)
+        program = parser.parse(lexer=lexer, tokenfunc=tokens.token)
+        if not tokens.seen:
+            return
+        if program is not None:
+            yield from program.children
+
+
+def declaresMain(code: str, lexer: Lexer) -> bool:
+    """
+    Whether `code` declares a function named main, found by scanning the tokens only.
+    The namer checks this before anything else, so the streaming pipeline has to know it upfront.
+    """
+    scanner = lexer.clone()
+    scanner.input(code)
+    depth = 0
+    for tok in iter(scanner.token, None):
+        if tok.type in ("LParen", "LBrace"):
+            depth += 1
+        elif tok.type in ("RParen", "RBrace"):
+            depth -= 1
+        elif depth == 0 and tok.type == "Identifier" and tok.value.value == "main":
+            return True
+    return False
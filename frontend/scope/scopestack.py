@@ -2,14 +2,32 @@ from typing import Optional
 from frontend.symbol.symbol import Symbol
 from .scope import Scope,ScopeKind
 default_capacity = 1024
+
+"""
+ScopeStack: the stack of currently opened scopes.
+
+Besides the scopes themselves, it keeps a single map from each name to the stack of
+symbols (innermost last) that are visible under that name, and for each opened scope
+an undo log of the names declared in it. Looking up a name or checking it for a
+conflict is therefore O(1) no matter how deeply the scopes are nested; closing a
+scope pops exactly the entries it pushed.
+"""
 class ScopeStack:
     def __init__(self, globalscope: Scope, capacity: int = default_capacity ) -> None:
-        self.stack = [globalscope]
+        self.stack = []
         self.innerstack = []
         self.globalscope = globalscope
         self.stack_capacity = capacity
-        self.repeat = 0
         self.loopnum = 0
+
+        # name -> visible symbols with that name, the innermost one last
+        self.table: dict[str, list[Symbol]] = {}
+        # for each opened scope, the names declared in it
+        self.undoLogs: list[list[str]] = []
+
+        self.stack.append(globalscope)
+        self.undoLogs.append([])
+        self.enter(globalscope)
     
     def get_current_scope(self) -> Scope:
         if not self.stack:
@@ -20,21 +38,36 @@ class ScopeStack:
     def open(self,scope:Scope) -> None:
         if(len(self.stack)>0):
              self.stack.append(scope)
+             self.undoLogs.append([])
+             self.enter(scope)
         else:
             raise OverflowError
         
     def close(self) -> None:
-        if(len(self.stack)>=0):
+        if(len(self.stack)>0):
              self.stack.pop()
+             for name in self.undoLogs.pop():
+                 symbols = self.table[name]
+                 symbols.pop()
+                 if not symbols:
+                     del self.table[name]
         else:
             raise RuntimeError
+
+    # To make the symbols already in a scope visible when it is opened.
+    def enter(self, scope: Scope) -> None:
+        for symbol in scope.symbols.values():
+            self.push(symbol)
+
+    def push(self, symbol: Symbol) -> None:
+        self.table.setdefault(symbol.name, []).append(symbol)
+        self.undoLogs[-1].append(symbol.name)
         
     
     def lookup(self, name: str) -> Optional[Symbol]:
-        for i in range(len(self.stack)):
-            looking_scope = self.stack[len(self.stack)-1-i]
-            if (looking_scope.containsKey(name)):
-                return looking_scope.get(name)
+        symbols = self.table.get(name)
+        if symbols:
+            return symbols[-1]
         return None
     
     def openLoop(self) -> None:
@@ -54,6 +87,7 @@ class ScopeStack:
     # To declare a symbol.
     def declare(self, symbol: Symbol) -> None:
         self.get_current_scope().declare(symbol)
+        self.push(symbol)
 
     # To check if this is a global scope.
     def isGlobalScope(self) -> bool:
@@ -64,11 +98,9 @@ class ScopeStack:
       # To find if there is a name conflict in the current scope.
     
     def findConflict(self, name: str) -> Optional[Symbol]:
-        if self.get_current_scope().containsKey(name):
-            self.repeat += 1
-            if(self.repeat>=2):
-                raise AttributeError("Cannot redefine!")
-            return self.get_current_scope().get(name)
+        symbol = self.lookup(name)
+        if symbol is not None and symbol.domain is self.get_current_scope():
+            return symbol
         return None
     
     def __enter__(self):
@@ -16,6 +16,7 @@ class FuncSymbol(Symbol):
         super().__init__(name, type)
         self.scope = scope
         self.para_type = []
+        self.defined = False
 
     def __str__(self) -> str:
         return "function %s : %s" % (self.name, str(self.type))
@@ -39,5 +40,5 @@ class FuncSymbol(Symbol):
     
     def define_function(self):
         if self.defined:
-            raise DecafFunctionDefinedTwiceError(self)
+            raise DecafFunctionDefinedTwiceError(self.name)
         self.defined = True
\ No newline at end of file
@@ -0,0 +1,269 @@
+from typing import Generator
+
+from frontend.ast.tree import *
+from frontend.ast.visitor import Visitor, walk
+from frontend.scope.globalscope import GlobalScopeType
+from frontend.scope.scopestack import ScopeStack
+from frontend.symbol.funcsymbol import FuncSymbol
+from frontend.symbol.varsymbol import VarSymbol
+from utils.error import *
+from utils.riscv import MAX_INT
+from utils.tac import tacop
+from utils.tac.temp import Temp
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacprog import TACProg
+
+from .tacgen import Handler, TACFuncEmitter, TACGen
+
+"""
+The fused front end: resolve symbols and translate the abstract syntax tree
+into three-address code in a single traversal.
+
+It produces the same TAC (and raises the same errors, in the same order) as running
+`Namer`, `Typer` and `TACGen` one after another, but walks the tree only once.
+Symbols live in the scope stack only and values are passed as the results of the
+visits, so nothing is stored in the `_attrs` of the AST nodes.
+"""
+
+# the visits walking children (see `walk`): they yield the children and get their values
+# sent back, and the visits of expressions return the temp holding their own value
+StmtVisit = Generator[Node, Optional[Temp], None]
+ExprVisit = Generator[Node, Optional[Temp], Temp]
+
+
+class FusedTACGen(Visitor[ScopeStack, Optional[Temp]]):
+    def __init__(self) -> None:
+        self.handler: Handler
+        # the emitter of the function being translated
+        self.mv: TACFuncEmitter
+
+    # Entry of this phase
+    def transform(self, program: Program) -> TACProg:
+        program.globalScope = GlobalScopeType()
+        ctx = ScopeStack(program.globalScope)
+        self.handler = Handler([])
+
+        walk(self, program, ctx)
+        return self.handler.visitEnd()
+
+    # Entry of the streaming mode: `open` once, then hand over the functions one at a time.
+    # The caller is responsible for checking that there is a main function.
+    def open(self) -> None:
+        self.ctx = ScopeStack(GlobalScopeType())
+        self.handler = Handler([])
+
+    def transformFunction(self, func: Function) -> Optional[TACFunc]:
+        """
+        Translate a single function, or return None if it is only a declaration.
+        Only its signature is remembered (in the global scope) once it's translated.
+        """
+        funcs = self.handler.labelManager.funcs
+        walk(self, func, self.ctx)
+        return funcs.pop() if funcs else None
+
+    def visitProgram(self, program: Program, ctx: ScopeStack) -> StmtVisit:
+        if not program.hasMainFunc():
+            raise DecafNoMainFuncError
+        for child in program:
+            yield child
+
+    def visitFunction(self, func: Function, ctx: ScopeStack) -> StmtVisit:
+        symbol = FuncSymbol(func.ident.value, func.ret_t.type, ctx.get_current_scope())
+        for param in func.parameterList:
+            symbol.addParaType(param.var_t.type)
+        potential_sym = ctx.findConflict(func.ident.value)
+        if potential_sym is None:
+            ctx.declare(symbol)
+            self.handler.labelManager.putFuncLabel(func.ident.value)
+        elif isinstance(potential_sym, FuncSymbol) and potential_sym.para_type == symbol.para_type:
+            symbol = potential_sym
+        else:
+            raise DecafDeclConflictError(func.ident.value)
+        if func.body is NULL:
+            return
+        symbol.define_function()
+
+        self.mv = self.handler.visitFunc(func.ident.value, len(func.parameterList))
+        with ctx.local():
+            for param in func.parameterList:
+                yield param
+            for stmt in func.body.children:
+                yield stmt
+        self.handler.labelManager.funcs.append(self.mv.visitEnd())
+
+    def visitParameter(self, param: Parameter, ctx: ScopeStack) -> None:
+        if ctx.findConflict(param.ident.value) is not None:
+            raise DecafDeclConflictError(param.ident.value)
+        symbol = VarSymbol(param.ident.value, param.var_t.type)
+        ctx.declare(symbol)
+        symbol.temp = self.mv.freshTemp()
+        self.mv.func.addTempArgs(symbol.temp)
+
+    def visitBlock(self, block: Block, ctx: ScopeStack) -> StmtVisit:
+        with ctx.local():
+            for child in block:
+                yield child
+
+    def visitReturn(self, stmt: Return, ctx: ScopeStack) -> StmtVisit:
+        value = yield stmt.expr
+        self.mv.visitReturn(value)
+
+    def visitIf(self, stmt: If, ctx: ScopeStack) -> StmtVisit:
+        mv = self.mv
+        cond = yield stmt.cond
+        skipLabel = mv.freshLabel()
+        if stmt.otherwise is NULL:
+            mv.visitCondBranch(tacop.CondBranchOp.BEQ, cond, skipLabel)
+            yield stmt.then
+            mv.visitLabel(skipLabel)
+        else:
+            exitLabel = mv.freshLabel()
+            mv.visitCondBranch(tacop.CondBranchOp.BEQ, cond, skipLabel)
+            yield stmt.then
+            mv.visitBranch(exitLabel)
+            mv.visitLabel(skipLabel)
+            yield stmt.otherwise
+            mv.visitLabel(exitLabel)
+
+    def visitWhile(self, stmt: While, ctx: ScopeStack) -> StmtVisit:
+        mv = self.mv
+        beginLabel = mv.freshLabel()
+        loopLabel = mv.freshLabel()
+        breakLabel = mv.freshLabel()
+        mv.openLoop(breakLabel, loopLabel)
+
+        mv.visitLabel(beginLabel)
+        cond = yield stmt.cond
+        mv.visitCondBranch(tacop.CondBranchOp.BEQ, cond, breakLabel)
+
+        with ctx.loop():
+            yield stmt.body
+        mv.visitLabel(loopLabel)
+        mv.visitBranch(beginLabel)
+        mv.visitLabel(breakLabel)
+        mv.closeLoop()
+
+    def visitFor(self, stmt: For, ctx: ScopeStack) -> StmtVisit:
+        mv = self.mv
+        beginLabel = mv.freshLabel()
+        loopLabel = mv.freshLabel()
+        breakLabel = mv.freshLabel()
+        with ctx.local():
+            yield stmt.init
+            mv.openLoop(breakLabel, loopLabel)
+            mv.visitLabel(beginLabel)
+            cond = yield stmt.cond
+            if cond is not None:
+                mv.visitCondBranch(tacop.CondBranchOp.BEQ, cond, breakLabel)
+            # `update` is emitted after the body, but checked before it (as the namer does)
+            self.checkNames(stmt.update, ctx)
+            with ctx.loop():
+                yield stmt.body
+            mv.visitLabel(loopLabel)
+            yield stmt.update
+            mv.visitBranch(beginLabel)
+            mv.visitLabel(breakLabel)
+            mv.closeLoop()
+
+    def checkNames(self, expr: Node, ctx: ScopeStack) -> None:
+        """
+        Raise the errors the namer would report for `expr`, without emitting any TAC.
+        """
+        stack = [expr]
+        while stack:
+            expr = stack.pop()
+            if isinstance(expr, Identifier):
+                self.visitIdentifier(expr, ctx)
+                continue
+            if isinstance(expr, IntLiteral):
+                if expr.value > MAX_INT:
+                    raise DecafBadIntValueError(expr.value)
+                continue
+            if isinstance(expr, Call):
+                func = ctx.lookup(expr.ident.value)
+                if func is None or not func.isFunc:
+                    raise DecafUndefinedFuncError(expr.ident.value)
+                if func.parameterNum != len(expr.argument_list):
+                    raise DecafBadFuncCallError(expr.ident.value)
+                stack.extend(reversed(expr.argument_list))
+                continue
+            stack.extend(reversed(list(expr)))
+
+    def visitBreak(self, stmt: Break, ctx: ScopeStack) -> None:
+        if not ctx.inLoop():
+            raise DecafBreakOutsideLoopError()
+        self.mv.visitBranch(self.mv.getBreakLabel())
+
+    def visitContinue(self, stmt: Continue, ctx: ScopeStack) -> None:
+        if not ctx.inLoop():
+            raise DecafContinueOutsideLoopError()
+        self.mv.visitBranch(self.mv.getContinueLabel())
+
+    def visitDeclaration(self, decl: Declaration, ctx: ScopeStack) -> StmtVisit:
+        if ctx.findConflict(decl.ident.value) is not None:
+            raise DecafDeclConflictError(decl.ident.value)
+        symbol = VarSymbol(decl.ident.value, decl.var_t.type)
+        ctx.declare(symbol)
+        temp = self.mv.freshTemp()
+        symbol.temp = temp
+        if decl.init_expr is not NULL:
+            value = yield decl.init_expr
+            self.mv.visitAssignment(temp, value)
+
+    def visitAssignment(self, expr: Assignment, ctx: ScopeStack) -> ExprVisit:
+        if not isinstance(expr.lhs, Identifier):
+            raise DecafSyntaxError('Invalid Assigment cause lhs of the expression is not a Idenfifier')
+        # the namer resolves the left hand side first
+        dst = self.visitIdentifier(expr.lhs, ctx)
+        src = yield expr.rhs
+        return self.mv.visitAssignment(dst, src)
+
+    def visitUnary(self, expr: Unary, ctx: ScopeStack) -> ExprVisit:
+        operand = yield expr.operand
+        return self.mv.visitUnary(TACGen.unaryOps[expr.op], operand)
+
+    def visitBinary(self, expr: Binary, ctx: ScopeStack) -> ExprVisit:
+        lhs = yield expr.lhs
+        rhs = yield expr.rhs
+        return self.mv.visitBinary(TACGen.binaryOps[expr.op], lhs, rhs)
+
+    def visitCondExpr(self, expr: ConditionExpression, ctx: ScopeStack) -> ExprVisit:
+        mv = self.mv
+        cond = yield expr.cond
+        skipLabel = mv.freshLabel()
+        exitLabel = mv.freshLabel()
+        tempValue = mv.freshTemp()
+        mv.visitCondBranch(tacop.CondBranchOp.BEQ, cond, skipLabel)
+        value = yield expr.then
+        mv.visitAssignment(tempValue, value)
+        mv.visitBranch(exitLabel)
+        mv.visitLabel(skipLabel)
+        value = yield expr.otherwise
+        mv.visitAssignment(tempValue, value)
+        mv.visitLabel(exitLabel)
+        return tempValue
+
+    def visitCall(self, call: Call, ctx: ScopeStack) -> ExprVisit:
+        func = ctx.lookup(call.ident.value)
+        if func is None or not func.isFunc:
+            raise DecafUndefinedFuncError(call.ident.value)
+        if func.parameterNum != len(call.argument_list):
+            raise DecafBadFuncCallError(call.ident.value)
+        args = []
+        for arg in call.argument_list:
+            value = yield arg
+            args.append(value)
+        ret = self.mv.freshTemp()
+        self.mv.visitCall(self.handler.labelManager.getFuncLabel(call.ident.value), ret, args)
+        return ret
+
+    def visitIdentifier(self, ident: Identifier, ctx: ScopeStack) -> Temp:
+        symbol = ctx.lookup(ident.value)
+        if symbol is None:
+            raise DecafUndefinedVarError(ident.value)
+        return symbol.temp
+
+    def visitIntLiteral(self, expr: IntLiteral, ctx: ScopeStack) -> Temp:
+        if expr.value > MAX_INT:
+            raise DecafBadIntValueError(expr.value)
+        return self.mv.visitLoad(expr.value)
@@ -1,8 +1,10 @@
+from typing import Iterator
+
 from frontend.ast.node import T, Optional
 from frontend.ast.tree import T, Call, Function, Optional
 from frontend.ast import node
 from frontend.ast.tree import *
-from frontend.ast.visitor import T, Visitor
+from frontend.ast.visitor import T, Visitor, walk
 from frontend.symbol.varsymbol import VarSymbol
 from frontend.type.array import ArrayType
 from utils.label.funclabel import *
@@ -53,7 +55,7 @@ class TACFuncEmitter(TACVisitor):
         self, entry: FuncLabel, numArgs: int, labelManager: LabelManager,
     ) -> None:
         self.labelManager = labelManager
-        self.func = TACFunc(entry, numArgs)
+        self.func = TACFunc(entry, numArgs, labelManager)
         self.visitLabel(entry)
         self.nextTempId = 0
         self.continueLabelStack = []
@@ -153,7 +155,7 @@ class Handler:
         self.labelManager = LabelManager()
         for func in funcs:
             self.funcs.append(func)
-            self.labelManager.getFuncLabel(func.ident.value)
+            self.labelManager.putFuncLabel(func.ident.value)
 
     def visitMainFunc(self) -> TACFuncEmitter:
         entry = MAIN_LABEL
@@ -167,27 +169,52 @@ class Handler:
         return TACProg(self.labelManager.funcs)
 
 class TACGen(Visitor[TACFuncEmitter, None]):
+    unaryOps = {
+        node.UnaryOp.Neg: tacop.TacUnaryOp.NEG,
+        node.UnaryOp.BitNot: tacop.TacUnaryOp.NOT,
+        node.UnaryOp.LogicNot: tacop.TacUnaryOp.SEQZ,
+        # You can add unary operations here.
+    }
+
+    binaryOps = {
+        node.BinaryOp.Add: tacop.TacBinaryOp.ADD,
+        node.BinaryOp.Sub : tacop.TacBinaryOp.SUB,
+        node.BinaryOp.LogicOr: tacop.TacBinaryOp.OR,
+        node.BinaryOp.LogicAnd :tacop.TacBinaryOp.AND,
+        node.BinaryOp.Div : tacop.TacBinaryOp.DIV,
+        node.BinaryOp.Mul : tacop.TacBinaryOp.MUL,
+        node.BinaryOp.Mod : tacop.TacBinaryOp.REM,
+        node.BinaryOp.LE : tacop.TacBinaryOp.LEQ,
+        node.BinaryOp.NE : tacop.TacBinaryOp.NEQ,
+        node.BinaryOp.EQ : tacop.TacBinaryOp.EQU,
+        node.BinaryOp.LT : tacop.TacBinaryOp.SLT,
+        node.BinaryOp.GE : tacop.TacBinaryOp.GEQ,
+        node.BinaryOp.GT : tacop.TacBinaryOp.SGT,
+        # You can add binary operations here.
+    }
+
     def __init__(self) -> None:
         pass
 
     # Entry of this phase
     def transform(self, program: Program) -> TACProg:
         handler = Handler(program.functions().values())
-        for funcName, astFunc in program.functions().items():
-            if astFunc.body is NULL:
+        # functions are lowered in the order they are defined
+        for astFunc in program:
+            if not isinstance(astFunc, Function) or astFunc.body is NULL:
                 continue
             argnum = len(astFunc.parameterList)
-            emitter = handler.visitFunc(FuncLabel(funcName), argnum)
-            astFunc.accept(self, emitter)
-            emitter.visitEnd()
+            emitter = handler.visitFunc(astFunc.ident.value, argnum)
+            walk(self, astFunc, emitter)
+            handler.labelManager.funcs.append(emitter.visitEnd())
         return handler.visitEnd()
 
-    def visitBlock(self, block: Block, mv: TACFuncEmitter) -> None:
+    def visitBlock(self, block: Block, mv: TACFuncEmitter) -> Iterator[Node]:
         for child in block:
-            child.accept(self, mv)
+            yield child
 
-    def visitReturn(self, stmt: Return, mv: TACFuncEmitter) -> None:
-        stmt.expr.accept(self, mv)
+    def visitReturn(self, stmt: Return, mv: TACFuncEmitter) -> Iterator[Node]:
+        yield stmt.expr
         mv.visitReturn(stmt.expr.getattr("val"))
 
     def visitBreak(self, stmt: Break, mv: TACFuncEmitter) -> None:
@@ -199,7 +226,7 @@ class TACGen(Visitor[TACFuncEmitter, None]):
         """
         ident.setattr('val',ident.getattr('symbol').temp)
 
-    def visitDeclaration(self, decl: Declaration, mv: TACFuncEmitter) -> None:
+    def visitDeclaration(self, decl: Declaration, mv: TACFuncEmitter) -> Iterator[Node]:
         """
         1. Get the 'symbol' attribute of decl.
         2. Use mv.freshTemp to get a new temp variable for this symbol.
@@ -209,27 +236,27 @@ class TACGen(Visitor[TACFuncEmitter, None]):
         temp = mv.freshTemp()
         sym.temp = temp
         if decl.init_expr is not NULL:
-            decl.init_expr.accept(self, mv)
+            yield decl.init_expr
             mv.visitAssignment(temp, decl.init_expr.getattr('val'))
 
-    def visitAssignment(self, expr: Assignment, mv: TACFuncEmitter) -> None:
+    def visitAssignment(self, expr: Assignment, mv: TACFuncEmitter) -> Iterator[Node]:
         """
         1. Visit the right hand side of expr, and get the temp variable of left hand side.
         2. Use mv.visitAssignment to emit an assignment instruction.
         3. Set the 'val' attribute of expr as the value of assignment instruction.
         """
-        expr.rhs.accept(self, mv)
-        expr.lhs.accept(self, mv)
+        yield expr.rhs
+        yield expr.lhs
         expr.setattr('val',mv.visitAssignment(expr.lhs.getattr('val'),expr.rhs.getattr('val')))
 
-    def visitIf(self, stmt: If, mv: TACFuncEmitter) -> None:
-        stmt.cond.accept(self, mv)
+    def visitIf(self, stmt: If, mv: TACFuncEmitter) -> Iterator[Node]:
+        yield stmt.cond
         if stmt.otherwise is NULL:
             skipLabel = mv.freshLabel()
             mv.visitCondBranch(
                 tacop.CondBranchOp.BEQ, stmt.cond.getattr("val"), skipLabel
             )
-            stmt.then.accept(self, mv)
+            yield stmt.then
             mv.visitLabel(skipLabel)
         else:
             skipLabel = mv.freshLabel()
@@ -237,23 +264,23 @@ class TACGen(Visitor[TACFuncEmitter, None]):
             mv.visitCondBranch(
                 tacop.CondBranchOp.BEQ, stmt.cond.getattr("val"), skipLabel
             )
-            stmt.then.accept(self, mv)
+            yield stmt.then
             mv.visitBranch(exitLabel)
             mv.visitLabel(skipLabel)
-            stmt.otherwise.accept(self, mv)
+            yield stmt.otherwise
             mv.visitLabel(exitLabel)
 
-    def visitWhile(self, stmt: While, mv: TACFuncEmitter) -> None:
+    def visitWhile(self, stmt: While, mv: TACFuncEmitter) -> Iterator[Node]:
         beginLabel = mv.freshLabel()
         loopLabel = mv.freshLabel()
         breakLabel = mv.freshLabel()
         mv.openLoop(breakLabel, loopLabel)
 
         mv.visitLabel(beginLabel)
-        stmt.cond.accept(self, mv)
+        yield stmt.cond
         mv.visitCondBranch(tacop.CondBranchOp.BEQ, stmt.cond.getattr("val"), breakLabel)
 
-        stmt.body.accept(self, mv)
+        yield stmt.body
         mv.visitLabel(loopLabel)
         mv.visitBranch(beginLabel)
         mv.visitLabel(breakLabel)
@@ -262,7 +289,7 @@ class TACGen(Visitor[TACFuncEmitter, None]):
     def visitContinue(self, stmt: Continue, mv: TACFuncEmitter) -> None:
         mv.visitBranch(mv.getContinueLabel())
 
-    def visitFor(self, stmt: For, mv: TACFuncEmitter) -> None:
+    def visitFor(self, stmt: For, mv: TACFuncEmitter) -> Iterator[Node]:
         """
         _T1 = 0
         _T0 = _T1                 # int i = 0;
@@ -280,64 +307,43 @@ class TACGen(Visitor[TACFuncEmitter, None]):
         beginLabel = mv.freshLabel()
         loopLabel = mv.freshLabel()
         breakLabel = mv.freshLabel()
-        stmt.init.accept(self, mv)
+        yield stmt.init
         mv.openLoop(breakLabel, loopLabel)
         mv.visitLabel(beginLabel)
-        stmt.cond.accept(self, mv)
+        yield stmt.cond
         if stmt.cond.getattr("val") is not None:
             mv.visitCondBranch(tacop.CondBranchOp.BEQ, stmt.cond.getattr("val"), breakLabel)
-        stmt.body.accept(self, mv)
+        yield stmt.body
         mv.visitLabel(loopLabel)
-        stmt.update.accept(self, mv)
+        yield stmt.update
         mv.visitBranch(beginLabel)
         mv.visitLabel(breakLabel)
         mv.closeLoop()
 
-    def visitUnary(self, expr: Unary, mv: TACFuncEmitter) -> None:
-        expr.operand.accept(self, mv)
+    def visitUnary(self, expr: Unary, mv: TACFuncEmitter) -> Iterator[Node]:
+        yield expr.operand
 
-        op = {
-            node.UnaryOp.Neg: tacop.TacUnaryOp.NEG,
-            node.UnaryOp.BitNot: tacop.TacUnaryOp.NOT,
-            node.UnaryOp.LogicNot: tacop.TacUnaryOp.SEQZ,
-            
-            # You can add unary operations here.
-        }[expr.op]
+        op = self.unaryOps[expr.op]
         expr.setattr("val", mv.visitUnary(op, expr.operand.getattr("val")))
 
-    def visitBinary(self, expr: Binary, mv: TACFuncEmitter) -> None:
-        expr.lhs.accept(self, mv)
-        expr.rhs.accept(self, mv)
-
-        op = {
-            node.BinaryOp.Add: tacop.TacBinaryOp.ADD,
-            node.BinaryOp.Sub : tacop.TacBinaryOp.SUB,
-            node.BinaryOp.LogicOr: tacop.TacBinaryOp.OR,
-            node.BinaryOp.LogicAnd :tacop.TacBinaryOp.AND,
-            node.BinaryOp.Div : tacop.TacBinaryOp.DIV,
-            node.BinaryOp.Mul : tacop.TacBinaryOp.MUL,
-            node.BinaryOp.Mod : tacop.TacBinaryOp.REM,
-            node.BinaryOp.LE : tacop.TacBinaryOp.LEQ,
-            node.BinaryOp.NE : tacop.TacBinaryOp.NEQ,
-            node.BinaryOp.EQ : tacop.TacBinaryOp.EQU,
-            node.BinaryOp.LT : tacop.TacBinaryOp.SLT,
-            node.BinaryOp.GE : tacop.TacBinaryOp.GEQ,
-            node.BinaryOp.GT : tacop.TacBinaryOp.SGT,
-            # You can add binary operations here.
-        }[expr.op]
+    def visitBinary(self, expr: Binary, mv: TACFuncEmitter) -> Iterator[Node]:
+        yield expr.lhs
+        yield expr.rhs
+
+        op = self.binaryOps[expr.op]
         expr.setattr(
             "val", mv.visitBinary(op, expr.lhs.getattr("val"), expr.rhs.getattr("val"))
         )
   
-    def visitFunction(self, func: Function, mv: TACFuncEmitter) -> None:
+    def visitFunction(self, func: Function, mv: TACFuncEmitter) -> Iterator[Node]:
         for param in func.parameterList:
-            param.accept(self, mv)
-        func.body.accept(self, mv)
+            yield param
+        yield func.body
     
-    def visitCall(self, call: Call, mv: TACFuncEmitter) -> None:
+    def visitCall(self, call: Call, mv: TACFuncEmitter) -> Iterator[Node]:
         param_temp = []
         for arg in call.argument_list:
-            arg.accept(self, mv)
+            yield arg
             if not (arg.getattr('val')):
                 raise SyntaxError('Error in arg fetching!')
             param_temp.append(arg.getattr('val'))
@@ -346,21 +352,21 @@ class TACGen(Visitor[TACFuncEmitter, None]):
         func_label = mv.labelManager.getFuncLabel(call.ident.value)
         mv.visitCall(func_label, ret, param_temp)
     
-    def visitParameter(self, that: Parameter, mv: TACFuncEmitter) -> None:
-        temp = self.visitDeclaration(that, mv)
-        mv.func.addTempArgs(temp)
+    def visitParameter(self, that: Parameter, mv: TACFuncEmitter) -> Iterator[Node]:
+        yield from self.visitDeclaration(that, mv)
+        mv.func.addTempArgs(that.getattr('symbol').temp)
 
-    def visitCondExpr(self, expr: ConditionExpression, mv: TACFuncEmitter) -> None:
-        expr.cond.accept(self, mv)
+    def visitCondExpr(self, expr: ConditionExpression, mv: TACFuncEmitter) -> Iterator[Node]:
+        yield expr.cond
         skipLabel = mv.freshLabel()
         exitLabel = mv.freshLabel()
         tempValue = mv.freshTemp()
         mv.visitCondBranch(tacop.CondBranchOp.BEQ, expr.cond.getattr("val"), skipLabel)
-        expr.then.accept(self, mv)
+        yield expr.then
         mv.visitAssignment(tempValue, expr.then.getattr("val"))
         mv.visitBranch(exitLabel)
         mv.visitLabel(skipLabel)
-        expr.otherwise.accept(self, mv)
+        yield expr.otherwise
         mv.visitAssignment(tempValue, expr.otherwise.getattr("val"))
         mv.visitLabel(exitLabel)
         expr.setattr('val', tempValue)
@@ -1,9 +1,9 @@
-from typing import Protocol, TypeVar, cast
+from typing import Iterator, Protocol, TypeVar, cast
 
 from frontend.ast.node import Node, NullType
 from frontend.ast.tree import *
-from frontend.ast.visitor import RecursiveVisitor, Visitor
-from frontend.scope.globalscope import GlobalScope
+from frontend.ast.visitor import RecursiveVisitor, Visitor, walk
+from frontend.scope.globalscope import GlobalScope, GlobalScopeType
 from frontend.scope.scope import Scope, ScopeKind
 from frontend.scope.scopestack import ScopeStack
 from frontend.symbol.funcsymbol import FuncSymbol
@@ -27,48 +27,53 @@ class Namer(Visitor[ScopeStack, None]):
     # Entry of this phase
     def transform(self, program: Program) -> Program:
         # Global scope. You don't have to consider it until Step 6.
-        program.globalScope = GlobalScope
+        # A fresh one per program, so that several programs can be compiled in one process.
+        program.globalScope = GlobalScopeType()
         ctx = ScopeStack(program.globalScope)
 
-        program.accept(self, ctx)
+        walk(self, program, ctx)
         return program
 
-    def visitFunction(self, func: Function, ctx: ScopeStack) -> None:
+    def visitFunction(self, func: Function, ctx: ScopeStack) -> Iterator[Node]:
         symbol = FuncSymbol(func.ident.value, func.ret_t.type, ctx.get_current_scope())
         for param in func.parameterList:
             symbol.addParaType(param.var_t.type)
-        potential_sym = ctx.lookup(func.ident.value)
-        if ctx.findConflict(func.ident.value) and not (isinstance(potential_sym, FuncSymbol) and potential_sym == symbol):
+        potential_sym = ctx.findConflict(func.ident.value)
+        if potential_sym is None:
+            ctx.declare(symbol)
+        elif isinstance(potential_sym, FuncSymbol) and potential_sym.para_type == symbol.para_type:
+            # a forward declaration (or the definition) of an already declared function
+            symbol = potential_sym
+        else:
             raise DecafDeclConflictError(func.ident.value)
-        ctx.declare(symbol)
         func.setattr('symbol', symbol)
-        if func.body is None:
+        if func.body is NULL:
             return
         symbol.define_function()
         with ctx.local():
             for parameter in func.parameterList:
-                parameter.accept(self, ctx)
+                yield parameter
             for stmt in func.body.children:
-                stmt.accept(self, ctx)
+                yield stmt
 
 
-    def visitBlock(self, block: Block, ctx :ScopeStack) -> None:
+    def visitBlock(self, block: Block, ctx :ScopeStack) -> Iterator[Node]:
         with ctx.local(): 
           for child in block:
-              child.accept(self, ctx)
+              yield child
 
-    def visitReturn(self, stmt: Return, ctx :ScopeStack) -> None:
-        stmt.expr.accept(self, ctx)
+    def visitReturn(self, stmt: Return, ctx :ScopeStack) -> Iterator[Node]:
+        yield stmt.expr
     
-    def visitProgram(self, program: Program, ctx :ScopeStack) -> None:
+    def visitProgram(self, program: Program, ctx :ScopeStack) -> Iterator[Node]:
         # Check if the 'main' function is missing
         if not program.hasMainFunc():
             raise DecafNoMainFuncError
         for children in program:
             assert ctx.isGlobalScope()
-            children.accept(self, ctx)
+            yield children
     
-    def visitFor(self, stmt: For, ctx :ScopeStack) -> None:
+    def visitFor(self, stmt: For, ctx :ScopeStack) -> Iterator[Node]:
         """
         1. Open a local scope for stmt.init.
         2. Visit stmt.init, stmt.cond, stmt.update.
@@ -77,24 +82,25 @@ class Namer(Visitor[ScopeStack, None]):
         5. Close the loop and the local scope.
         """
         with ctx.local():
-            stmt.init.accept(self, ctx)
-            stmt.cond.accept(self, ctx)
-            stmt.update.accept(self, ctx)
+            yield stmt.init
+            yield stmt.cond
+            yield stmt.update
             with ctx.loop():
-                stmt.body.accept(self, ctx)
+                yield stmt.body
 
     
-    def visitIf(self, stmt: If, ctx :ScopeStack) -> None:
-        stmt.cond.accept(self, ctx)
-        stmt.then.accept(self, ctx)
+    def visitIf(self, stmt: If, ctx :ScopeStack) -> Iterator[Node]:
+        yield stmt.cond
+        yield stmt.then
 
         # check if the else branch exists
         if not stmt.otherwise is NULL:
-            stmt.otherwise.accept(self, ctx)
+            yield stmt.otherwise
 
-    def visitWhile(self, stmt: While, ctx :ScopeStack) -> None:
-        stmt.cond.accept(self, ctx)
-        stmt.body.accept(self, ctx)
+    def visitWhile(self, stmt: While, ctx :ScopeStack) -> Iterator[Node]:
+        yield stmt.cond
+        with ctx.loop():
+            yield stmt.body
 
     def visitBreak(self, stmt: Break, ctx :ScopeStack) -> None:
         """
@@ -117,51 +123,57 @@ class Namer(Visitor[ScopeStack, None]):
         1. Refer to the implementation of visitBreak.
         """
         if not ctx.inLoop():
-            raise DecafBreakOutsideLoopError()
+            raise DecafContinueOutsideLoopError()
 
 
-    def visitDeclaration(self, decl: Declaration, ctx :ScopeStack) -> None:
+    def visitDeclaration(self, decl: Declaration, ctx :ScopeStack) -> Iterator[Node]:
         """
         1. Use ctx.lookup to find if a variable with the same name has been declared.
         2. If not, build a new VarSymbol, and put it into the current scope using ctx.declare.
         3. Set the 'symbol' attribute of decl.
         4. If there is an initial value, visit it.
         """
-        
         if ctx.findConflict(decl.ident.value) is not None:
-            symbol = ctx.findConflict(decl.ident.value)
-            newvar = VarSymbol(decl.ident.value, decl.var_t.type)
-            ctx.declare(newvar)
-            decl.setattr('symbol', newvar)
-        else:
-            symbol = ctx.lookup(decl.ident.value)
-            if(decl.getattr('symbol') is None):
-                newvar = VarSymbol(decl.ident.value, decl.var_t.type)
-                ctx.declare(newvar)
-                decl.setattr('symbol', newvar)
-        if symbol is None:
-            newvar = VarSymbol(decl.ident.value, decl.var_t.type)
-            ctx.declare(newvar)
-            decl.setattr('symbol', newvar)
+            raise DecafDeclConflictError(decl.ident.value)
+        newvar = VarSymbol(decl.ident.value, decl.var_t.type)
+        ctx.declare(newvar)
+        decl.setattr('symbol', newvar)
         if decl.init_expr is not NULL:
-            decl.init_expr.accept(self, ctx)
-
-    def visitAssignment(self, expr: Assignment, ctx :ScopeStack) -> None:
+            yield decl.init_expr
+
+    def visitParameter(self, param: Parameter, ctx: ScopeStack) -> None:
+        if ctx.findConflict(param.ident.value) is not None:
+            raise DecafDeclConflictError(param.ident.value)
+        newvar = VarSymbol(param.ident.value, param.var_t.type)
+        ctx.declare(newvar)
+        param.setattr('symbol', newvar)
+
+    def visitCall(self, call: Call, ctx: ScopeStack) -> Iterator[Node]:
+        func = ctx.lookup(call.ident.value)
+        if func is None or not func.isFunc:
+            raise DecafUndefinedFuncError(call.ident.value)
+        if func.parameterNum != len(call.argument_list):
+            raise DecafBadFuncCallError(call.ident.value)
+        call.ident.setattr('symbol', func)
+        for arg in call.argument_list:
+            yield arg
+
+    def visitAssignment(self, expr: Assignment, ctx :ScopeStack) -> Iterator[Node]:
         if not isinstance(expr.lhs, Identifier):
             raise DecafSyntaxError('Invalid Assigment cause lhs of the expression is not a Idenfifier')
-        self.visitBinary(expr, ctx)
+        yield from self.visitBinary(expr, ctx)
 
-    def visitUnary(self, expr: Unary, ctx :ScopeStack) -> None:
-        expr.operand.accept(self, ctx)
+    def visitUnary(self, expr: Unary, ctx :ScopeStack) -> Iterator[Node]:
+        yield expr.operand
 
-    def visitBinary(self, expr: Binary, ctx :ScopeStack) -> None:
-        expr.lhs.accept(self, ctx)
-        expr.rhs.accept(self, ctx)
+    def visitBinary(self, expr: Binary, ctx :ScopeStack) -> Iterator[Node]:
+        yield expr.lhs
+        yield expr.rhs
 
-    def visitCondExpr(self, expr: ConditionExpression, ctx :ScopeStack) -> None:
-        expr.cond.accept(self, ctx)
-        expr.then.accept(self, ctx)
-        expr.otherwise.accept(self, ctx)
+    def visitCondExpr(self, expr: ConditionExpression, ctx :ScopeStack) -> Iterator[Node]:
+        yield expr.cond
+        yield expr.then
+        yield expr.otherwise
 
     def visitIdentifier(self, ident: Identifier, ctx :ScopeStack) -> None:
         """
@@ -171,7 +183,7 @@ class Namer(Visitor[ScopeStack, None]):
         """
         symbol = ctx.lookup(ident.value)
         if symbol is None:
-            raise DecafUndefinedFuncError('Invalid behavior because identifier is not defined')
+            raise DecafUndefinedVarError(ident.value)
         ident.setattr('symbol',symbol)
 
     def visitIntLiteral(self, expr: IntLiteral, ctx :ScopeStack) -> None:
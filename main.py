@@ -1,18 +1,14 @@
+from __future__ import annotations
+
 import argparse
 import sys
+from typing import TYPE_CHECKING
 
-from backend.asm import Asm
-from backend.reg.bruteregalloc import BruteRegAlloc
-from backend.riscv.riscvasmemitter import RiscvAsmEmitter
-from frontend.ast.tree import Program
-from frontend.lexer import lexer
-from frontend.parser import parser
-from frontend.tacgen.tacgen import TACGen
-from frontend.typecheck.namer import Namer
-from frontend.typecheck.typer import Typer
-from utils.printtree import TreePrinter
-from utils.riscv import Riscv
-from utils.tac.tacprog import TACProg
+# Each stage imports what it needs when it runs, so `--parse` never loads the back end
+# and `--tac` never loads the RISC-V code generator.
+if TYPE_CHECKING:
+    from frontend.ast.tree import Program
+    from utils.tac.tacprog import TACProg
 
 
 def parseArgs():
@@ -21,6 +17,32 @@ def parseArgs():
     parser.add_argument("--parse", action="store_true", help="output parsed AST")
     parser.add_argument("--tac", action="store_true", help="output transformed TAC")
     parser.add_argument("--riscv", action="store_true", help="output generated RISC-V")
+    parser.add_argument(
+        "--fused",
+        action="store_true",
+        help="resolve names and generate TAC in a single pass over the AST",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="compile and output one function at a time (implies --fused for --tac/--riscv)",
+    )
+    parser.add_argument(
+        "-O", dest="opt", type=int, choices=[0, 1, 2], default=0, help="optimization level"
+    )
+    parser.add_argument(
+        "--passes",
+        type=lambda s: [name for name in s.split(",") if name],
+        help="run these comma-separated optimization passes instead of an -O pipeline",
+    )
+    parser.add_argument(
+        "--print-passes", action="store_true", help="print the optimization pipeline to stderr"
+    )
+    parser.add_argument(
+        "--pass-stats",
+        action="store_true",
+        help="print the IR size change and time of every optimization pass to stderr",
+    )
     return parser.parse_args()
 
 
@@ -31,6 +53,9 @@ def readCode(fileName):
 
 # The parser stage: MiniDecaf code -> Abstract syntax tree
 def step_parse(args: argparse.Namespace):
+    from frontend.lexer import lexer
+    from frontend.parser import parser
+
     code = readCode(args.input)
     r: Program = parser.parse(code, lexer=lexer)
 
@@ -43,7 +68,16 @@ def step_parse(args: argparse.Namespace):
 
 
 # IR generation stage: Abstract syntax tree -> Three-address code
-def step_tac(p: Program):
+def step_tac(p: Program, fused: bool = False):
+    if fused:
+        from frontend.tacgen.fusedtacgen import FusedTACGen
+
+        return FusedTACGen().transform(p)
+
+    from frontend.tacgen.tacgen import TACGen
+    from frontend.typecheck.namer import Namer
+    from frontend.typecheck.typer import Typer
+
     namer = Namer()
     p = namer.transform(p)
     typer = Typer()
@@ -53,13 +87,89 @@ def step_tac(p: Program):
     return tac_prog
 
 
+# Optimization stage: Three-address code -> Three-address code
+# None when there is nothing to run (-O0 and no --passes), so the optimizer isn't even loaded
+def make_pass_manager(args: argparse.Namespace):
+    if args.opt == 0 and not args.passes:
+        if args.print_passes:
+            print("passes: (none)", file=sys.stderr)
+        return None
+
+    from backend.opt import buildPassManager
+
+    pm = buildPassManager(args.opt, args.passes, sys.stderr if args.pass_stats else None)
+    if args.print_passes:
+        print("passes:", pm.describe(), file=sys.stderr)
+    return pm
+
+
+def step_opt(p: TACProg, args: argparse.Namespace):
+    pm = make_pass_manager(args)
+    if pm is not None:
+        pm.run(p)
+    return p
+
+
 # Target code generation stage: Three-address code -> RISC-V assembly code
-def step_asm(p: TACProg):
-    riscvAsmEmitter = RiscvAsmEmitter(Riscv.AllocatableRegs, Riscv.CallerSaved)
+def step_asm(p: TACProg, args: argparse.Namespace):
+    from backend.asm import Asm
+    from backend.reg.bruteregalloc import BruteRegAlloc
+    from backend.riscv.riscvasmemitter import RiscvAsmEmitter
+    from utils.riscv import Riscv
+
+    riscvAsmEmitter = RiscvAsmEmitter(Riscv.AllocatableRegs, Riscv.CallerSaved, args.opt >= 2)
     asm = Asm(riscvAsmEmitter, BruteRegAlloc(riscvAsmEmitter))
     prog = asm.transform(p)
     return prog
 
+# Streaming mode: each function is parsed, lowered to TAC and (for --riscv) to assembly,
+# and written out before the next one is read, so memory does not grow with the program.
+def step_stream(args: argparse.Namespace):
+    from frontend.lexer import lexer
+    from frontend.parser import parser
+    from frontend.parser.stream import declaresMain, parseFunctions
+    from frontend.tacgen.fusedtacgen import FusedTACGen
+    from utils.error import DecafNoMainFuncError
+
+    code = readCode(args.input)
+    if not declaresMain(code, lexer):
+        raise DecafNoMainFuncError
+
+    tacgen = FusedTACGen()
+    tacgen.open()
+    # only function passes can run here, as the rest of the program isn't known yet
+    pm = make_pass_manager(args)
+    if args.riscv:
+        from backend.asm import Asm
+        from backend.reg.bruteregalloc import BruteRegAlloc
+        from backend.riscv.riscvasmemitter import RiscvAsmEmitter
+        from utils.riscv import Riscv
+
+        riscvAsmEmitter = RiscvAsmEmitter(Riscv.AllocatableRegs, Riscv.CallerSaved, args.opt >= 2)
+        asm = Asm(riscvAsmEmitter, BruteRegAlloc(riscvAsmEmitter))
+
+    for func in parseFunctions(code, lexer):
+        # after a syntax error, keep parsing only to report the remaining ones
+        if parser.error_stack:
+            continue
+        tacFunc = tacgen.transformFunction(func)
+        if tacFunc is None:
+            continue
+        if pm is not None:
+            pm.runOnFunction(tacFunc)
+        if args.riscv:
+            asm.transformFunc(tacFunc)
+            riscvAsmEmitter.printer.flushTo(sys.stdout)
+        else:
+            tacFunc.printTo()
+
+    errors = parser.error_stack
+    if errors:
+        print("\n".join(map(str, errors)), file=sys.stderr)
+        exit(1)
+    if args.riscv:
+        print()
+
 # hope all of you happiness
 # enjoy potato chips
 
@@ -71,20 +181,24 @@ def main():
         return r
 
     def _tac():
-        tac = step_tac(_parse())
-        return tac
+        tac = step_tac(_parse(), args.fused)
+        return step_opt(tac, args)
 
     def _asm():
-        asm = step_asm(_tac())
+        asm = step_asm(_tac(), args)
         return asm
 
-    if args.riscv:
+    if args.stream and (args.riscv or args.tac):
+        step_stream(args)
+    elif args.riscv:
         prog = _asm()
         print(prog)
     elif args.tac:
         prog = _tac()
         prog.printTo()
     elif args.parse:
+        from utils.printtree import TreePrinter
+
         prog = _parse()
         printer = TreePrinter(indentLen=2)
         printer.work(prog)
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rvsim import run
+
+"""
+Fixtures shared by the tests: `compiler` runs main.py on a source (as a user would, so
+that every test starts from fresh parser and scope state), `execute` compiles to RISC-V
+and runs the result in the simulator of rvsim.py.
+"""
+
+
+class Compiler:
+    def __init__(self, tmpPath) -> None:
+        self.tmpPath = tmpPath
+        self.count = 0
+
+    def __call__(self, source: str, *flags: str, check: bool = True) -> subprocess.CompletedProcess:
+        self.count += 1
+        path = self.tmpPath / ("input%d.c" % self.count)
+        path.write_text(source)
+        result = subprocess.run(
+            [sys.executable, os.path.join(ROOT, "main.py"), "--input", str(path), *flags],
+            capture_output=True,
+            text=True,
+            cwd=ROOT,
+        )
+        if check:
+            assert result.returncode == 0, result.stderr
+        return result
+
+
+@pytest.fixture
+def compiler(tmp_path) -> Compiler:
+    return Compiler(tmp_path)
+
+
+@pytest.fixture
+def execute(compiler):
+    # the value main returns, and the stack it used
+    def execute(source: str, *flags: str) -> tuple[int, int]:
+        value, _, stack = run(compiler(source, "--riscv", *flags).stdout)
+        return value, stack
+
+    return execute
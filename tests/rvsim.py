@@ -0,0 +1,167 @@
+import re
+
+"""
+A small RV32IM simulator for the assembly the compiler emits, so that the tests can run
+the programs they compile (there's no RISC-V toolchain to rely on).
+
+run() executes from `main` until it returns, and gives back a0 (the exit code of the
+program), the number of instructions executed and the deepest the stack went (in bytes).
+"""
+
+MASK = 0xFFFFFFFF
+STACK_TOP = 0x7FFF0000
+
+REGS = {
+    name: i
+    for i, name in enumerate(
+        "zero ra sp gp tp t0 t1 t2 s0 s1 a0 a1 a2 a3 a4 a5 a6 a7 "
+        "s2 s3 s4 s5 s6 s7 s8 s9 s10 s11 t3 t4 t5 t6".split()
+    )
+}
+REGS["fp"] = REGS["s0"]
+REGS["x0"] = REGS["zero"]
+
+
+class StepLimitExceeded(Exception):
+    pass
+
+
+def signed(x: int) -> int:
+    x &= MASK
+    return x - (1 << 32) if x & 0x80000000 else x
+
+
+# C division and remainder: truncating, with the RISC-V results for the undefined cases
+def cDiv(x: int, y: int) -> int:
+    if y == 0:
+        return -1
+    q = abs(x) // abs(y)
+    return signed(q if (x < 0) == (y < 0) else -q)
+
+
+def cRem(x: int, y: int) -> int:
+    if y == 0:
+        return x
+    r = abs(x) % abs(y)
+    return signed(r if x >= 0 else -r)
+
+
+BINARY = {
+    "add": lambda x, y: x + y,
+    "sub": lambda x, y: x - y,
+    "mul": lambda x, y: x * y,
+    "mulh": lambda x, y: (x * y) >> 32,
+    "mulhu": lambda x, y: ((x & MASK) * (y & MASK)) >> 32,
+    "div": cDiv,
+    "rem": cRem,
+    "divu": lambda x, y: (x & MASK) // (y & MASK) if y & MASK else -1,
+    "remu": lambda x, y: (x & MASK) % (y & MASK) if y & MASK else x,
+    "slt": lambda x, y: int(x < y),
+    "sgt": lambda x, y: int(x > y),
+    "sltu": lambda x, y: int((x & MASK) < (y & MASK)),
+    "and": lambda x, y: x & y,
+    "or": lambda x, y: x | y,
+    "xor": lambda x, y: x ^ y,
+    "sll": lambda x, y: x << (y & 31),
+    "sra": lambda x, y: x >> (y & 31),
+    "srl": lambda x, y: (x & MASK) >> (y & 31),
+}
+
+IMMEDIATE = {
+    "addi": "add",
+    "slti": "slt",
+    "sltiu": "sltu",
+    "andi": "and",
+    "ori": "or",
+    "xori": "xor",
+    "slli": "sll",
+    "srai": "sra",
+    "srli": "srl",
+}
+
+UNARY = {
+    "mv": lambda x: x,
+    "neg": lambda x: -x,
+    "not": lambda x: ~x,
+    "seqz": lambda x: int(x == 0),
+    "snez": lambda x: int(x != 0),
+}
+
+BRANCH = {
+    "beq": lambda x, y: x == y,
+    "bne": lambda x, y: x != y,
+    "blt": lambda x, y: x < y,
+    "bge": lambda x, y: x >= y,
+    "bgt": lambda x, y: x > y,
+    "ble": lambda x, y: x <= y,
+}
+
+BRANCH_ZERO = {"beqz": "beq", "bnez": "bne"}
+
+
+def parse(text: str) -> tuple[list[tuple[str, list[str]]], dict[str, int]]:
+    program: list[tuple[str, list[str]]] = []
+    labels: dict[str, int] = {}
+    for line in text.splitlines():
+        line = line.split("#")[0].strip()
+        if not line or line.startswith("."):
+            continue
+        if line.endswith(":"):
+            labels[line[:-1]] = len(program)
+            continue
+        op, _, rest = line.partition(" ")
+        program.append((op, [arg.strip() for arg in rest.split(",")] if rest else []))
+    return program, labels
+
+
+def run(text: str, maxSteps: int = 50_000_000) -> tuple[int, int, int]:
+    program, labels = parse(text)
+    regs = [0] * 32
+    memory: dict[int, int] = {}
+    regs[REGS["sp"]] = lowest = STACK_TOP
+    regs[REGS["ra"]] = -1
+    pc = labels["main"]
+    steps = 0
+
+    def address(operand: str) -> int:
+        offset, base = re.fullmatch(r"(-?\d+)\((\w+)\)", operand).groups()
+        return (int(offset) + regs[REGS[base]]) & MASK
+
+    while pc != -1:
+        op, args = program[pc]
+        steps += 1
+        if steps > maxSteps:
+            raise StepLimitExceeded(steps)
+        pc += 1
+        value = None
+        if op in BINARY:
+            value = BINARY[op](regs[REGS[args[1]]], regs[REGS[args[2]]])
+        elif op in IMMEDIATE:
+            value = BINARY[IMMEDIATE[op]](regs[REGS[args[1]]], int(args[2]))
+        elif op in UNARY:
+            value = UNARY[op](regs[REGS[args[1]]])
+        elif op == "li":
+            value = int(args[1], 0)
+        elif op == "lw":
+            value = memory.get(address(args[1]), 0)
+        elif op == "sw":
+            memory[address(args[1])] = regs[REGS[args[0]]]
+        elif op in BRANCH:
+            if BRANCH[op](regs[REGS[args[0]]], regs[REGS[args[1]]]):
+                pc = labels[args[2]]
+        elif op in BRANCH_ZERO:
+            if BRANCH[BRANCH_ZERO[op]](regs[REGS[args[0]]], 0):
+                pc = labels[args[1]]
+        elif op in ("j", "tail"):
+            pc = labels[args[0]]
+        elif op == "call":
+            regs[REGS["ra"]] = pc
+            pc = labels[args[0]]
+        elif op == "ret":
+            pc = regs[REGS["ra"]]
+        else:
+            raise ValueError("unknown instruction: " + op)
+        if value is not None and REGS[args[0]] != 0:
+            regs[REGS[args[0]]] = signed(value)
+        lowest = min(lowest, regs[REGS["sp"]])
+    return signed(regs[REGS["a0"]]), steps, STACK_TOP - lowest
@@ -0,0 +1,151 @@
+import itertools
+import random
+
+import pytest
+
+from backend.opt.algebra import RULES, AlgebraicSimplify, Rule, isConstantName
+from backend.opt.passmanager import PassManager
+from rvsim import cDiv, cRem, signed
+from utils.label.funclabel import FuncLabel
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+
+"""
+Every rule of AlgebraicSimplify holds of 32-bit values: checked on the patterns and results
+themselves, with arithmetic written down here independently of the optimizer, and on the
+TAC the pass makes of each pattern.
+"""
+
+MASK = 0xFFFFFFFF
+INT_MIN = -(1 << 31)
+INT_MAX = (1 << 31) - 1
+EDGES = [0, 1, -1, 2, -2, 3, 31, 32, INT_MAX, INT_MIN, INT_MIN + 1, INT_MAX - 1]
+
+SEMANTICS = {
+    TacBinaryOp.ADD: lambda x, y: signed(x + y),
+    TacBinaryOp.SUB: lambda x, y: signed(x - y),
+    TacBinaryOp.MUL: lambda x, y: signed(x * y),
+    TacBinaryOp.DIV: cDiv,
+    TacBinaryOp.REM: cRem,
+    TacBinaryOp.DIVU: lambda x, y: signed((x & MASK) // (y & MASK)) if y else -1,
+    TacBinaryOp.REMU: lambda x, y: signed((x & MASK) % (y & MASK)) if y else x,
+    TacBinaryOp.EQU: lambda x, y: int(x == y),
+    TacBinaryOp.NEQ: lambda x, y: int(x != y),
+    TacBinaryOp.SLT: lambda x, y: int(x < y),
+    TacBinaryOp.LEQ: lambda x, y: int(x <= y),
+    TacBinaryOp.SGT: lambda x, y: int(x > y),
+    TacBinaryOp.GEQ: lambda x, y: int(x >= y),
+    TacBinaryOp.AND: lambda x, y: int(x != 0 and y != 0),
+    TacBinaryOp.OR: lambda x, y: int(x != 0 or y != 0),
+    TacUnaryOp.NEG: lambda x: signed(-x),
+    TacUnaryOp.NOT: lambda x: signed(~x),
+    TacUnaryOp.SEQZ: lambda x: int(x == 0),
+    TacUnaryOp.SNEZ: lambda x: int(x != 0),
+    # whether the branch is taken
+    CondBranchOp.BEQ: lambda x: x == 0,
+    CondBranchOp.BNE: lambda x: x != 0,
+}
+
+
+def value(pattern, env: dict[str, int]) -> int:
+    if isinstance(pattern, int):
+        return pattern
+    if isinstance(pattern, str):
+        return env[pattern]
+    return SEMANTICS[pattern[0]](*(value(operand, env) for operand in pattern[1:]))
+
+
+def names(pattern) -> set[str]:
+    if isinstance(pattern, str):
+        return {pattern}
+    if isinstance(pattern, tuple):
+        return set().union(*(names(operand) for operand in pattern[1:]))
+    return set()
+
+
+# assignments of the names of the rule: every combination of edge values for two names or
+# fewer, and random ones, the edges included, for all of them
+def environments(rule: Rule, count: int = 400):
+    generator = random.Random(repr(rule))
+    ordered = sorted(names(rule.pattern))
+    if len(ordered) <= 2:
+        candidates = [dict(zip(ordered, values)) for values in itertools.product(EDGES, repeat=len(ordered))]
+    else:
+        candidates = []
+    for _ in range(count):
+        candidates.append(
+            {
+                name: generator.choice(EDGES) if generator.random() < 0.3 else generator.randint(INT_MIN, INT_MAX)
+                for name in ordered
+            }
+        )
+    for env in candidates:
+        constants = {name: v for name, v in env.items() if isConstantName(name)}
+        if rule.when is None or rule.when(constants):
+            yield env
+
+
+@pytest.mark.parametrize("rule", RULES, ids=repr)
+def testRuleHolds(rule):
+    for env in environments(rule):
+        assert value(rule.pattern, env) == value(rule.result, env), env
+
+
+def build(rule: Rule, env: dict[str, int]) -> tuple[TACFunc, list[Temp]]:
+    """
+    A function computing the pattern of the rule as straight-line TAC and returning it, with
+    the names of temps (x, y) as parameters and the constant names loaded in the block.
+    """
+    params = sorted(name for name in names(rule.pattern) if not isConstantName(name))
+    func = TACFunc(FuncLabel("f"), len(params))
+    temps: dict[str, Temp] = {}
+    for name in params:
+        temps[name] = func.freshTemp()
+        func.addTempArgs(temps[name])
+    func.add(Mark(func.entry))
+
+    def emit(pattern) -> Temp:
+        if isinstance(pattern, str) and pattern in temps:
+            return temps[pattern]
+        temp = func.freshTemp()
+        if isinstance(pattern, (int, str)):
+            func.add(LoadImm4(temp, pattern if isinstance(pattern, int) else env[pattern]))
+            if isinstance(pattern, str):
+                temps[pattern] = temp
+        elif isinstance(pattern[0], TacUnaryOp):
+            func.add(Unary(pattern[0], temp, emit(pattern[1])))
+        else:
+            lhs = emit(pattern[1])
+            func.add(Binary(pattern[0], temp, lhs, emit(pattern[2])))
+        return temp
+
+    func.add(Return(emit(rule.pattern)))
+    return func, [temps[name] for name in params]
+
+
+def interpret(func: TACFunc, args: list[int]) -> int:
+    values = {temp.index: arg for temp, arg in zip(func.tempArgs, args)}
+    for instr in func.getInstrSeq():
+        if isinstance(instr, LoadImm4):
+            values[instr.dst.index] = instr.value
+        elif isinstance(instr, Assign):
+            values[instr.dst.index] = values[instr.src.index]
+        elif isinstance(instr, (Unary, Binary)):
+            values[instr.dst.index] = SEMANTICS[instr.op](*(values[src.index] for src in instr.srcs))
+        elif isinstance(instr, Return):
+            return values[instr.value.index]
+    raise ValueError("no return")
+
+
+@pytest.mark.parametrize("rule", [rule for rule in RULES if not isinstance(rule.pattern[0], CondBranchOp)], ids=repr)
+def testPassKeepsValue(rule):
+    for env in itertools.islice(environments(rule, 40), 40):
+        func, params = build(rule, env)
+        original = list(func.getInstrSeq())
+        simplify = AlgebraicSimplify()
+        PassManager([simplify]).runOnFunction(func)
+        assert simplify.rewrites > 0
+        args = [env[name] for name in sorted(names(rule.pattern)) if not isConstantName(name)]
+        before = TACFunc(func.entry, len(params))
+        before.tempArgs, before.instrSeq = params, original
+        assert interpret(func, args) == interpret(before, args), env
@@ -0,0 +1,127 @@
+import random
+
+import pytest
+
+from backend.riscv.riscvasmemitter import RiscvAsmEmitter
+from rvsim import BINARY, IMMEDIATE, UNARY, cDiv, cRem, signed
+from utils.label.funclabel import FuncLabel
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import Binary, LoadImm4, Mark, Return
+from utils.tac.tacop import TacBinaryOp
+
+"""
+The instructions the selector emits for a multiplication, division or remainder by a
+constant, run on many operands against the C semantics (truncating division, arithmetic
+modulo 2^32).
+"""
+
+INT_MIN = -(1 << 31)
+INT_MAX = (1 << 31) - 1
+
+REFERENCE = {
+    TacBinaryOp.MUL: lambda x, c: signed(x * c),
+    TacBinaryOp.DIV: cDiv,
+    TacBinaryOp.REM: cRem,
+    TacBinaryOp.DIVU: cDiv,
+    TacBinaryOp.REMU: cRem,
+}
+
+generator = random.Random(39)
+
+CONSTANTS = sorted(
+    {c for c in range(-300, 301) if c}
+    | {sign * (1 << k) + delta for k in range(2, 31) for sign in (1, -1) for delta in (-1, 0, 1)}
+    | {INT_MIN, INT_MIN + 1, INT_MAX, 641, 6700417, 1000000007, -1000000007, 2147483629}
+    | {generator.randint(INT_MIN, INT_MAX) or 1 for _ in range(300)}
+)
+
+EDGES = [0, 1, -1, 2, -2, 3, 7, -7, 100, -100, INT_MAX, INT_MIN, INT_MIN + 1, INT_MAX - 1]
+
+
+# the selected instructions for `x op c` (x the parameter), as (opcode, operands)
+def lower(op: TacBinaryOp, c: int) -> list[tuple[str, list[str]]]:
+    func = TACFunc(FuncLabel("f"), 1)
+    x = func.freshTemp()
+    func.addTempArgs(x)
+    constant, result = func.freshTemp(), func.freshTemp()
+    for instr in (Mark(func.entry), LoadImm4(constant, c), Binary(op, result, x, constant), Return(result)):
+        func.add(instr)
+    selector = RiscvAsmEmitter.RiscvInstrSelector(func.entry, func)
+    for instr in func.getInstrSeq():
+        instr.accept(selector)
+    code = []
+    for instr in selector.seq[1:]:
+        opcode, _, rest = str(instr).partition(" ")
+        code.append((opcode, [operand.strip() for operand in rest.split(",")]))
+    return code
+
+
+def evaluate(code: list[tuple[str, list[str]]], x: int) -> int:
+    values = {"_T0": x}
+    for opcode, operands in code:
+        if opcode == "mv" and operands[0] == "a0":
+            return values[operands[1]]
+        if opcode in BINARY:
+            value = BINARY[opcode](values[operands[1]], values[operands[2]])
+        elif opcode in IMMEDIATE:
+            value = BINARY[IMMEDIATE[opcode]](values[operands[1]], int(operands[2]))
+        elif opcode in UNARY:
+            value = UNARY[opcode](values[operands[1]])
+        elif opcode == "li":
+            value = int(operands[1])
+        else:
+            raise ValueError("unexpected instruction: " + opcode)
+        values[operands[0]] = signed(value)
+    raise ValueError("no result")
+
+
+def operands(c: int, nonNegative: bool) -> list[int]:
+    xs = EDGES + [c * k + delta for k in (-3, -1, 1, 2) for delta in (-1, 0, 1)]
+    xs += [INT_MAX // c * c if c else 0, INT_MIN // c * c if c else 0]
+    xs += [generator.randint(INT_MIN, INT_MAX) for _ in range(40)]
+    xs = [signed(x) for x in xs]
+    return [x & INT_MAX for x in xs] if nonNegative else xs
+
+
+@pytest.mark.parametrize("op", [TacBinaryOp.MUL, TacBinaryOp.DIV, TacBinaryOp.REM])
+def testSigned(op):
+    for c in CONSTANTS:
+        code = lower(op, c)
+        for x in operands(c, False):
+            assert evaluate(code, x) == REFERENCE[op](x, c), (op, x, c)
+
+
+# DIVU and REMU are only made for operands known not to be negative (see RangeSimplify)
+@pytest.mark.parametrize("op", [TacBinaryOp.DIVU, TacBinaryOp.REMU])
+def testNonNegative(op):
+    for c in CONSTANTS:
+        if c > 0:
+            code = lower(op, c)
+            for x in operands(c, True):
+                assert evaluate(code, x) == REFERENCE[op](x, c), (op, x, c)
+
+
+@pytest.mark.parametrize("op", [TacBinaryOp.DIV, TacBinaryOp.REM])
+def testSmallExhaustive(op):
+    for c in range(-40, 41):
+        if c:
+            code = lower(op, c)
+            for x in range(-300, 301):
+                assert evaluate(code, x) == REFERENCE[op](x, c), (op, x, c)
+
+
+def testNoDivisionLeft():
+    for c in (3, 7, -10, 1000, 1 << 20):
+        opcodes = {opcode for op in (TacBinaryOp.DIV, TacBinaryOp.REM) for opcode, _ in lower(op, c)}
+        assert not opcodes & {"div", "rem"}
+
+
+# a parameter only loaded with a constant later on still holds the argument before that
+@pytest.mark.parametrize("level", ["-O0", "-O1", "-O2"])
+def testParameterIsNotConstant(execute, level):
+    source = """
+    int f(int p) { int s = 0; int i = 0; while (i < 3) { s = s + 7 * p; p = 2; i = i + 1; } return s; }
+    int g(int q, int p) { int s = 0; int i = 0; while (i < 3) { s = s + q / p; p = 2; i = i + 1; } return s; }
+    int main() { return f(5) * 1000 + g(100, 5); }
+    """
+    assert execute(source, level)[0] == 63 * 1000 + 120
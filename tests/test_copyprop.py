@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+"""
+CopyProp: a copy is coalesced or propagated only while both of its temps keep their
+values, and on every path to the read. The programs swap through a temporary, copy on
+one branch only, and read the destination of a copy before it's made.
+"""
+
+PROGRAMS = {
+    "swap": (
+        """
+        int main() {
+            int a = 3; int b = 11; int s = 0;
+            for (int i = 0; i < 9; i = i + 1) { int t = a; a = b; b = t + a; s = s + t; }
+            return s * 1000 + a % 1000;
+        }
+        """,
+        696437,
+    ),
+    "one branch": (
+        """
+        int main() {
+            int a = 5; int b = 7; int x = a;
+            for (int i = 0; i < 6; i = i + 1) {
+                if (i % 2) x = b; else a = a + x;
+                b = x + i;
+            }
+            return a * 100 + b * 10 + x;
+        }
+        """,
+        2371,
+    ),
+    "read between": (
+        """
+        int main() {
+            int x = 4; int y = 9;
+            int t = x + y;
+            y = x;
+            x = t;
+            int u = x * y;
+            x = x + u;
+            y = y - u;
+            return x * 7 + y + (x > y ? x : y);
+        }
+        """,
+        472,
+    ),
+}
+
+PIPELINES = ["copyprop", "copyprop,dce", "ssa,copyprop,outofssa,dce", "constfold,copyprop,constfold,dce"]
+
+COPY = re.compile(r"^\s+_T\d+ = _T\d+$", re.M)
+
+
+@pytest.mark.parametrize("passes", PIPELINES)
+def testSameValue(execute, passes):
+    for name, (source, expected) in PROGRAMS.items():
+        assert execute(source)[0] == expected, name
+        assert execute(source, "--passes", passes)[0] == expected, name
+
+
+def testFewerCopies(compiler):
+    for name, (source, _) in PROGRAMS.items():
+        before = len(COPY.findall(compiler(source, "--tac").stdout))
+        after = len(COPY.findall(compiler(source, "--tac", "--passes", "copyprop,dce").stdout))
+        assert after < before, name
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import ROOT
+
+# deeper than the default recursion limit many times over
+DEPTH = 10000
+
+
+def parens(n: int) -> tuple[str, int]:
+    return "int main() { return " + "(" * n + "1" + ")" * n + "; }\n", 1
+
+
+def chain(n: int) -> tuple[str, int]:
+    return "int main() { int a = 1; return " + " + ".join(["a"] * n) + "; }\n", n
+
+
+def unary(n: int) -> tuple[str, int]:
+    return "int main() { return " + "-~" * (n // 2) + "1; }\n", 1 + n // 2
+
+
+def blocks(n: int) -> tuple[str, int]:
+    return "int main() { int a = 1; " + "{ a = a + 1; " * n + "}" * n + " return a; }\n", n + 1
+
+
+def ifElse(n: int) -> tuple[str, int]:
+    branches = " else ".join("if (a == %d) x = %d;" % (i, i + 1) for i in range(n))
+    return "int main() { int a = %d; int x = 0; %s return x; }\n" % (n - 1, branches), n
+
+
+SHAPES = [parens, chain, unary, blocks, ifElse]
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("flags", [("--tac",), ("--tac", "--fused")])
+def testDeepTac(compiler, shape, flags):
+    source, _ = shape(DEPTH)
+    assert "return" in compiler(source, *flags).stdout
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def testDeepParse(tmp_path, shape):
+    # the printed tree is indented by its depth, so keep its size reasonable
+    source, _ = shape(3000)
+    path = tmp_path / "input.c"
+    path.write_text(source)
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "main.py"), "--input", str(path), "--parse"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=ROOT,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def testDeepRuns(execute, shape):
+    source, expected = shape(2000)
+    assert execute(source)[0] == expected
+
+
+# four times the depth takes about four times as long (sixteen, if anything were quadratic)
+def testLinearTime(compiler):
+    def seconds(n: int) -> float:
+        start = time.perf_counter()
+        compiler(chain(n)[0], "--tac")
+        return time.perf_counter() - start
+
+    assert seconds(4 * DEPTH) < 8 * seconds(DEPTH)
@@ -0,0 +1,94 @@
+import re
+
+import pytest
+
+from backend.opt.egraph import ADD, CONST, DIV, DIV_COST, MUL, MUL_COST, REWRITES, SUB, TEMP, EGraph
+
+"""
+EqualitySaturation picks the cheapest node of every class: a * b + a * c is a * (b + c),
+(x + 3) - x is the constant 3, a multiplication or division by a constant costs what the
+back end makes of it. Blocks are only replaced when that costs less, which summary()
+reports, and identities that don't hold on 32 bits (a / 2 * 2, a * 8 > b * 8) are kept.
+"""
+
+SOURCE = """
+int f(int a, int b, int c) {
+    int r = a * b + a * c;
+    int s = (a + b) * 3 - b * 3;
+    int t = a / 2 * 2 + b % 4 - b % 4;
+    int u = -(c - a) + (a - c);
+    return r * 7 + s * 5 + t * 3 + u + (a * 8 > b * 8);
+}
+
+int g(int x, int y) {
+    return x * y + y;
+}
+
+int main() {
+    return g(6, -7) + f(5, 7, 9) + f(-13, 2147483647, 3) * 3 + f(2147483647, -2147483647 - 1, -1) * 5 + f(0, 1, -1) * 7;
+}
+"""
+
+PIPELINES = ["egraph", "egraph,copyprop,dce", "algebra,egraph,lvn,dce", "sccp,egraph,constfold"]
+
+IMPROVED = re.compile(r"(\S+): (\d+) -> (\d+) instrs, cost (\d+) -> (\d+)")
+
+
+def temps(graph: EGraph, count: int) -> list[int]:
+    return [graph.add((TEMP, i)) for i in range(count)]
+
+
+def cost(graph: EGraph, cid: int) -> int:
+    return graph.extract()[graph.find(cid)][0]
+
+
+def testFactoring():
+    graph = EGraph()
+    a, b, c = temps(graph, 3)
+    root = graph.add((ADD, graph.add((MUL, a, b)), graph.add((MUL, a, c))))
+    assert cost(graph, root) == 2 * MUL_COST + 1
+    graph.saturate(REWRITES)
+    assert cost(graph, root) == MUL_COST + 1
+    assert graph.extract()[graph.find(root)][1][0] == MUL
+
+
+def testConstantClass():
+    graph = EGraph()
+    (x,) = temps(graph, 1)
+    root = graph.add((SUB, graph.add((ADD, x, graph.add((CONST, 3)))), x))
+    graph.saturate(REWRITES)
+    assert graph.extract()[graph.find(root)] == (1, (CONST, 3))
+
+
+def testByConstant():
+    graph = EGraph()
+    x, y = temps(graph, 2)
+    # a shift; a shift and an add; mulh of the magic number and the rounding
+    assert cost(graph, graph.add((MUL, x, graph.add((CONST, 8))))) == 1
+    assert cost(graph, graph.add((MUL, x, graph.add((CONST, 7))))) == 2
+    assert cost(graph, graph.add((DIV, x, graph.add((CONST, 7))))) == MUL_COST + 4
+    assert cost(graph, graph.add((DIV, x, y))) == DIV_COST
+    # (x + y) * 3 - y * 3 is x * 3, once distributed and cancelled
+    three = graph.add((CONST, 3))
+    root = graph.add((SUB, graph.add((MUL, graph.add((ADD, x, y)), three)), graph.add((MUL, y, three))))
+    graph.saturate(REWRITES)
+    assert cost(graph, root) == 2
+
+
+@pytest.mark.parametrize("passes", PIPELINES)
+def testSameValue(execute, passes):
+    assert execute(SOURCE)[0] == 2147482847
+    assert execute(SOURCE, "--passes", passes)[0] == 2147482847
+
+
+def testSummary(compiler):
+    result = compiler(SOURCE, "--tac", "--passes", "egraph", "--pass-stats")
+    improved = IMPROVED.findall(result.stderr)
+    assert len(improved) == 2
+    for _, sizeBefore, sizeAfter, before, after in improved:
+        assert int(after) < int(before) and int(sizeAfter) <= int(sizeBefore)
+    before = compiler(SOURCE, "--tac").stdout.split("FUNCTION<main>")[0]
+    after = result.stdout.split("FUNCTION<main>")[0]
+    # a * (b + c)
+    assert "(_T1 + _T2)" in after and "(_T1 + _T2)" not in before
+    assert after.count(" / ") == before.count(" / ") == 1 and " > " in after
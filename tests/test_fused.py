@@ -0,0 +1,93 @@
+import pytest
+
+"""
+The fused front end (--fused) must give the same TAC and the same diagnostics as the
+Namer, Typer and TACGen run one after another.
+"""
+
+PROGRAMS = [
+    "int main() { return 0; }",
+    """
+    int main() {
+        int x = 1;
+        { int x = 2; x = x + 1; }
+        { int y = x; { int x = y * 3; y = x; } x = y; }
+        return x;
+    }
+    """,
+    """
+    int main() {
+        int a = 7; int b = -3; int c;
+        c = a + b * 2 - a / b % 3;
+        c = c < a && b <= c || !(a == b) && a != c;
+        c = a > b ? ~a : -b >= c ? a * b : a - c;
+        return c;
+    }
+    """,
+    """
+    int main() {
+        int s = 0;
+        for (int i = 0; i < 10; i = i + 1) {
+            if (i == 3) continue;
+            for (int j = i; j > 0; j = j - 1) { if (j == 5) break; s = s + j; }
+        }
+        int i = 0;
+        while (i < 5) { i = i + 1; if (i % 2) continue; else s = s - i; }
+        for (;;) { break; }
+        for (s; s > 100; ) s = s / 2;
+        return s;
+    }
+    """,
+    """
+    int g(int b);
+    int f(int a) { if (a <= 0) return 0; return g(a - 1) + a; }
+    int g(int b) { return f(b - 1) * 2; }
+    int main() { return f(10) + g(3); }
+    """,
+    """
+    int fib(int n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+    int many(int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) {
+        return a + b + c + d + e + f + g + h + i + j;
+    }
+    int main() { int x = fib(10); x = many(x, 1, 2, 3, 4, 5, 6, 7, 8, fib(4)); return x; }
+    """,
+    """
+    int f(int a) { int b = a; { int a = b + 1; b = a; } return a + b; }
+    int main() { int r; r = f(1); if (r) r = 2; if (r == 2) if (r) r = 3; else r = 4; return r; }
+    """,
+]
+
+ERRORS = [
+    "int main() { return x; }",
+    "int main() { break; }",
+    "int main() { continue; }",
+    "int main() { int a; int a; return 0; }",
+    "int f(int a) { return 1; } int f(int a) { return 2; } int main() { return 0; }",
+    "int f(int a, int b) { return a; } int main() { return f(1); }",
+    "int f() { return 1; }",
+    "int main() { for (int i = 0; i < 3; i = j + 1) { } return 0; }",
+    "int main() { int a = 1; a = b + c; return 0; }",
+    "int main() { return 2147483648; }",
+    "int main() { return g(1); }",
+    "int f(int a) { int a = 1; return a; } int main() { return f(1); }",
+    "int main() { int main = 1; return main(); }",
+    "int main() { return 1 }",
+]
+
+
+def lastLine(text: str) -> str:
+    lines = text.strip().splitlines()
+    return lines[-1] if lines else ""
+
+
+@pytest.mark.parametrize("source", PROGRAMS)
+def testSameTac(compiler, source):
+    assert compiler(source, "--tac").stdout == compiler(source, "--tac", "--fused").stdout
+
+
+@pytest.mark.parametrize("source", ERRORS)
+def testSameDiagnostics(compiler, source):
+    twoPass = compiler(source, "--tac", check=False)
+    fused = compiler(source, "--tac", "--fused", check=False)
+    assert twoPass.returncode != 0 and fused.returncode != 0
+    assert lastLine(twoPass.stderr) == lastLine(fused.stderr)
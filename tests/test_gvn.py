@@ -0,0 +1,69 @@
+import re
+
+import pytest
+
+"""
+GlobalValueNumbering reuses what a dominating block computed: in both arms of an if, after
+it, and in a loop that doesn't write the operands. What only a sibling computed, or what
+a branch or a loop in between may have changed, is computed again.
+"""
+
+PROGRAMS = {
+    "dominating": (
+        """
+        int main() {
+            int a = 7; int b = 12; int r = 0;
+            int p = a * b - a;
+            if (p > 50) { int q = a * b - a; r = q + 1; } else { r = (a * b - a) * 2; }
+            int s = a * b - a;
+            for (int i = 0; i < 4; i = i + 1) r = r + (a * b - a) + i;
+            return r + s + p;
+        }
+        """,
+        546,
+        # a * b and the subtraction, in each arm, after them and in the loop
+        8,
+    ),
+    "siblings": (
+        """
+        int main() {
+            int a = 3; int b = 5; int r = 0;
+            if (a < b) r = a * b + 1; else r = a * b + 2;
+            if (r > 10) r = r + (a - b); else r = r + (a - b) * 2;
+            return r * (a - b) + (a * b + 3);
+        }
+        """,
+        -10,
+        0,
+    ),
+    "written in between": (
+        """
+        int main() {
+            int a = 3; int b = 5; int r = a * b;
+            if (r > 10) a = a + 1;
+            r = r + a * b;
+            for (int i = 0; i < 5; i = i + 1) { r = r + a * b; b = b + i; }
+            return r + a * b;
+        }
+        """,
+        235,
+        0,
+    ),
+}
+
+PIPELINES = ["gvn", "gvn,copyprop,dce", "ssa,gvn,outofssa", "looprotate,gvn,licm,dce"]
+
+REDUNDANT = re.compile(r"^gvn +main .* (\d+) redundant$", re.M)
+
+
+@pytest.mark.parametrize("passes", PIPELINES)
+def testSameValue(execute, passes):
+    for name, (source, expected, _) in PROGRAMS.items():
+        assert execute(source)[0] == expected, name
+        assert execute(source, "--passes", passes)[0] == expected, name
+
+
+def testRedundant(compiler):
+    for name, (source, _, redundant) in PROGRAMS.items():
+        stats = compiler(source, "--tac", "--passes", "gvn", "--pass-stats").stderr
+        assert REDUNDANT.findall(stats) == [str(redundant)], name
@@ -0,0 +1,55 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+"""
+Every mode imports only what it needs (see main.py): checked on the modules that
+`python -X importtime` reports, and on the time they take.
+"""
+
+PACKAGES = ("frontend", "backend", "utils", "ply")
+
+# mode -> (the packages it must not load, the budget for the import time of the project
+# modules, in microseconds: a few times what they take, so that only a regression fails)
+MODES = {
+    ("--parse",): (("frontend.typecheck", "frontend.tacgen", "backend"), 200_000),
+    ("--tac",): (("backend",), 200_000),
+    ("--tac", "--fused"): (("frontend.typecheck", "backend"), 200_000),
+    ("--tac", "-O1"): (("backend.asm", "backend.reg", "backend.riscv.riscvasmemitter"), 300_000),
+    ("--riscv",): (("backend.opt",), 300_000),
+}
+
+SOURCE = "int f(int a) { return a * 2; }\nint main() { return f(3); }\n"
+
+
+def importTimes(path: str, flags: tuple[str, ...]) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(ROOT, "main.py"), "--input", path, *flags],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=ROOT,
+    )
+    assert result.returncode == 0, result.stderr
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)", line)
+        if match and match.group(2).split(".")[0] in PACKAGES:
+            times[match.group(2)] = int(match.group(1))
+    return times
+
+
+@pytest.mark.parametrize("flags", MODES, ids=" ".join)
+def testImportBudget(tmp_path, flags):
+    forbidden, budget = MODES[flags]
+    path = tmp_path / "input.c"
+    path.write_text(SOURCE)
+    runs = [importTimes(str(path), flags) for _ in range(3)]
+    loaded = [name for name in runs[0] if name.startswith(forbidden)]
+    assert not loaded
+    assert min(sum(times.values()) for times in runs) <= budget
@@ -0,0 +1,108 @@
+import re
+
+import pytest
+
+from backend.opt.inline import GROWTH, SLACK
+
+"""
+The limits of the Inliner: recursive functions, even through others, are never inlined
+(the wrappers around them are); a callee too big for a call outside loops stays a call
+unless it's the only one; and calls in loops, worth inlining one by one, stop once the
+program has grown by GROWTH.
+"""
+
+PROGRAMS = {
+    "recursion": (
+        """
+        int fact(int n) { if (n <= 1) return 1; return n * fact(n - 1); }
+        int isEven(int n);
+        int isOdd(int n) { if (n == 0) return 0; return isEven(n - 1); }
+        int isEven(int n) { if (n == 0) return 1; return isOdd(n - 1); }
+        int twice(int n) { return fact(n) + fact(n + 1); }
+        int parity(int n) { return isEven(n) * 10 + isOdd(n); }
+        int main() { return twice(5) + parity(7) + parity(10) * 1000; }
+        """,
+        10841,
+    ),
+    "sizes": (
+        """
+        int small(int x) { return x * 3 + 1; }
+        int big(int x) {
+            int s = x;
+            s = s * 7 + 3; s = s % 1009 + x; s = s * s % 997; s = s - x * 5; s = s / 3 + 11;
+            s = s * 7 + 3; s = s % 1009 + x; s = s * s % 997; s = s - x * 5; s = s / 3 + 11;
+            return s;
+        }
+        int once(int x) {
+            int s = x;
+            s = s * 5 + 1; s = s % 1013 + x; s = s * s % 991; s = s - x * 3; s = s / 7 + 13;
+            s = s * 5 + 1; s = s % 1013 + x; s = s * s % 991; s = s - x * 3; s = s / 7 + 13;
+            return s;
+        }
+        int main() {
+            int a = small(1) + small(2) * 10 + small(3) * 100;
+            int b = big(4) + big(5) * 3 + big(6) * 7;
+            return a + b + once(9) * 11;
+        }
+        """,
+        3423,
+    ),
+    "growth": (
+        """
+        int big(int x) {
+            int s = x;
+            s = s * 7 + 3; s = s % 1009 + x; s = s * s % 997; s = s - x * 5; s = s / 3 + 11;
+            s = s * 7 + 3; s = s % 1009 + x; s = s * s % 997; s = s - x * 5; s = s / 3 + 11;
+            return s;
+        }
+        int main() {
+            int t = 0;
+            for (int i = 0; i < 3; i = i + 1)
+                for (int j = 0; j < 3; j = j + 1) {
+                    t = t + big(i) + big(j) + big(i + j) + big(i - j) + big(i * j) + big(t % 7);
+                    t = t + big(i + 1) + big(j + 2) + big(i + j + 3) + big(i - j + 4) + big(i * j + 5) + big(t % 7 + 6);
+                    t = t % 100000;
+                }
+            return t;
+        }
+        """,
+        13986,
+    ),
+}
+
+PIPELINES = [["--passes", "inline"], ["--passes", "inline,simplifycfg,copyprop,dce"], ["-O2"]]
+
+STATS = re.compile(r"^inline +<module> +(\d+) -> (\d+) .* (\d+) calls inlined, (\d+) functions removed$", re.M)
+
+
+@pytest.mark.parametrize("flags", PIPELINES, ids=" ".join)
+def testSameValue(execute, flags):
+    for name, (source, expected) in PROGRAMS.items():
+        assert execute(source)[0] == expected, name
+        assert execute(source, *flags)[0] == expected, name
+
+
+# (size before, size after, calls inlined, functions removed), and the functions left
+def inline(compiler, name: str) -> tuple[tuple[int, ...], list[str]]:
+    result = compiler(PROGRAMS[name][0], "--tac", "--passes", "inline", "--pass-stats")
+    (stats,) = STATS.findall(result.stderr)
+    return tuple(map(int, stats)), re.findall(r"^FUNCTION<(\w+)>", result.stdout, re.M)
+
+
+def testRecursion(compiler):
+    stats, funcs = inline(compiler, "recursion")
+    assert stats[2:] == (3, 2)
+    assert funcs == ["fact", "isOdd", "isEven", "main"]
+
+
+def testSizes(compiler):
+    stats, funcs = inline(compiler, "sizes")
+    # the three calls of small, and the only one of once
+    assert stats[2:] == (4, 2)
+    assert funcs == ["big", "main"]
+
+
+def testGrowth(compiler):
+    (before, after, inlined, removed), _ = inline(compiler, "growth")
+    assert 0 < inlined < 12 and removed == 0
+    assert after <= before * (1 + GROWTH) + SLACK
@@ -0,0 +1,88 @@
+import pytest
+
+"""
+LoopRotate on loops left by `continue`: TACGen sends it to the update of the loop, which
+rotation follows with the copy of the test; once SimplifyCFG has threaded the jumps, it
+goes straight to the old header, a second latch, and the loop is left as it is.
+Either way the values are those of -O0.
+"""
+
+PROGRAMS = {
+    "while": (
+        """
+        int main() {
+            int s = 0; int i = 0;
+            while (i < 20) { i = i + 1; if (i % 3 == 0) continue; s = s + i; }
+            return s;
+        }
+        """,
+        147,
+    ),
+    "for": (
+        """
+        int main() {
+            int s = 0;
+            for (int i = 0; i < 30; i = i + 1) { if (i % 4 == 1) continue; if (i > 25) break; s = s * 3 % 1000 + i; }
+            return s;
+        }
+        """,
+        992,
+    ),
+    "nested": (
+        """
+        int main() {
+            int s = 0;
+            for (int i = 0; i < 8; i = i + 1) {
+                int j = 0;
+                while (j < i) { j = j + 1; if ((i + j) % 3 == 0) continue; s = s + i * j; }
+                if (s % 2) continue;
+                s = s + 1;
+            }
+            return s;
+        }
+        """,
+        319,
+    ),
+    "never entered": (
+        """
+        int main() {
+            int s = 7;
+            for (int i = 5; i < 5; i = i + 1) { if (i) continue; s = 0; }
+            int j = 9;
+            while (j < 3) { j = j + 1; continue; }
+            return s + j;
+        }
+        """,
+        16,
+    ),
+}
+
+PIPELINES = [
+    "looprotate",
+    "simplifycfg,looprotate",
+    "looprotate,simplifycfg,licm,unroll",
+    "ssa,gvn,outofssa,looprotate",
+]
+
+
+@pytest.mark.parametrize("passes", PIPELINES)
+def testSameValue(execute, passes):
+    for name, (source, expected) in PROGRAMS.items():
+        assert execute(source)[0] == expected, name
+        assert execute(source, "--passes", passes)[0] == expected, name
+
+
+# how many times the test of the loop is in the TAC of main
+def copiesOfTest(compiler, *flags: str) -> int:
+    return compiler(PROGRAMS["while"][0], "--tac", *flags).stdout.count(" < ")
+
+
+def testContinueToUpdate(compiler):
+    # the guard and the test at the bottom
+    assert copiesOfTest(compiler) == 1
+    assert copiesOfTest(compiler, "--passes", "looprotate") == 2
+
+
+def testContinueToHeader(compiler):
+    # two latches: the jump of `continue` and the end of the body
+    assert copiesOfTest(compiler, "--passes", "simplifycfg,looprotate") == 1
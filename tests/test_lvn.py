@@ -0,0 +1,62 @@
+import pytest
+
+"""
+LocalValueNumbering: operands swapped in commutative and mirrored operations give the same
+value, swapped in the others they don't, and a value stops being available once one of
+its operands is written, or is read from another temp once the one holding it is.
+"""
+
+PROGRAMS = {
+    "swapped operands": (
+        """
+        int main() {
+            int a = 6; int b = 13; int s = 0;
+            for (int i = 0; i < 5; i = i + 1) {
+                int p = a * b + i; int q = b * a - i;
+                int g = a > b; int l = b < a; int m = a - b; int n = b - a;
+                s = s + p * 3 + q + g * 7 + l * 11 + m * n;
+                a = a + 1;
+            }
+            return s;
+        }
+        """,
+        1965,
+    ),
+    "operands written": (
+        """
+        int main() {
+            int a = 9; int b = 4;
+            int x = a + b;
+            a = x * 2;
+            int y = a + b;
+            int z = a + b;
+            b = b + 1;
+            int w = a + b;
+            x = x;
+            int c = a * b; c = c - 1; int d = a * b;
+            int v = x % b + a / b + (a >= b) + (b <= a);
+            return x * 1000 + y * 100 + z * 10 + w + v + c * d;
+        }
+        """,
+        33111,
+    ),
+}
+
+PIPELINES = ["lvn", "lvn,copyprop,dce", "ssa,lvn,outofssa", "lvn,constfold,lvn,dce"]
+
+
+@pytest.mark.parametrize("passes", PIPELINES)
+def testSameValue(execute, passes):
+    for name, (source, expected) in PROGRAMS.items():
+        assert execute(source)[0] == expected, name
+        assert execute(source, "--passes", passes)[0] == expected, name
+
+
+def testSwappedOperands(compiler):
+    source = PROGRAMS["swapped operands"][0]
+    before = compiler(source, "--tac").stdout
+    after = compiler(source, "--tac", "--passes", "lvn").stdout
+    # a * b and b * a, a > b and b < a, but not a - b and b - a
+    assert after.count(" * ") == before.count(" * ") - 1
+    assert after.count(" > ") + after.count(" < ") == before.count(" > ") + before.count(" < ") - 1
+    assert after.count(" - ") == before.count(" - ")
@@ -0,0 +1,140 @@
+import re
+
+import pytest
+
+from backend.opt.pipeline import PASSES
+
+"""
+The optimizer keeps the meaning of programs: each one below returns the same value (the
+one gcc gives) at every level and after any single pass. --print-passes and --pass-stats
+report the pipeline and what every pass did.
+"""
+
+# name -> (source, the value main returns)
+PROGRAMS = {
+    "loops": (
+        """
+        int main() {
+            int s = 0;
+            for (int i = 0; i < 50; i = i + 1) {
+                if (i % 7 == 3) continue;
+                for (int j = i; j < i + 5; j = j + 1) s = s + i * j - (j / 3);
+                if (s > 100000) break;
+            }
+            int k = 0;
+            while (k < 10) { s = s - k * 3; k = k + 1; }
+            return s;
+        }
+        """,
+        108165,
+    ),
+    "calls": (
+        """
+        int sq(int x) { return x * x; }
+        int pick(int c, int a, int b) { if (c) return a; return b; }
+        int sum(int n) { int s = 0; for (int i = 1; i <= n; i = i + 1) s = s + sq(i); return s; }
+        int main() { return sum(20) + pick(sum(3) > 10, 7, 9) * 1000; }
+        """,
+        9870,
+    ),
+    "recursion": (
+        """
+        int fact(int n) { if (n <= 1) return 1; return n * fact(n - 1); }
+        int fib(int n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+        int gcd(int a, int b) { if (b == 0) return a; return gcd(b, a % b); }
+        int main() { return fact(10) % 1000 + fib(15) + gcd(1071, 462) * 100000; }
+        """,
+        2101410,
+    ),
+    "arithmetic": (
+        """
+        int main() {
+            int a = 2147483647; int b = -2147483647 - 1; int c = 12345; int d = -7;
+            int r = a + 1 == b;
+            r = r + (c / d) * 10 + (c % d) + (b / 3) % 1000 + (a * 3) / 5;
+            r = r + (c * 8) / 8 + (c * 0) + (c - c) + -(-c) + !c + !!d + ~d;
+            r = r + (d < 0 ? c / 16 : c * 16) + (c > d && d > b || a < c);
+            return r;
+        }
+        """,
+        429503691,
+    ),
+    "redundancy": (
+        """
+        int f(int x, int y) {
+            int s = 0;
+            int i = 0;
+            while (i < 30) {
+                int t = x * y + i;
+                if (i % 2) s = s + x * y; else s = s - x * y / 3;
+                if (x * y > 100) s = s + t; else s = s + (x + y) * (x + y);
+                i = i + 1;
+            }
+            return s + x * y;
+        }
+        int main() { return f(7, 9) + f(-3, 40) + f(12, 12); }
+        """,
+        54462,
+    ),
+    "conditions": (
+        """
+        int classify(int x) {
+            int r = 0;
+            if (x >= 0) { if (x < 10) r = 1; else if (x < 100) r = 2; else r = 3; }
+            else { if (x > -10) r = -1; else r = -2; }
+            if (x >= 0 && x < 0) r = 99;
+            if (1) r = r * 10; else r = 0;
+            return r;
+        }
+        int main() {
+            int s = 0;
+            for (int i = -20; i < 200; i = i + 7) s = s + classify(i) * i;
+            return s;
+        }
+        """,
+        79260,
+    ),
+}
+
+FLAGS = [("-O0",), ("-O1",), ("-O2",)] + [("--passes", name) for name in PASSES]
+
+
+@pytest.mark.parametrize("flags", FLAGS, ids=" ".join)
+def testSameValue(execute, flags):
+    for name, (source, expected) in PROGRAMS.items():
+        assert execute(source, *flags)[0] == expected, name
+
+
+def stderrOf(compiler, *flags: str) -> list[str]:
+    return compiler(PROGRAMS["calls"][0], "--tac", *flags).stderr.splitlines()
+
+
+def testPrintPasses(compiler):
+    assert stderrOf(compiler, "--print-passes") == ["passes: (none)"]
+    assert stderrOf(compiler, "-O1", "--print-passes") == [
+        "passes: simplifycfg, constfold, algebra, lvn, copyprop, dce, simplifycfg"
+    ]
+    # leaving SSA form is added when the list doesn't
+    assert stderrOf(compiler, "--passes", "ssa,gvn", "--print-passes") == ["passes: ssa, gvn, outofssa"]
+    line = stderrOf(compiler, "-O2", "--print-passes")[0]
+    assert line.startswith("passes: tailrec, fixpoint<4>(simplifycfg, sccp, ") and "inline" in line
+
+
+STATS = re.compile(r"(\S+) +(\S+) +(\d+) -> (\d+) +\(([+-]\d+)\) +[\d.]+ ms(?: (.*))?$")
+
+
+def testPassStats(compiler):
+    assert stderrOf(compiler, "--pass-stats") == []
+    lines = stderrOf(compiler, "--passes", "inline,dce", "--pass-stats")
+    matches = [STATS.match(line) for line in lines]
+    assert all(matches), lines
+    # the inliner runs once on the module, then DCE on every function left
+    assert [m.group(1, 2) for m in matches] == [("inline", "<module>"), ("dce", "main")]
+    inline = matches[0]
+    assert int(inline.group(4)) - int(inline.group(3)) == int(inline.group(5))
+    assert re.fullmatch(r"\d+ calls inlined, 3 functions removed", inline.group(6))
+
+
+def testUnknownPass(compiler):
+    result = compiler(PROGRAMS["calls"][0], "--tac", "--passes", "dce,nosuchpass", check=False)
+    assert result.returncode != 0 and "unknown pass: nosuchpass" in result.stderr
@@ -0,0 +1,58 @@
+import re
+
+import pytest
+
+"""
+RangeSimplify at the ends of the 32-bit range: near INT_MAX and INT_MIN, x + 1 > x,
+x - 1 < x and -x > 0 may be false, and x / 4 of a negative x rounds towards 0, so none
+of them may be folded or done unsigned there; what the ranges do decide must still hold.
+"""
+
+SOURCE = """
+int f(int x) {
+    int r = 0;
+    if (x > 2147483643) {
+        if (x + 1 > x) r = r + 1;
+        if (x - 1 < x) r = r + 2;
+        r = r + x / 4 % 1000 + x % 8 * 3;
+    }
+    if (x < -2147483644) {
+        if (x - 1 < x) r = r + 10;
+        if (-x > 0) r = r + 20;
+        if (x + 1 > x) r = r + 40;
+        if (x / 4 > -536870912) r = r + 80;
+        r = r + x / 4 % 1000 + x % 8 * 3;
+    }
+    return r;
+}
+
+int main() {
+    int m = 2147483647; int n = -2147483647 - 1;
+    int s = 0;
+    int i = m - 5;
+    while (i < m) { s = s + (i + 1 > i) * 2 + (i - m) / 2; i = i + 1; }
+    s = s + (i + 1 < i) * 100;
+    return f(m) + f(m - 1) * 3 + f(n) * 5 + f(n + 1) * 7 + f(n + 4) * 11 + f(0) * 13 + s;
+}
+"""
+
+PIPELINES = ["ranges", "ranges,simplifycfg,dce", "sccp,ranges,constfold,dce", "looprotate,ranges,licm"]
+
+SIMPLIFIED = re.compile(r"^ranges +(\w+) .* (\d+) simplified$", re.M)
+
+
+@pytest.mark.parametrize("passes", PIPELINES)
+def testSameValue(execute, passes):
+    assert execute(SOURCE)[0] == -6000
+    assert execute(SOURCE, "--passes", passes)[0] == -6000
+
+
+def testWrapping(compiler):
+    result = compiler(SOURCE, "--tac", "--passes", "ranges", "--pass-stats")
+    assert all(int(count) > 0 for _, count in SIMPLIFIED.findall(result.stderr))
+    f = result.stdout.split("FUNCTION<main>")[0]
+    # every test in f may go either way
+    assert f.count("if (") == 8
+    # x % 8 is unsigned only where x can't be negative
+    assert f.count(" %u ") == 2 and f.count(" % ") == 2
+    assert f.count(" / ") == 2
@@ -0,0 +1,30 @@
+import pytest
+
+LEVELS = ["-O0", "-O1", "-O2"]
+
+MANY_PARAMETERS = """
+int h(int x) { return x + 1 + 2 + 3 + 4; }
+int g(int a, int b, int c, int d, int e, int f, int g1, int h1, int i) { return a + i * 4; }
+int main() { return g(3, 0, 0, 0, 0, 0, 0, 0, 1); }
+"""
+
+
+# the parameters past the eighth come from the frame of the caller, whatever the function
+# allocated before
+@pytest.mark.parametrize("level", LEVELS)
+def testStackParametersAfterAnotherFunction(execute, level):
+    assert execute(MANY_PARAMETERS, level)[0] == 7
+
+
+@pytest.mark.parametrize("level", LEVELS)
+def testStackParametersInLoop(execute, level):
+    source = """
+    int f(int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) {
+        int s = 0;
+        while (i > 0) { s = s + j + a; i = i - 1; }
+        return s + b + c + d + e + f + g + h;
+    }
+    int k(int a, int b) { return a * b; }
+    int main() { return f(1, 2, 3, 4, 5, 6, 7, 8, 10, k(3, 4)); }
+    """
+    assert execute(source, level)[0] == 10 * (12 + 1) + 2 + 3 + 4 + 5 + 6 + 7 + 8
@@ -0,0 +1,59 @@
+import pytest
+
+"""
+SCCP never looks at the branches a known condition doesn't take: what they would assign
+doesn't spoil the constants after them, and the blocks go away with the branches. A value
+that differs on two executable paths, or over the iterations of a loop, isn't constant.
+"""
+
+PROGRAMS = {
+    "unreachable branches": (
+        """
+        int main() {
+            int x = 5; int y = 0;
+            if (x > 3) y = 4; else y = x * 100;
+            int z = 0;
+            if (y == 4) z = y * 3; else z = 1 / 0;
+            int w = 1;
+            if (y) w = 2;
+            if (w == 2) z = z + 1; else z = z / 0;
+            int k = 1; int s = 0;
+            for (int i = 0; i < 10; i = i + 1) { if (k != 1) k = 2; s = s + k * i; }
+            if (k == 1) s = s + 1000;
+            return s + z;
+        }
+        """,
+        1058,
+        # only the test of the loop
+        1,
+    ),
+    "reachable branches": (
+        """
+        int main() {
+            int n = 3; int k = 1; int s = 0;
+            for (int i = 0; i < n * 4; i = i + 1) { if (i > 5) k = 2; s = s + k; }
+            int c = 7;
+            while (c > 0) { if (c == 3) break; c = c - 1; }
+            return s * 10 + k + c;
+        }
+        """,
+        185,
+        4,
+    ),
+}
+
+PIPELINES = ["sccp", "sccp,simplifycfg,dce", "ssa,sccp,outofssa", "ssa,sccp,gvn,outofssa,dce"]
+
+
+@pytest.mark.parametrize("passes", PIPELINES)
+def testSameValue(execute, passes):
+    for name, (source, expected, _) in PROGRAMS.items():
+        assert execute(source)[0] == expected, name
+        assert execute(source, "--passes", passes)[0] == expected, name
+
+
+def testBranchesLeft(compiler):
+    for name, (source, _, branches) in PROGRAMS.items():
+        tac = compiler(source, "--tac", "--passes", "sccp").stdout
+        assert tac.count("if (") == branches, name
+    assert " / " not in compiler(PROGRAMS["unreachable branches"][0], "--tac", "--passes", "sccp").stdout
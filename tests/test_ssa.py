@@ -0,0 +1,183 @@
+import itertools
+import random
+
+import pytest
+
+from backend.opt.passmanager import PassManager
+from backend.opt.ssa import SSADestruct, inSSA, sequentialize
+from rvsim import run
+from utils.label.funclabel import MAIN_LABEL
+from utils.tac.tacfunc import TACFunc
+from utils.tac.tacinstr import *
+from utils.tac.tacprog import TACProg
+from utils.tac.temp import Temp
+
+"""
+SSA construction and destruction: programs keep their values through the round trip,
+and the copies that phis turn back into are right for the two classic pitfalls, built
+here directly in SSA form as copy folding would leave them:
+- the swap problem: phis reading each other on the back edge need a temporary;
+- the lost copy problem: a phi read after the loop, on a back edge leaving a block with
+  two successors, must not be overwritten on the way out of the loop.
+"""
+
+PROGRAMS = {
+    "swap": (
+        """
+        int main() {
+            int a = 1; int b = 2; int c = 3; int i = 0;
+            while (i < 7) { int t = a; a = b; b = c; c = t; i = i + 1; }
+            return a * 100 + b * 10 + c;
+        }
+        """,
+        231,
+    ),
+    "lost copy": (
+        """
+        int main() {
+            int x = 1; int y = 0; int i = 0;
+            while (1) { y = x; x = x * 2 + i; i = i + 1; if (i >= 6) break; }
+            return y * 1000 + x;
+        }
+        """,
+        58121,
+    ),
+    "nested": (
+        """
+        int main() {
+            int s = 0; int p = 1;
+            for (int i = 0; i < 6; i = i + 1) {
+                int q = p;
+                for (int j = 0; j < i; j = j + 1) { if (j % 2) q = q + s; else s = s + q; }
+                p = q - p;
+            }
+            return s + p;
+        }
+        """,
+        0,
+    ),
+}
+
+PIPELINES = ["ssa", "ssa,copyprop,dce", "ssa,sccp,gvn,copyprop,dce", "ssa,outofssa,ssa,gvn"]
+
+
+@pytest.mark.parametrize("passes", PIPELINES)
+def testRoundTrip(execute, passes):
+    for name, (source, expected) in PROGRAMS.items():
+        reference = execute(source)[0]
+        assert reference == expected, name
+        assert execute(source, "--passes", passes)[0] == reference, name
+
+
+def testNoPhiLeft(compiler):
+    for source, _ in PROGRAMS.values():
+        assert "PHI" not in compiler(source, "--tac", "--passes", "ssa,gvn").stdout
+
+
+class SSAFunc:
+    """
+    A main function written directly in SSA form, block by block.
+    """
+
+    def __init__(self) -> None:
+        from frontend.tacgen.tacgen import LabelManager
+
+        self.func = TACFunc(MAIN_LABEL, 0, LabelManager())
+        self.func.add(Mark(MAIN_LABEL))
+
+    def temp(self) -> Temp:
+        return self.func.freshTemp()
+
+    def load(self, value: int) -> Temp:
+        temp = self.temp()
+        self.func.add(LoadImm4(temp, value))
+        return temp
+
+    def add(self, *instrs: TACInstr) -> None:
+        for instr in instrs:
+            self.func.add(instr)
+
+    def result(self) -> int:
+        assert inSSA(self.func)
+        PassManager([SSADestruct()]).run(TACProg([self.func]))
+        assert not inSSA(self.func)
+        from backend.asm import Asm
+        from backend.reg.bruteregalloc import BruteRegAlloc
+        from backend.riscv.riscvasmemitter import RiscvAsmEmitter
+        from utils.riscv import Riscv
+
+        emitter = RiscvAsmEmitter(Riscv.AllocatableRegs, Riscv.CallerSaved)
+        return run(Asm(emitter, BruteRegAlloc(emitter)).transform(TACProg([self.func])))[0]
+
+
+def testSwapProblem():
+    # a, b = 1, 2; for (i = 0; i < 5; i++) a, b = b, a; return a * 10 + b
+    f = SSAFunc()
+    a0, b0, i0 = f.load(1), f.load(2), f.load(0)
+    header, body, exit = f.func.freshLabel(), f.func.freshLabel(), f.func.freshLabel()
+    a1, b1, i1, i2 = f.temp(), f.temp(), f.temp(), f.temp()
+    five, cond, one = f.temp(), f.temp(), f.temp()
+    ten, scaled, result = f.temp(), f.temp(), f.temp()
+    f.add(
+        Mark(header),
+        Phi(a1, [a0, b1], [MAIN_LABEL, body]),
+        Phi(b1, [b0, a1], [MAIN_LABEL, body]),
+        Phi(i1, [i0, i2], [MAIN_LABEL, body]),
+        LoadImm4(five, 5),
+        Binary(TacBinaryOp.SLT, cond, i1, five),
+        CondBranch(CondBranchOp.BEQ, cond, exit),
+        Mark(body),
+        LoadImm4(one, 1),
+        Binary(TacBinaryOp.ADD, i2, i1, one),
+        Branch(header),
+        Mark(exit),
+        LoadImm4(ten, 10),
+        Binary(TacBinaryOp.MUL, scaled, a1, ten),
+        Binary(TacBinaryOp.ADD, result, scaled, b1),
+        Return(result),
+    )
+    assert f.result() == 21
+
+
+def testLostCopyProblem():
+    # x = 1; do { y = x; x = x * 3; } while (x < 100); return y * 1000 + x, with y folded into x1
+    f = SSAFunc()
+    x0 = f.load(1)
+    loop = f.func.freshLabel()
+    x1, x2, three, hundred, cond = f.temp(), f.temp(), f.temp(), f.temp(), f.temp()
+    thousand, scaled, result = f.temp(), f.temp(), f.temp()
+    f.add(
+        Mark(loop),
+        Phi(x1, [x0, x2], [MAIN_LABEL, loop]),
+        LoadImm4(three, 3),
+        Binary(TacBinaryOp.MUL, x2, x1, three),
+        LoadImm4(hundred, 100),
+        Binary(TacBinaryOp.SLT, cond, x2, hundred),
+        CondBranch(CondBranchOp.BNE, cond, loop),
+        LoadImm4(thousand, 1000),
+        Binary(TacBinaryOp.MUL, scaled, x1, thousand),
+        Binary(TacBinaryOp.ADD, result, scaled, x2),
+        Return(result),
+    )
+    assert f.result() == 81 * 1000 + 243
+
+
+# parallel copies among a few temps, cycles and fan-outs included
+@pytest.mark.parametrize("seed", range(200))
+def testSequentialize(seed):
+    generator = random.Random(seed)
+    temps = [Temp(i) for i in range(generator.randint(1, 6))]
+    dsts = generator.sample(temps, generator.randint(1, len(temps)))
+    copies = [(dst, generator.choice(temps)) for dst in dsts]
+    fresh = itertools.count(100)
+    sequence = sequentialize(copies, lambda: Temp(next(fresh)))
+
+    before = {temp.index: 1000 + temp.index for temp in temps}
+    after = dict(before)
+    for instr in sequence:
+        after[instr.dst.index] = after[instr.src.index]
+    for dst, src in copies:
+        assert after[dst.index] == before[src.index]
+    for temp in temps:
+        if temp not in dsts:
+            assert after[temp.index] == before[temp.index]
@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+"""
+Streaming (--stream) compiles one function at a time, and must write exactly what the
+fused front end writes for the whole program at once. Only function passes run when
+streaming, so the comparison is for the pipelines made of those alone (-O2 inlines).
+The labels that passes make are numbered in the order the functions are optimized, which
+differs, so after passes that make some the labels are only compared up to renaming.
+"""
+
+PROGRAMS = [
+    """
+    int f(int a) { return a * 2 + 1; }
+    int main() { return f(3); }
+    """,
+    """
+    int g(int x, int y);
+    int f(int n) { if (n <= 0) return 0; return g(n - 1, n) + 1; }
+    int g(int x, int y) { return f(x) + y; }
+    int main() { return f(10); }
+    """,
+    """
+    int sq(int x) { return x * x; }
+    int sum(int n) {
+        int s = 0;
+        for (int i = 1; i <= n; i = i + 1) { if (i % 3 == 0) continue; s = s + sq(i); }
+        return s;
+    }
+    int many(int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) {
+        return a + b * c - d + e * f - g + h * i - j;
+    }
+    int main() { int s = 0; while (s < 1000) s = s + sum(5); return s + many(1, 2, 3, 4, 5, 6, 7, 8, 9, 10); }
+    """,
+    "".join("int f%d(int a) { int b = a * %d; while (b > 100) b = b / 2; return b; }\n" % (i, i) for i in range(40))
+    + "int main() { return f39(f7(3)); }\n",
+]
+
+
+LEVELS = [("-O0",), ("-O1",)]
+PASSES = ("--passes", "ssa,sccp,gvn,outofssa,looprotate,licm,unroll,pre,dce")
+
+
+# the labels renamed in the order they first appear
+def canonical(text: str) -> str:
+    names: dict[str, str] = {}
+    return re.sub(r"\b_L\d+\b", lambda m: names.setdefault(m.group(), "_L%d" % len(names)), text)
+
+
+def outputs(compiler, *flags: str) -> list[tuple[str, str]]:
+    return [
+        (compiler(source, *flags, "--fused").stdout, compiler(source, *flags, "--stream").stdout)
+        for source in PROGRAMS
+    ]
+
+
+@pytest.mark.parametrize("flags", LEVELS, ids=" ".join)
+@pytest.mark.parametrize("target", ["--riscv", "--tac"])
+def testSameOutput(compiler, target, flags):
+    for fused, streamed in outputs(compiler, target, *flags):
+        assert streamed == fused
+
+
+@pytest.mark.parametrize("target", ["--riscv", "--tac"])
+def testSameOutputAfterPasses(compiler, target):
+    for fused, streamed in outputs(compiler, target, *PASSES):
+        assert canonical(streamed) == canonical(fused)
@@ -0,0 +1,77 @@
+import re
+
+import pytest
+
+MUTUAL = """
+int odd(int n);
+int even(int n) { if (n == 0) return 1; return odd(n - 1); }
+int odd(int n) { if (n == 0) return 0; return even(n - 1); }
+int main() { return even(%d); }
+"""
+
+ACCUMULATED = """
+int sum(int n) { if (n == 0) return 0; return n + sum(n - 1); }
+int fact(int n) { if (n <= 1) return 1; return n * fact(n - 1); }
+int down(int n) { if (n <= 0) return 7; return down(n - 1) - n; }
+int main() { return sum(%d) + fact(10) + down(100); }
+"""
+
+
+def testNoTailCallsBelowO2(compiler):
+    for level in ("-O0", "-O1"):
+        asm = compiler(MUTUAL % 10, "--riscv", level).stdout
+        assert "call odd" in asm and "call even" in asm
+
+
+def testMutualRecursionInConstantStack(execute):
+    value, stack = execute(MUTUAL % 20001, "-O2")
+    assert value == 0
+    assert stack < 1024
+
+
+@pytest.mark.parametrize("flags", [("-O2",), ("--passes", "tailrec")])
+def testAccumulatorRecursionInConstantStack(execute, flags):
+    n = 20000
+    expected = (n * (n + 1) // 2 + 3628800 + 7 - 5050) & 0xFFFFFFFF
+    value, stack = execute(ACCUMULATED % n, *flags)
+    assert value & 0xFFFFFFFF == expected
+    assert stack < 1024
+
+
+# function -> (tail calls, through an accumulator) of tailrec on it
+LIMITS = {
+    "fib": ("int fib(int a, int b, int n) { if (n == 0) return a; return fib(b, a + b, n - 1); }", (1, 0)),
+    "swap": ("int swap(int a, int b, int n) { if (n == 0) return a * 10 + b; return swap(b, a, n - 1); }", (1, 0)),
+    "mixed": ("int mixed(int n) { if (n == 0) return 1; return n + 2 * mixed(n - 1); }", (0, 0)),
+    "flip": ("int flip(int n) { if (n == 0) return 3; return n - flip(n - 1); }", (0, 0)),
+    "later": ("int later(int n) { if (n <= 1) return 1; int r = later(n - 1); n = n * 2; return r * n; }", (0, 0)),
+    "twoWays": (
+        "int twoWays(int n) { if (n <= 0) return 1; if (n % 2) return twoWays(n - 1) * 3; "
+        "return n * twoWays(n - 1) * 2; }",
+        (2, 2),
+    ),
+    "kinds": (
+        "int kinds(int n) { if (n <= 0) return 2; if (n % 2) return kinds(n - 1) + n; return kinds(n - 1) * 2; }",
+        (1, 1),
+    ),
+}
+
+LIMITED = "\n".join(source for source, _ in LIMITS.values()) + """
+int main() {
+    return kinds(12) * 13 + fib(0, 1, 20) + swap(1, 2, 7) * 17 + mixed(10) * 3 + flip(9) * 5 + later(6) * 7
+        + twoWays(9) * 11;
+}
+"""
+
+
+@pytest.mark.parametrize("flags", [("--passes", "tailrec"), ("--passes", "tailrec,inline,dce"), ("-O2",)])
+def testAccumulatorLimits(execute, flags):
+    assert execute(LIMITED)[0] == execute(LIMITED, *flags)[0] == 16606770
+
+
+def testAccumulatorStats(compiler):
+    stats = compiler(LIMITED, "--tac", "--passes", "tailrec", "--pass-stats").stderr
+    found = re.findall(r"^tailrec +(\w+) .* (\d+) tail calls, (\d+) through an accumulator$", stats, re.M)
+    assert {name: (int(calls), int(accumulated)) for name, calls, accumulated in found if name != "main"} == {
+        name: counts for name, (_, counts) in LIMITS.items()
+    }
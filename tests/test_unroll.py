@@ -0,0 +1,66 @@
+import pytest
+
+from backend.opt import buildPassManager
+from backend.opt.unroll import FACTOR, MAX_TRIPS, LoopUnroll
+from rvsim import run
+from utils.tac.tacinstr import CondBranch
+
+"""
+The limits of LoopUnroll are arguments of the pass, given to the pipeline by the name of
+the pass: checked on the pass made, and on a program compiled with each of them.
+"""
+
+SOURCE = """
+int main() {
+    int s = 0;
+    for (int i = 0; i < 10; i = i + 1) s = s + i * i;
+    int t = 0;
+    for (int j = 0; j < s; j = j + 1) t = t + j;
+    return (s + t) % 256;
+}
+"""
+
+OFF = {"maxTrips": 0, "factor": 1}
+
+
+def unrollOf(pm) -> LoopUnroll:
+    return next(p for p in pm.passes if isinstance(p, LoopUnroll))
+
+
+def testOptionsReachThePass():
+    made = unrollOf(buildPassManager(2))
+    assert (made.maxTrips, made.factor) == (MAX_TRIPS, FACTOR)
+    made = unrollOf(buildPassManager(2, options={"unroll": {"factor": 8, "partialBudget": 1000}}))
+    assert (made.factor, made.partialBudget, made.maxTrips) == (8, 1000, MAX_TRIPS)
+    made = unrollOf(buildPassManager(0, ["looprotate", "unroll"], options={"unroll": {"maxTrips": 3}}))
+    assert made.maxTrips == 3
+
+
+# (the value main returns, the conditional branches left in it)
+def compileWith(options) -> tuple[int, int]:
+    from backend.asm import Asm
+    from backend.reg.bruteregalloc import BruteRegAlloc
+    from backend.riscv.riscvasmemitter import RiscvAsmEmitter
+    from frontend.lexer import lexer
+    from frontend.parser import parser
+    from frontend.tacgen.fusedtacgen import FusedTACGen
+    from utils.riscv import Riscv
+
+    prog = FusedTACGen().transform(parser.parse(SOURCE, lexer=lexer))
+    buildPassManager(2, options=options).run(prog)
+    branches = sum(isinstance(instr, CondBranch) for instr in prog.funcs[0].getInstrSeq())
+    emitter = RiscvAsmEmitter(Riscv.AllocatableRegs, Riscv.CallerSaved)
+    return run(Asm(emitter, BruteRegAlloc(emitter)).transform(prog))[0], branches
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"maxTrips": 4}, {"fullBudget": 8}, {"factor": 8, "partialBudget": 1000}, {"factor": 2}, OFF],
+    ids=repr,
+)
+def testSameValue(options):
+    assert compileWith({"unroll": options})[0] == compileWith(None)[0] == 51
+
+
+def testOff():
+    assert compileWith({"unroll": OFF})[1] > compileWith(None)[1]
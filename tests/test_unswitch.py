@@ -0,0 +1,68 @@
+import itertools
+
+import pytest
+
+from backend.opt import buildPassManager
+from backend.opt.unswitch import GROWTH, LoopUnswitch
+from rvsim import run
+
+"""
+LoopUnswitch copies a loop for every condition it takes out of it, as long as the loops
+copied in a function fit in its `growth`: with none nothing is unswitched, with a little
+only one of the two loops of f is, and the values never change.
+"""
+
+SOURCE = """
+int f(int k) {
+    int s = 0;
+    for (int i = 0; i < 10; i = i + 1) { if (k) s = s + i; else s = s - 2 * i; }
+    for (int j = 0; j < 6; j = j + 1) { if (k > 1) s = s * 3 % 1007; else s = s + j; }
+    return s;
+}
+
+int main() { return f(0) + f(1) * 3 + f(2) * 5; }
+"""
+
+PASSES = ["looprotate", "licm", "unswitch"]
+
+
+def testOptionsReachThePass():
+    made = next(p for p in buildPassManager(2).passes if isinstance(p, LoopUnswitch))
+    assert made.growth == GROWTH
+    pm = buildPassManager(0, PASSES, options={"unswitch": {"growth": 7}})
+    made = next(p for p in pm.passes if isinstance(p, LoopUnswitch))
+    assert made.growth == 7
+
+
+# (the value main returns, the instructions left in f)
+def compileWith(passes: list[str], growth: int = GROWTH) -> tuple[int, int]:
+    from backend.asm import Asm
+    from backend.reg.bruteregalloc import BruteRegAlloc
+    from backend.riscv.riscvasmemitter import RiscvAsmEmitter
+    from frontend.lexer import lexer
+    from frontend.parser import parser
+    from frontend.tacgen.fusedtacgen import FusedTACGen
+    from utils.riscv import Riscv
+
+    prog = FusedTACGen().transform(parser.parse(SOURCE, lexer=lexer))
+    buildPassManager(0, passes, options={"unswitch": {"growth": growth}}).run(prog)
+    size = len(prog.funcs[0].getInstrSeq())
+    emitter = RiscvAsmEmitter(Riscv.AllocatableRegs, Riscv.CallerSaved)
+    return run(Asm(emitter, BruteRegAlloc(emitter)).transform(prog))[0], size
+
+
+def testGrowth():
+    value, before = compileWith(PASSES[:-1])
+    assert value == 3010
+    assert compileWith(PASSES, 0) == (value, before)
+
+    # the smallest growth that unswitches a loop doesn't fit both
+    one = next(size for size in (compileWith(PASSES, growth)[1] for growth in itertools.count()) if size > before)
+    both = compileWith(PASSES)[1]
+    assert before < one < both
+
+
+@pytest.mark.parametrize("growth", [0, 10, 15, 20, 30, GROWTH])
+def testSameValue(growth):
+    assert compileWith(PASSES, growth)[0] == 3010
+    assert compileWith(PASSES + ["simplifycfg", "dce"], growth)[0] == 3010
@@ -1,9 +1,10 @@
-import inspect
 import types
 from typing import Optional, TypeVar
 
 
 def caller_module():
+    import inspect
+
     frame = inspect.stack()[2]
     module = inspect.getmodule(frame[0])
     for frame in inspect.stack():
@@ -1,3 +1,5 @@
+from typing import TextIO
+
 from utils.label.label import Label
 from utils.tac.nativeinstr import NativeInstr
 from utils.tac.tacinstr import TACInstr
@@ -8,26 +10,31 @@ class AsmCodePrinter:
     COMMENT_PROMPT = "#"
 
     def __init__(self) -> None:
-        self.buffer = ""
+        # pieces of the output, joined once in `close` (repeated `str +=` is quadratic)
+        self.buffer: list[str] = []
 
     def printf(self, fmt: str, **args):
-        self.buffer += self.INDENTS + fmt.format(**args)
+        self.buffer.append(self.INDENTS + fmt.format(**args))
 
     def println(self, fmt: str, **args):
-        self.buffer += self.INDENTS + fmt.format(**args) + "\n"
+        self.buffer.append(self.INDENTS + fmt.format(**args) + "\n")
 
     def printLabel(self, label: Label):
-        self.buffer += str(label.name) + ":\n"
+        self.buffer.append(str(label.name) + ":\n")
 
     def printInstr(self, instr: NativeInstr):
         if instr.isLabel():
-            self.buffer += str(instr.label) + ":"
+            self.buffer.append(str(instr.label) + ":\n")
         else:
-            self.buffer += self.INDENTS + str(instr)
-        self.buffer += "\n"
+            self.buffer.append(self.INDENTS + str(instr) + "\n")
 
     def printComment(self, comment: str):
-        self.buffer += self.INDENTS + self.COMMENT_PROMPT + " " + comment + "\n"
+        self.buffer.append(self.INDENTS + self.COMMENT_PROMPT + " " + comment + "\n")
 
     def close(self) -> str:
-        return self.buffer
+        return "".join(self.buffer)
+
+    # write out what has been printed so far and forget it (used when streaming)
+    def flushTo(self, out: TextIO) -> None:
+        out.write("".join(self.buffer))
+        self.buffer.clear()
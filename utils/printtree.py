@@ -11,37 +11,46 @@ class TreePrinter:
         self.indentNum = 0
 
     def work(self, element) -> None:
-        if element is None:
-            self.printLine("<None: here is a bug>")
+        # An explicit stack keeps deeply nested trees from hitting the recursion limit.
+        # Besides elements, the stack holds callables that close a bracket / an indentation.
+        stack = [element]
+        while stack:
+            element = stack.pop()
+            if callable(element):
+                element()
+
+            elif element is None:
+                self.printLine("<None: here is a bug>")
+
+            elif isinstance(element, Node):
+                if element.is_leaf():
+                    self.printLine(str(element))
+                    continue
+
+                if len(element) == 0:
+                    self.printLine(f"{element.name} {self.lr}")
+                    continue
+
+                self.printLine(f"{element.name} {self.l}")
+                self.incIndent()
+                stack.append(self.closeBracket)
+                stack.extend(reversed(list(element)))
+
+            elif isinstance(element, list):
+                self.printLine("List")
+                self.incIndent()
+                stack.append(self.decIndent)
+                if len(element) == 0:
+                    self.printLine("<empty>")
+                else:
+                    stack.extend(reversed(element))
 
-        elif isinstance(element, Node):
-            if element.is_leaf():
-                self.printLine(str(element))
-                return
-
-            if len(element) == 0:
-                self.printLine(f"{element.name} {self.lr}")
-                return
-
-            self.printLine(f"{element.name} {self.l}")
-            self.incIndent()
-            for it in element:
-                self.work(it)
-            self.decIndent()
-            self.printLine(self.r)
-
-        elif isinstance(element, list):
-            self.printLine("List")
-            self.incIndent()
-            if len(element) == 0:
-                self.printLine("<empty>")
             else:
-                for it in element:
-                    self.work(it)
-            self.decIndent()
+                self.printLine(str(element))
 
-        else:
-            self.printLine(str(element))
+    def closeBracket(self) -> None:
+        self.decIndent()
+        self.printLine(self.r)
 
     def outputIndent(self) -> None:
         if self.indentNum > 0:
@@ -37,6 +37,19 @@ class RvBinaryOp(Enum):
     SGT = auto()
     GEQ = auto()
     AND = auto()
+    MULH = auto()
+    MULHU = auto()
+    DIVU = auto()
+    REMU = auto()
+
+
+# the operations with an immediate as second operand
+@unique
+class RvBinaryImmOp(Enum):
+    ANDI = auto()
+    SLLI = auto()
+    SRLI = auto()
+    SRAI = auto()
 
 class Riscv:
 
@@ -148,13 +161,24 @@ class Riscv:
                 str(self.dsts[0]), str(self.srcs[0]), str(self.srcs[1])
             )
     
+    class BinaryImm(TACInstr):
+        def __init__(self, op: RvBinaryImmOp, dst: Temp, src: Temp, imm: int) -> None:
+            super().__init__(InstrKind.SEQ, [dst], [src], None)
+            self.op = op.name.lower()
+            self.imm = imm
+
+        def __str__(self) -> str:
+            return "{} ".format(self.op) + Riscv.FMT3.format(str(self.dsts[0]), str(self.srcs[0]), self.imm)
+
+    # beq: jump if cond == 0, bne: jump if cond != 0
     class Branch(TACInstr):
-        def __init__(self, cond: Temp, target: Label) -> None:
+        def __init__(self, cond: Temp, target: Label, op: str = "beq") -> None:
             super().__init__(InstrKind.COND_JMP, [], [cond], target)
             self.target = target
+            self.op = op
         
         def __str__(self) -> str:
-            return "beq " + Riscv.FMT3.format(str(Riscv.ZERO), str(self.srcs[0]), str(self.target))
+            return "{} ".format(self.op) + Riscv.FMT3.format(str(Riscv.ZERO), str(self.srcs[0]), str(self.target))
 
     class Jump(TACInstr):
         def __init__(self, target: Label) -> None:
@@ -213,6 +237,23 @@ class Riscv:
         def __str__(self) -> str:
             return f"call {self.label.name}"
 
+    # A call whose result is returned at once: the callee returns to our caller itself, so
+    # the frame is given back (as in the epilogue) before jumping to it.
+    class RTailCall(TACInstr):
+        def __init__(self, func_label: Label, param_list: List[Temp]):
+            super().__init__(InstrKind.RET, [], param_list, func_label)
+
+        def __str__(self) -> str:
+            return f"tail {self.label.name}"
+
+    # the jump of a tail call, printed after the epilogue code by the subroutine emitter
+    class NativeTailCall(NativeInstr):
+        def __init__(self, func_label: Label) -> None:
+            super().__init__(InstrKind.RET, [], [], func_label)
+
+        def __str__(self) -> str:
+            return f"j {self.label.name}"
+
     class NativeReturn(NativeInstr):
         def __init__(self) -> None:
             super().__init__(InstrKind.RET, [Riscv.RA], [], None)
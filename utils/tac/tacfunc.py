@@ -1,15 +1,18 @@
 from utils.label.funclabel import FuncLabel
-from typing import List
-from .tacinstr import TACInstr
+from utils.label.label import Label
+from typing import Any, List
+from .tacinstr import LoadImm4, TACInstr
 from utils.tac.temp import Temp
 
 class TACFunc:
-    def __init__(self, entry: FuncLabel, numArgs: int) -> None:
+    def __init__(self, entry: FuncLabel, numArgs: int, labelManager: Any = None) -> None:
         self.entry = entry
         self.numArgs = numArgs
         self.tempArgs: List[Temp] = []
         self.instrSeq = []
         self.tempUsed = 0
+        # the LabelManager of the program, so that optimizations can create fresh labels too
+        self.labelManager = labelManager
         
     
     def getInstrSeq(self) -> list[TACInstr]:
@@ -18,6 +21,29 @@ class TACFunc:
     def getUsedTempCount(self) -> int:
         return self.tempUsed
 
+    # To get a temp that is not used anywhere in the function yet.
+    def freshTemp(self) -> Temp:
+        temp = Temp(self.tempUsed)
+        self.tempUsed += 1
+        return temp
+
+    # To get a label that is unique in the whole program.
+    def freshLabel(self) -> Label:
+        return self.labelManager.freshLabel()
+
+    # temp index -> the constant it holds, for the temps only ever loaded with that one
+    # constant (not the parameters, which the caller writes too)
+    def constants(self) -> dict[int, int]:
+        constants: dict[int, int] = {}
+        others = {temp.index for temp in self.tempArgs}
+        for instr in self.instrSeq:
+            for index in instr.getWritten():
+                if not isinstance(instr, LoadImm4) or constants.setdefault(index, instr.value) != instr.value:
+                    others.add(index)
+        for index in others:
+            constants.pop(index, None)
+        return constants
+
     def add(self, instr: TACInstr) -> None:
         self.instrSeq.append(instr)
     
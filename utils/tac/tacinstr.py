@@ -1,3 +1,4 @@
+import copy
 from enum import Enum, auto, unique
 from typing import Any, Optional, Union, List
 
@@ -72,13 +73,40 @@ class TACInstr:
     def accept(self, v: TACVisitor) -> None:
         pass
 
+    # The named operands of the instructions below (dst, lhs, cond...) are views of
+    # `dsts`/`srcs`, so a pass can rename temps by rewriting these two lists only.
+    def replaceSrcs(self, mapping: dict[int, Temp]) -> None:
+        self.srcs = [mapping.get(src.index, src) for src in self.srcs]
+
+    def replaceDsts(self, mapping: dict[int, Temp]) -> None:
+        self.dsts = [mapping.get(dst.index, dst) for dst in self.dsts]
+
+    # A copy of the instruction, for a pass that duplicates code: renaming the temps of the
+    # copy doesn't change the original.
+    def clone(self) -> "TACInstr":
+        instr = copy.copy(self)
+        instr.dsts = self.dsts.copy()
+        instr.srcs = self.srcs.copy()
+        return instr
+
+
+def _operand(kind: str, i: int) -> property:
+    def get(self):
+        return getattr(self, kind)[i]
+
+    def set(self, temp):
+        getattr(self, kind)[i] = temp
+
+    return property(get, set)
+
 
 # Assignment instruction.
 class Assign(TACInstr):
     def __init__(self, dst: Temp, src: Temp) -> None:
         super().__init__(InstrKind.SEQ, [dst], [src], None)
-        self.dst = dst
-        self.src = src
+
+    dst = _operand("dsts", 0)
+    src = _operand("srcs", 0)
 
     def __str__(self) -> str:
         return "%s = %s" % (self.dst, self.src)
@@ -91,9 +119,10 @@ class Assign(TACInstr):
 class LoadImm4(TACInstr):
     def __init__(self, dst: Temp, value: int) -> None:
         super().__init__(InstrKind.SEQ, [dst], [], None)
-        self.dst = dst
         self.value = value
 
+    dst = _operand("dsts", 0)
+
     def __str__(self) -> str:
         return "%s = %d" % (self.dst, self.value)
 
@@ -106,8 +135,9 @@ class Unary(TACInstr):
     def __init__(self, op: TacUnaryOp, dst: Temp, operand: Temp) -> None:
         super().__init__(InstrKind.SEQ, [dst], [operand], None)
         self.op = op
-        self.dst = dst
-        self.operand = operand
+
+    dst = _operand("dsts", 0)
+    operand = _operand("srcs", 0)
 
     def __str__(self) -> str:
         return "%s = %s %s" % (
@@ -125,9 +155,10 @@ class Binary(TACInstr):
     def __init__(self, op: TacBinaryOp, dst: Temp, lhs: Temp, rhs: Temp) -> None:
         super().__init__(InstrKind.SEQ, [dst], [lhs, rhs], None)
         self.op = op
-        self.dst = dst
-        self.lhs = lhs
-        self.rhs = rhs
+
+    dst = _operand("dsts", 0)
+    lhs = _operand("srcs", 0)
+    rhs = _operand("srcs", 1)
 
     def __str__(self) -> str:
         opStr = {
@@ -144,6 +175,8 @@ class Binary(TACInstr):
             TacBinaryOp.GEQ: ">=",
             TacBinaryOp.AND: "&&",
             TacBinaryOp.OR: "||",
+            TacBinaryOp.DIVU: "/u",
+            TacBinaryOp.REMU: "%u",
         }[self.op]
         return "%s = (%s %s %s)" % (self.dst, self.lhs, opStr, self.rhs)
 
@@ -155,7 +188,10 @@ class Binary(TACInstr):
 class Branch(TACInstr):
     def __init__(self, target: Label) -> None:
         super().__init__(InstrKind.JMP, [], [], target)
-        self.target = target
+
+    @property
+    def target(self) -> Label:
+        return self.label
 
     def __str__(self) -> str:
         return "branch %s" % str(self.target)
@@ -169,8 +205,12 @@ class CondBranch(TACInstr):
     def __init__(self, op: CondBranchOp, cond: Temp, target: Label) -> None:
         super().__init__(InstrKind.COND_JMP, [], [cond], target)
         self.op = op
-        self.cond = cond
-        self.target = target
+
+    cond = _operand("srcs", 0)
+
+    @property
+    def target(self) -> Label:
+        return self.label
 
     def __str__(self) -> str:
         return "if (%s %s) branch %s" % (
@@ -186,11 +226,15 @@ class Call(TACInstr):
     def __init__(self, func_label: Label, dst: Temp, TempParms: List[Temp]):
         super(Call, self).__init__(InstrKind.SEQ, [dst], TempParms, func_label)
 
+    dst = _operand("dsts", 0)
+
     def accept(self, v: TACVisitor) -> None:
         return v.visitCall(self)
 
     def __str__(self) -> str:
-        return f"{self.dsts[0]} = CALL {self.label.name} ({self.srcs})"
+        return "%s = CALL %s (%s)" % (
+            self.dsts[0], self.label.name, ", ".join(map(str, self.srcs))
+        )
     
 # Return instruction.
 class Return(TACInstr):
@@ -199,7 +243,10 @@ class Return(TACInstr):
             super().__init__(InstrKind.RET, [], [], None)
         else:
             super().__init__(InstrKind.RET, [], [value], None)
-        self.value = value
+
+    @property
+    def value(self) -> Optional[Temp]:
+        return self.srcs[0] if self.srcs else None
 
     def __str__(self) -> str:
         return "return" if (self.value is None) else ("return " + str(self.value))
@@ -231,3 +278,27 @@ class Mark(TACInstr):
 
     def accept(self, v: TACVisitor) -> None:
         v.visitMark(self)
+
+
+# Phi function of SSA form: dst takes srcs[i] when control comes from the block labelled labels[i].
+# (The entry block, which has no label of its own, is named by the label of the function.)
+class Phi(TACInstr):
+    def __init__(self, dst: Temp, srcs: list[Temp], labels: list[Label]) -> None:
+        super().__init__(InstrKind.SEQ, [dst], srcs, None)
+        self.labels = labels.copy()
+
+    dst = _operand("dsts", 0)
+
+    def clone(self) -> TACInstr:
+        instr = super().clone()
+        instr.labels = self.labels.copy()
+        return instr
+
+    def __str__(self) -> str:
+        return "%s = PHI(%s)" % (
+            self.dst,
+            ", ".join("%s: %s" % (label, src) for label, src in zip(self.labels, self.srcs)),
+        )
+
+    def accept(self, v: TACVisitor) -> None:
+        v.visitPhi(self)
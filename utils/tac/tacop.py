@@ -41,6 +41,9 @@ class TacBinaryOp(Enum):
     SGT = auto()
     GEQ = auto()
     AND = auto()
+    # division and remainder of a value that isn't negative by a positive one, done unsigned
+    DIVU = auto()
+    REMU = auto()
 
 # Kinds of branching with conditions.
 @unique
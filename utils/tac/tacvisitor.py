@@ -36,3 +36,6 @@ class TACVisitor:
 
    def visitMark(self, instr: Mark) -> None:
         self.visitOther(instr)
+
+   def visitPhi(self, instr: Phi) -> None:
+        self.visitOther(instr)